@@ -0,0 +1,230 @@
+"""
+Cursor latency under heavy gesture recognition load.
+
+Runs the host pipeline against a local simulated device while pure-Python
+DTW template matching (a stand-in for a heavy model) classifies every
+window of samples, and compares cursor latency for three layouts:
+
+* ``none``      - no recognition, the reference
+* ``threads``   - recognizers on threads of the host process, sharing its GIL
+* ``processes`` - recognizers in supervised worker processes fed through
+                  the shared-memory ring (``recognition.RecognitionSupervisor``)
+
+Exits non-zero when the ``processes`` p99 latency exceeds the reference by
+more than --max-p99-increase-ms.
+
+    python benchmarks/bench_recognition.py --workers 2 --templates 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from wifi_handler import WiFiHandler  # noqa: E402
+from mouse_controller import MouseController, NullBackend  # noqa: E402
+from gesture_handler import GestureHandler  # noqa: E402
+from simulator import SimulatedDevice  # noqa: E402
+from shm_ring import SampleRing, HAS_SHARED_MEMORY, KIND_CURSOR, KIND_IMU  # noqa: E402
+from recognition import (RecognitionSupervisor, WindowRecognizer,  # noqa: E402
+                         run_recognizer)
+from config import RECOGNITION_CONFIG  # noqa: E402
+from run_benchmarks import environment_metadata, percentile  # noqa: E402
+
+LAYOUTS = ('none', 'threads', 'processes')
+WINDOW_EVENT = "BENCH_WINDOW"
+
+
+class HeavyRecognizer(WindowRecognizer):
+    """DTW distance from every window to a set of random templates"""
+
+    kinds = (KIND_CURSOR, KIND_IMU)
+
+    def __init__(self, templates=8, seed=1, **kwargs):
+        super().__init__(**kwargs)
+        rng = random.Random(seed)
+        length = self.window.maxlen
+        self.templates = [[rng.uniform(-50.0, 50.0) for _ in range(length)]
+                          for _ in range(templates)]
+
+    def classify(self, window):
+        series = [row[3] for row in window]
+        min(dtw(series, template) for template in self.templates)
+        # Report every window so the benchmark can count the work done
+        return WINDOW_EVENT
+
+
+def dtw(a, b):
+    """Plain O(len(a) * len(b)) dynamic time warping distance"""
+    inf = float('inf')
+    previous = [0.0] + [inf] * len(b)
+    for x in a:
+        current = [inf]
+        for j, y in enumerate(b):
+            current.append(abs(x - y) + min(previous[j], previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def wait_for_workers(supervisor, timeout=30.0):
+    """Block until every worker has sent its first heartbeat"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(slot.heartbeat is not None and slot.heartbeat.value
+               for slot in supervisor.workers):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_layout(layout, rate_hz, duration, workers, options):
+    device = SimulatedDevice(rate_hz=rate_hz, sequence_velocity=True, record_send_times=True)
+    port = device.start()
+    wifi = WiFiHandler()
+    controller = MouseController(backend=NullBackend(), wifi_handler=wifi)
+    controller.flow_control.enabled = False  # hold the device at the requested rate
+    gestures = GestureHandler()
+    windows = []
+    gestures.subscribe(WINDOW_EVENT, windows.append, name='bench.windows')
+
+    supervisor = None
+    ring = None
+    stop = threading.Event()
+    threads = []
+    if layout == 'processes':
+        config = dict(RECOGNITION_CONFIG,
+                      recognizers=[('bench_recognition:HeavyRecognizer', options)] * workers)
+        # Straight onto the bus: every window counts, without the controller's cooldown
+        supervisor = RecognitionSupervisor(gestures.publish, config)
+        if not supervisor.start() or not wait_for_workers(supervisor):
+            raise RuntimeError("recognition workers did not start")
+        controller.set_sample_sink(supervisor.ring)
+    elif layout == 'threads':
+        ring = SampleRing.create(RECOGNITION_CONFIG['ring_capacity'])
+        controller.set_sample_sink(ring)
+
+        def emit(kind, payload):
+            if kind == 'gesture':
+                gestures.publish(payload)
+
+        for index in range(workers):
+            thread = threading.Thread(
+                target=run_recognizer, name=f'Recognizer-{index}',
+                args=(ring, HeavyRecognizer(**options), emit, stop),
+                kwargs={'batch': RECOGNITION_CONFIG['batch'],
+                        'poll_interval': RECOGNITION_CONFIG['poll_interval']},
+                daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    latencies = []
+
+    def on_line(line):
+        received = time.perf_counter()
+        controller.process_data(line)
+        if line.startswith("CURSOR,"):
+            sent = device.sent_times.pop(int(float(line.split(',')[1])), None)
+            if sent is not None:
+                latencies.append(received - sent)
+
+    wifi.set_data_callback(on_line)
+    try:
+        if not wifi.connect('127.0.0.1', port):
+            raise RuntimeError("could not connect to simulated device")
+        wifi.write("CURSOR_MODE\n")
+        time.sleep(0.5)
+        latencies.clear()
+        del windows[:]
+        start = time.perf_counter()
+        time.sleep(duration)
+        elapsed = time.perf_counter() - start
+        recognised = len(windows)
+        measured = list(latencies)
+    finally:
+        wifi.disconnect()
+        device.stop()
+        controller.set_sample_sink(None)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=5.0)
+        if supervisor is not None:
+            supervisor.stop()
+        if ring is not None:
+            ring.close()
+        gestures.shutdown()
+
+    latencies_ms = [value * 1000.0 for value in measured]
+    return {
+        'layout': layout,
+        'workers': workers if layout != 'none' else 0,
+        'windows_per_sec': recognised / elapsed,
+        'samples': len(latencies_ms),
+        'latency_p50_ms': percentile(latencies_ms, 50),
+        'latency_p95_ms': percentile(latencies_ms, 95),
+        'latency_p99_ms': percentile(latencies_ms, 99),
+        'latency_max_ms': max(latencies_ms) if latencies_ms else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cursor latency under recognition load")
+    parser.add_argument('--rate', type=float, default=500.0, help="device frames per second")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per layout")
+    parser.add_argument('--workers', type=int, default=2, help="recognizers per layout")
+    parser.add_argument('--templates', type=int, default=8,
+                        help="DTW templates matched per window; sets the model cost")
+    parser.add_argument('--layouts', default=','.join(LAYOUTS))
+    parser.add_argument('--max-p99-increase-ms', type=float, default=2.0)
+    parser.add_argument('--output', help="write the results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    layouts = [name.strip() for name in args.layouts.split(',') if name.strip()]
+    unknown = [name for name in layouts if name not in LAYOUTS]
+    if unknown:
+        parser.error(f"unknown layouts: {', '.join(unknown)}")
+    if 'processes' in layouts and not HAS_SHARED_MEMORY:
+        parser.error("the processes layout needs Python 3.8+")
+
+    logging.basicConfig(level=logging.WARNING)
+    options = {'templates': args.templates}
+    results = {}
+    for layout in layouts:
+        results[layout] = run_layout(layout, args.rate, args.duration, args.workers, options)
+        print(f"{layout:>9}: p50={results[layout]['latency_p50_ms']:.2f} ms "
+              f"p99={results[layout]['latency_p99_ms']:.2f} ms "
+              f"max={results[layout]['latency_max_ms']:.2f} ms "
+              f"windows/s={results[layout]['windows_per_sec']:.1f}", file=sys.stderr)
+
+    failures = []
+    if 'none' in results and 'processes' in results:
+        increase = results['processes']['latency_p99_ms'] - results['none']['latency_p99_ms']
+        if increase > args.max_p99_increase_ms:
+            failures.append(f"p99 latency rose {increase:.2f} ms with recognition workers "
+                            f"(allowed {args.max_p99_increase_ms:.2f} ms)")
+
+    report = {
+        'environment': environment_metadata(),
+        'parameters': dict(vars(args), layouts=layouts),
+        'results': results,
+        'failures': failures,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for failure in failures:
+        print(f"RECOGNITION LATENCY FAILURE {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Cold-start benchmark for the headless daemon.
+
+Each run starts a fresh interpreter, imports the daemon module and builds
+the pipeline with the null output backend, then reports import time,
+construction time, peak resident memory and whether any heavy module
+(Qt, pyautogui, NumPy, ML frameworks) was loaded on the way.
+
+    python benchmarks/bench_startup.py --runs 10 --max-import-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['PyQt5', 'pyautogui', 'numpy', 'tensorflow', 'sklearn', 'scipy', 'pandas']
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import daemon
+t1 = time.perf_counter()
+d = daemon.AirMouseDaemon(dry_run=True)
+t2 = time.perf_counter()
+d.gesture_handler.shutdown()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = rss / 1024 if sys.platform == 'darwin' else rss
+except ImportError:
+    rss_kb = 0
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000.0,
+    'init_ms': (t2 - t1) * 1000.0,
+    'max_rss_kb': rss_kb,
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once():
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=REPO_DIR,
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000.0
+    return result
+
+
+def run(runs):
+    samples = [run_once() for _ in range(runs)]
+    summary = {}
+    for key in ('import_ms', 'init_ms', 'process_ms', 'max_rss_kb'):
+        values = [s[key] for s in samples]
+        summary[key] = {'median': statistics.median(values), 'max': max(values)}
+    summary['heavy_modules'] = sorted({m for s in samples for m in s['heavy_modules']})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless daemon cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=None,
+                        help="fail if the median import time exceeds this budget")
+    parser.add_argument('--max-rss-mb', type=float, default=None,
+                        help="fail if the median peak RSS exceeds this budget")
+    args = parser.parse_args(argv)
+
+    summary = run(args.runs)
+    print(json.dumps(summary, indent=2))
+
+    failures = []
+    if summary['heavy_modules']:
+        failures.append(f"heavy modules imported: {', '.join(summary['heavy_modules'])}")
+    if args.max_import_ms is not None and summary['import_ms']['median'] > args.max_import_ms:
+        failures.append(f"import took {summary['import_ms']['median']:.1f} ms")
+    if args.max_rss_mb is not None and summary['max_rss_kb']['median'] / 1024 > args.max_rss_mb:
+        failures.append(f"peak RSS {summary['max_rss_kb']['median'] / 1024:.1f} MB")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
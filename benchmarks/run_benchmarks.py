@@ -0,0 +1,288 @@
+"""
+Host pipeline benchmark suite.
+
+Measures each stage on its own and the whole pipeline end to end against
+a local simulated device, then writes machine-readable JSON with
+environment metadata. Pass a previous result file as --baseline to fail
+on regressions beyond --threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.15
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from wifi_handler import WiFiHandler  # noqa: E402
+from mouse_controller import MouseController, NullBackend  # noqa: E402
+from gesture_handler import GestureHandler  # noqa: E402
+from simulator import SimulatedDevice  # noqa: E402
+
+# Metric name suffix -> True when larger is better
+METRIC_DIRECTIONS = {
+    '_per_sec': True,
+    '_us': False,
+    '_ms': False,
+}
+
+
+def environment_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def time_repeated(func, repeats):
+    """Run func() `repeats` times and return the per-run durations"""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_controller():
+    controller = MouseController(backend=NullBackend(), wifi_handler=WiFiHandler())
+    controller.set_gesture_callback(lambda data: None)
+    return controller
+
+
+def cursor_lines(count, seed=1):
+    rng = random.Random(seed)
+    return [f"CURSOR,{rng.uniform(-60, 60):.2f},{rng.uniform(-60, 60):.2f}" for _ in range(count)]
+
+
+def bench_framing(repeats, lines=20000):
+    """WiFiHandler line framing over 1 KiB receive chunks"""
+    payload = ("\n".join(cursor_lines(lines)) + "\n").encode('utf-8')
+    chunks = [payload[i:i + 1024] for i in range(0, len(payload), 1024)]
+    handler = WiFiHandler()
+    handler.set_data_callback(lambda line: None)
+
+    def run():
+        for chunk in chunks:
+            handler._feed(chunk)
+
+    durations = time_repeated(run, repeats)
+    best = min(durations)
+    return {'lines_per_sec': lines / best, 'per_line_us': best / lines * 1e6}
+
+
+def bench_parse_dispatch(repeats, lines=5000):
+    """MouseController.process_data over a mixed cursor/gesture stream"""
+    stream = cursor_lines(lines)
+    for i in range(0, lines, 50):
+        stream[i] = "GESTURE,LEFT" if i % 100 else "GESTURE,RIGHT"
+    controller = make_controller()
+
+    def run():
+        for line in stream:
+            controller.process_data(line)
+
+    durations = time_repeated(run, repeats)
+    best = min(durations)
+    return {'messages_per_sec': lines / best, 'per_message_us': best / lines * 1e6}
+
+
+def bench_smoothing(repeats, samples=20000):
+    """move_cursor smoothing against the null output backend"""
+    rng = random.Random(2)
+    velocities = [(rng.uniform(-60, 60), rng.uniform(-60, 60)) for _ in range(samples)]
+    controller = make_controller()
+
+    def run():
+        move = controller.move_cursor
+        for vx, vy in velocities:
+            move(vx, vy)
+
+    durations = time_repeated(run, repeats)
+    best = min(durations)
+    return {'samples_per_sec': samples / best, 'per_sample_us': best / samples * 1e6}
+
+
+def bench_gesture_dispatch(repeats, events=20000):
+    """GestureHandler.process_data with synchronous subscribers"""
+    handler = GestureHandler()
+    sink = []
+    for gesture in ["UP", "DOWN", "LEFT", "RIGHT"]:
+        handler.register_callback(gesture, sink.clear)
+    handler.subscribe("*", lambda gesture: None, priority=10)
+    frames = ["GESTURE," + ["UP", "DOWN", "LEFT", "RIGHT"][i % 4] for i in range(events)]
+
+    def run():
+        for frame in frames:
+            handler.process_data(frame)
+
+    durations = time_repeated(run, repeats)
+    handler.shutdown()
+    best = min(durations)
+    return {'events_per_sec': events / best, 'per_event_us': best / events * 1e6}
+
+
+def bench_loopback(rate_hz=500.0, duration=3.0):
+    """Full pipeline against a simulated device over local TCP"""
+    device = SimulatedDevice(rate_hz=rate_hz, sequence_velocity=True, record_send_times=True)
+    port = device.start()
+
+    wifi = WiFiHandler()
+    controller = MouseController(backend=NullBackend(), wifi_handler=wifi)
+    controller.flow_control.enabled = False  # hold the device at the requested rate
+    latencies = []
+
+    def on_line(line):
+        received = time.perf_counter()
+        controller.process_data(line)
+        if line.startswith("CURSOR,"):
+            sent = device.sent_times.pop(int(float(line.split(',')[1])), None)
+            if sent is not None:
+                latencies.append(received - sent)
+
+    wifi.set_data_callback(on_line)
+    try:
+        if not wifi.connect('127.0.0.1', port):
+            raise RuntimeError("could not connect to simulated device")
+        wifi.write("CURSOR_MODE\n")
+        time.sleep(0.2)
+        latencies.clear()
+        start_count = wifi.messages_received
+        start = time.perf_counter()
+        time.sleep(duration)
+        elapsed = time.perf_counter() - start
+        received = wifi.messages_received - start_count
+    finally:
+        wifi.disconnect()
+        device.stop()
+
+    latencies_ms = [value * 1000.0 for value in latencies]
+    return {
+        'target_rate_hz': rate_hz,
+        'messages_per_sec': received / elapsed,
+        'latency_p50_ms': percentile(latencies_ms, 50),
+        'latency_p95_ms': percentile(latencies_ms, 95),
+        'latency_p99_ms': percentile(latencies_ms, 99),
+        'latency_max_ms': max(latencies_ms) if latencies_ms else 0.0,
+        'samples': len(latencies_ms),
+    }
+
+
+def bench_startup(runs=3):
+    """Cold start of the headless daemon"""
+    from bench_startup import run
+    summary = run(runs)
+    return {
+        'import_ms': summary['import_ms']['median'],
+        'init_ms': summary['init_ms']['median'],
+        'process_ms': summary['process_ms']['median'],
+        'max_rss_kb': summary['max_rss_kb']['median'],
+    }
+
+
+def run_suite(repeats, loopback_rate, loopback_duration, selected=None):
+    benches = {
+        'framing': lambda: bench_framing(repeats),
+        'parse_dispatch': lambda: bench_parse_dispatch(repeats),
+        'smoothing': lambda: bench_smoothing(repeats),
+        'gesture_dispatch': lambda: bench_gesture_dispatch(repeats),
+        'loopback': lambda: bench_loopback(loopback_rate, loopback_duration),
+        'startup': lambda: bench_startup(),
+    }
+    results = {}
+    for name, bench in benches.items():
+        if selected and name not in selected:
+            continue
+        results[name] = bench()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions larger than `threshold` (a fraction)"""
+    regressions = []
+    for bench, metrics in results.items():
+        old_metrics = baseline.get(bench, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            direction = next((up for suffix, up in METRIC_DIRECTIONS.items()
+                              if metric.endswith(suffix)), None)
+            if direction is None or not old:
+                continue
+            change = (value - old) / old
+            if (direction and change < -threshold) or (not direction and change > threshold):
+                regressions.append(f"{bench}.{metric}: {old:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wavesense host pipeline benchmarks")
+    parser.add_argument('--output', help="write results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="previous results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed relative regression before failing")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--loopback-rate', type=float, default=500.0)
+    parser.add_argument('--loopback-duration', type=float, default=3.0)
+    parser.add_argument('--only', nargs='*', help="run only these benchmarks")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = {
+        'environment': environment_metadata(),
+        'parameters': {
+            'repeats': args.repeats,
+            'loopback_rate': args.loopback_rate,
+            'loopback_duration': args.loopback_duration,
+        },
+        'results': run_suite(args.repeats, args.loopback_rate,
+                             args.loopback_duration, args.only),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(report['results'], baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
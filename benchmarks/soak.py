@@ -0,0 +1,331 @@
+"""
+Soak test for the host pipeline.
+
+Runs the headless daemon pipeline (null output backend) against a local
+simulated device at a high frame rate for hours, sampling traced Python
+memory, RSS, open file descriptors, thread count and per-window cursor
+latency percentiles. At the end a least-squares trend is fitted to each
+series after the warm-up period, and the run fails when memory or p99
+latency grows faster than the allowed rate or threads leak.
+
+    python benchmarks/soak.py --duration 8h --rate 500 --output soak.json
+    python benchmarks/soak.py --duration 10m --modes cursor,gesture,raw
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import logging_setup  # noqa: E402
+from config import LOGGING_CONFIG  # noqa: E402
+from daemon import AirMouseDaemon, MODE_COMMANDS  # noqa: E402
+from simulator import SimulatedDevice  # noqa: E402
+from run_benchmarks import environment_metadata, percentile  # noqa: E402
+
+
+def parse_duration(text):
+    """Seconds from '90', '90s', '15m' or '8h'"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def soak_logging_config(log_dir):
+    """LOGGING_CONFIG with the log file moved out of the repository"""
+    logging_config = copy.deepcopy(LOGGING_CONFIG)
+    for handler in logging_config['handlers'].values():
+        if 'filename' in handler:
+            handler['filename'] = os.path.join(log_dir, os.path.basename(handler['filename']))
+    return logging_config
+
+
+def current_rss_kb():
+    """Resident set size now; falls back to the peak where /proc is missing"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform == 'darwin' else rss
+    except ImportError:
+        return 0
+
+
+def open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def slope(points):
+    """Least-squares slope of (x, y) points, 0.0 when undefined"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / sxx
+
+
+class SoakRun:
+    def __init__(self, rate_hz, modes, mode_period, adaptive, trace_frames):
+        self.rate_hz = rate_hz
+        self.modes = modes
+        self.mode_period = mode_period
+        self.trace_frames = trace_frames
+
+        self.device = SimulatedDevice(rate_hz=rate_hz, gesture_interval=0.2,
+                                      sequence_velocity=True, record_send_times=True)
+        self.air_mouse = AirMouseDaemon(dry_run=True, settings_path=None)
+        self.air_mouse.mouse_controller.flow_control.enabled = adaptive
+
+        self._latencies = []
+        self._latency_lock = threading.Lock()
+        self.samples = []
+        self.first_snapshot = None
+        self.last_snapshot = None
+
+        process_data = self.air_mouse.mouse_controller.process_data
+        sent_times = self.device.sent_times
+
+        def on_line(line):
+            received = time.perf_counter()
+            process_data(line)
+            if line.startswith("CURSOR,"):
+                sent = sent_times.pop(int(float(line.split(',')[1])), None)
+                if sent is not None:
+                    with self._latency_lock:
+                        self._latencies.append(received - sent)
+
+        self.air_mouse.wifi_handler.set_data_callback(on_line)
+
+    def command(self, line):
+        reply = self.air_mouse.handle_command(line)
+        if not reply.get('ok'):
+            raise RuntimeError(f"{line!r} failed: {reply}")
+        return reply
+
+    def take_window(self):
+        with self._latency_lock:
+            window, self._latencies = self._latencies, []
+        return [value * 1000.0 for value in window]
+
+    def sample(self, elapsed, snapshot):
+        latencies = self.take_window()
+        wifi = self.air_mouse.wifi_handler
+        record = {
+            't': elapsed,
+            'rss_kb': current_rss_kb(),
+            'traced_kb': tracemalloc.get_traced_memory()[0] / 1024.0,
+            'threads': threading.active_count(),
+            'open_fds': open_fds(),
+            'messages': wifi.messages_received,
+            'wifi_buffer_chars': len(wifi.buffer),
+            'log_queue': logging_setup.get_pipeline_stats()['queued'],
+            'latency_samples': len(latencies),
+            # No cursor frames in gesture or raw windows; keep them out of the trend
+            'latency_p50_ms': percentile(latencies, 50) if latencies else None,
+            'latency_p99_ms': percentile(latencies, 99) if latencies else None,
+            'latency_max_ms': max(latencies) if latencies else None,
+        }
+        # Exercise the export path the way a scraper would
+        self.air_mouse.registry.render_prometheus()
+        self.command("status")
+        if snapshot:
+            self.last_snapshot = tracemalloc.take_snapshot()
+        self.samples.append(record)
+        return record
+
+    def run(self, duration, interval, warmup, snapshot_every, progress):
+        tracemalloc.start(self.trace_frames)
+        port = self.device.start()
+        try:
+            self.command(f"connect 127.0.0.1 {port}")
+            mode_index = 0
+            self.command(f"mode {self.modes[0]}")
+            start = time.perf_counter()
+            next_sample = start + interval
+            next_mode = start + self.mode_period
+            count = 0
+            while True:
+                now = time.perf_counter()
+                elapsed = now - start
+                if elapsed >= duration:
+                    break
+                if len(self.modes) > 1 and now >= next_mode:
+                    mode_index = (mode_index + 1) % len(self.modes)
+                    self.command(f"mode {self.modes[mode_index]}")
+                    next_mode = now + self.mode_period
+                if now >= next_sample:
+                    count += 1
+                    record = self.sample(elapsed, count % snapshot_every == 0)
+                    if self.first_snapshot is None and elapsed >= warmup:
+                        self.first_snapshot = tracemalloc.take_snapshot()
+                    progress(record)
+                    next_sample += interval
+                time.sleep(min(0.5, max(0.0, min(next_sample, next_mode) - time.perf_counter())))
+            self.last_snapshot = tracemalloc.take_snapshot()
+        finally:
+            self.command("disconnect")
+            self.device.stop()
+            self.air_mouse.gesture_handler.shutdown()
+            tracemalloc.stop()
+
+    def top_growth(self, limit=10):
+        """Source lines whose traced allocations grew most since warm-up"""
+        if self.first_snapshot is None or self.last_snapshot is None:
+            return []
+        diff = self.last_snapshot.compare_to(self.first_snapshot, 'lineno')
+        return [{'where': str(stat.traceback), 'size_diff_kb': stat.size_diff / 1024.0,
+                 'count_diff': stat.count_diff} for stat in diff[:limit]]
+
+
+def evaluate(samples, warmup, limits):
+    """Fit per-hour trends after warm-up and list the limits they break"""
+    steady = [s for s in samples if s['t'] >= warmup]
+    if len(steady) < 3:
+        return {}, ["not enough samples after warm-up to fit a trend"]
+
+    hours = (steady[-1]['t'] - steady[0]['t']) / 3600.0
+    trends = {}
+    failures = []
+    for key, per_hour, floor in (
+            ('traced_kb', limits['mem_kb_per_hour'], limits['mem_floor_kb']),
+            ('rss_kb', limits['rss_kb_per_hour'], limits['rss_floor_kb']),
+            ('latency_p99_ms', limits['p99_ms_per_hour'], limits['p99_floor_ms'])):
+        points = [(s['t'] / 3600.0, s[key]) for s in steady if s[key] is not None]
+        if len(points) < 3:
+            continue
+        rate = slope(points)
+        growth = rate * hours
+        # Short runs are judged on absolute growth; long ones on the rate
+        allowed = max(floor, per_hour * hours)
+        trends[key] = {'per_hour': rate, 'fitted_growth': growth, 'allowed_growth': allowed}
+        if growth > allowed:
+            failures.append(f"{key} grew {growth:.2f} over {hours:.2f} h "
+                            f"({rate:.2f}/h, allowed {allowed:.2f})")
+
+    # Pools start threads lazily up to a bound, so only count it as a leak
+    # when the second half of the run needs more than the first half did
+    for key in ('threads', 'open_fds'):
+        values = [s[key] for s in steady if s[key] is not None]
+        if not values:
+            continue
+        first_half_max = max(values[:max(1, len(values) // 2)])
+        trends[key] = {'start': values[0], 'end': values[-1], 'max': max(values)}
+        if values[-1] > first_half_max:
+            failures.append(f"{key} grew from {first_half_max} to {values[-1]}")
+    return trends, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wavesense host pipeline soak test")
+    parser.add_argument('--duration', default='1h', help="e.g. 600, 30m, 8h")
+    parser.add_argument('--rate', type=float, default=500.0, help="device frames per second")
+    parser.add_argument('--interval', default='30s', help="time between samples")
+    parser.add_argument('--warmup', default='2m', help="samples before this are not judged")
+    parser.add_argument('--modes', default='cursor',
+                        help="comma-separated device modes to cycle through")
+    parser.add_argument('--mode-period', default='1m', help="time spent in each mode")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="leave adaptive stream-rate control on instead of holding --rate")
+    parser.add_argument('--snapshot-every', type=int, default=10,
+                        help="take a tracemalloc snapshot every N samples")
+    parser.add_argument('--trace-frames', type=int, default=1)
+    parser.add_argument('--max-mem-growth-kb-per-hour', type=float, default=1024.0)
+    parser.add_argument('--mem-tolerance-kb', type=float, default=512.0)
+    parser.add_argument('--max-rss-growth-kb-per-hour', type=float, default=8192.0)
+    parser.add_argument('--rss-tolerance-kb', type=float, default=4096.0)
+    parser.add_argument('--max-p99-growth-ms-per-hour', type=float, default=1.0)
+    parser.add_argument('--p99-tolerance-ms', type=float, default=1.0)
+    parser.add_argument('--no-logging', action='store_true',
+                        help="skip the queued logging pipeline and its log files")
+    parser.add_argument('--log-dir', help="directory for the soak's log file "
+                                          "(default: a new temporary directory)")
+    parser.add_argument('--output', help="write the report JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in modes if m not in MODE_COMMANDS]
+    if unknown or not modes:
+        parser.error(f"unknown modes: {', '.join(unknown) or '(none)'}")
+
+    if args.no_logging:
+        logging.basicConfig(level=logging.WARNING)
+    else:
+        log_dir = args.log_dir or tempfile.mkdtemp(prefix='wavesense-soak-')
+        os.makedirs(log_dir, exist_ok=True)
+        logging_setup.setup_logging(soak_logging_config(log_dir))
+        print(f"Logging to {log_dir}", file=sys.stderr)
+
+    duration = parse_duration(args.duration)
+    warmup = parse_duration(args.warmup)
+    soak = SoakRun(args.rate, modes, parse_duration(args.mode_period),
+                   args.adaptive, args.trace_frames)
+
+    def progress(record):
+        latency = ''
+        if record['latency_samples']:
+            latency = (f" p50={record['latency_p50_ms']:.2f} ms"
+                       f" p99={record['latency_p99_ms']:.2f} ms")
+        print(f"[{record['t'] / 60.0:7.1f} min] rss={record['rss_kb']:.0f} KB "
+              f"traced={record['traced_kb']:.0f} KB threads={record['threads']}{latency}",
+              file=sys.stderr)
+
+    soak.run(duration, parse_duration(args.interval), warmup,
+             max(1, args.snapshot_every), progress)
+
+    limits = {
+        'mem_kb_per_hour': args.max_mem_growth_kb_per_hour,
+        'mem_floor_kb': args.mem_tolerance_kb,
+        'rss_kb_per_hour': args.max_rss_growth_kb_per_hour,
+        'rss_floor_kb': args.rss_tolerance_kb,
+        'p99_ms_per_hour': args.max_p99_growth_ms_per_hour,
+        'p99_floor_ms': args.p99_tolerance_ms,
+    }
+    trends, failures = evaluate(soak.samples, warmup, limits)
+    report = {
+        'environment': environment_metadata(),
+        'parameters': dict(vars(args), modes=modes),
+        'trends': trends,
+        'top_growth': soak.top_growth(),
+        'failures': failures,
+        'passed': not failures,
+        'samples': soak.samples,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for failure in failures:
+        print(f"SOAK FAILURE {failure}", file=sys.stderr)
+    if not args.no_logging:
+        logging_setup.stop_logging()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
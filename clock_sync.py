@@ -0,0 +1,206 @@
+"""
+Host/device clock synchronisation.
+
+The host sends ``PING,<seq>`` and the device answers
+``PONG,<seq>,<recv_ms>,<send_ms>`` with its ``millis()`` when the ping
+arrived and when the reply left. Like NTP, each exchange gives a round trip
+time and the device clock at the host-side midpoint. The fastest exchanges
+in a sliding window are fitted with a line, which gives both the offset and
+the drift of the device clock, so timestamped frames (``CURSOR,vx,vy,<ms>``,
+``GESTURE,<name>,<ms>``, ``IMU,...,<ms>``) can be mapped onto the host's
+``time.perf_counter()`` clock.
+
+Per-frame transit time (host arrival minus re-timed send time) is tracked
+with the RFC 3550 interarrival jitter estimator, which is independent of
+any residual offset error.
+"""
+
+import collections
+import itertools
+import logging
+import time
+
+WRAP_MS = 2 ** 32  # millis() is an unsigned 32-bit counter
+
+
+class ClockSync:
+    def __init__(self, wifi_handler, config):
+        self.logger = logging.getLogger('AirMouse.ClockSync')
+        self.wifi_handler = wifi_handler
+        self.config = dict(config)
+        self.enabled = self.config.get('enabled', True)
+
+        self._seq = itertools.count(1)
+        self._pending = {}
+        self._exchanges = collections.deque(maxlen=self.config['window'])
+        self._transits = collections.deque(maxlen=self.config['window'] * 4)
+        self._connection = None
+        self.reset()
+
+    def reset(self):
+        """Drop all clock state, e.g. after the device restarted"""
+        self._pending.clear()
+        self._exchanges.clear()
+        self._transits.clear()
+        self._last_raw_ms = None
+        self._wraps = 0
+        self._x0 = 0.0          # host time the fit is centred on
+        self._a = None          # device seconds at _x0
+        self._b = 1.0           # device seconds per host second
+        self.synced = False
+        self.timestamps_seen = False
+        self.last_ping_time = None
+        self.pings_sent = 0
+        self.pongs_received = 0
+        self.jitter = 0.0
+        self._prev_transit = None
+
+    def _check_connection(self):
+        # A new connection may be a rebooted or different device
+        connection = self.wifi_handler.metric_connects.value
+        if connection != self._connection:
+            self._connection = connection
+            self.reset()
+
+    def device_seconds(self, device_ms):
+        """Unwrap a millis() value into seconds since the device booted"""
+        last = self._last_raw_ms
+        if last is not None:
+            step = device_ms - last
+            if step < -(WRAP_MS // 2):
+                self._wraps += 1
+            elif step > WRAP_MS // 2:
+                # A straggler stamped just before the last wrap
+                return (device_ms + (self._wraps - 1) * WRAP_MS) / 1000.0
+            elif step < -self.config['max_reorder_ms']:
+                self.logger.warning("Device clock went backwards, resynchronising")
+                self.reset()
+            elif step < 0:
+                # Replies and frames are sent from different places and may
+                # leave slightly out of order; keep the high-water mark
+                return (device_ms + self._wraps * WRAP_MS) / 1000.0
+        self._last_raw_ms = device_ms
+        return (device_ms + self._wraps * WRAP_MS) / 1000.0
+
+    def maybe_ping(self, now=None):
+        """Send a PING when one is due; only once the device sends timestamps"""
+        if not self.enabled:
+            return False
+        self._check_connection()
+        if not self.timestamps_seen:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        cfg = self.config
+        interval = (cfg['fast_ping_interval'] if len(self._exchanges) < cfg['fast_samples']
+                    else cfg['ping_interval'])
+        if self.last_ping_time is not None and now - self.last_ping_time < interval:
+            return False
+        self.last_ping_time = now
+
+        seq = next(self._seq)
+        # Unanswered pings from a lost reply must not pile up
+        if len(self._pending) > 16:
+            self._pending.clear()
+        self._pending[seq] = time.perf_counter()
+        if not self.wifi_handler.write(f"PING,{seq}\n"):
+            self._pending.pop(seq, None)
+            return False
+        self.pings_sent += 1
+        return True
+
+    def on_pong(self, seq, recv_ms, send_ms, now=None):
+        """Account one PONG reply; returns False if it was unexpected or too slow"""
+        if now is None:
+            now = time.perf_counter()
+        self._check_connection()
+        sent = self._pending.pop(seq, None)
+        if sent is None:
+            return False
+        self.pongs_received += 1
+
+        device_recv = self.device_seconds(recv_ms)
+        device_send = self.device_seconds(send_ms)
+        rtt = (now - sent) - (device_send - device_recv)
+        if rtt > self.config['max_rtt']:
+            return False
+
+        # Symmetric-path assumption: the device clock read at the host midpoint
+        self._exchanges.append(((sent + now) / 2.0, (device_recv + device_send) / 2.0, rtt))
+        self._fit()
+        return True
+
+    def _fit(self):
+        """Least-squares line through the lowest-delay exchanges in the window"""
+        cfg = self.config
+        ranked = sorted(self._exchanges, key=lambda e: e[2])
+        best = ranked[:max(1, int(len(ranked) * cfg['fit_fraction']))]
+
+        n = len(best)
+        mean_x = sum(e[0] for e in best) / n
+        mean_y = sum(e[1] for e in best) / n
+        span = max(e[0] for e in best) - min(e[0] for e in best)
+        slope = 1.0
+        if n >= 3 and span >= cfg['min_fit_span']:
+            sxx = sum((e[0] - mean_x) ** 2 for e in best)
+            sxy = sum((e[0] - mean_x) * (e[1] - mean_y) for e in best)
+            fitted = sxy / sxx
+            # A real crystal is within a few hundred ppm; anything else is noise
+            if abs(fitted - 1.0) * 1e6 <= cfg['max_drift_ppm']:
+                slope = fitted
+
+        self._x0, self._a, self._b = mean_x, mean_y, slope
+        self.synced = True
+
+    def to_host(self, device_s):
+        """Map device seconds onto the host perf_counter clock"""
+        return self._x0 + (device_s - self._a) / self._b
+
+    def observe_frame(self, device_ms, arrival):
+        """Re-time a frame stamped with `device_ms` that arrived at host time `arrival`"""
+        self._check_connection()
+        device_s = self.device_seconds(device_ms)
+        self.timestamps_seen = True
+        if self._a is None:
+            # Until the first PONG, assume the first frame had zero transit
+            self._x0, self._a, self._b = arrival, device_s, 1.0
+
+        sample_time = self.to_host(device_s)
+        transit = arrival - sample_time
+        if self._prev_transit is not None:
+            self.jitter += (abs(transit - self._prev_transit) - self.jitter) / 16.0
+        self._prev_transit = transit
+        self._transits.append(transit)
+        return sample_time
+
+    def get_stats(self):
+        """Offset, drift, round trip and jitter figures, in milliseconds and ppm"""
+        rtts = [e[2] for e in self._exchanges]
+        transits = sorted(self._transits)
+        stats = {
+            'enabled': self.enabled,
+            'synced': self.synced,
+            'exchanges': len(self._exchanges),
+            'pings_sent': self.pings_sent,
+            'pongs_received': self.pongs_received,
+            'offset_ms': self.offset() * 1000.0 if self._a is not None else None,
+            'drift_ppm': self.drift_ppm(),
+            'rtt_min_ms': min(rtts) * 1000.0 if rtts else None,
+            'rtt_avg_ms': sum(rtts) / len(rtts) * 1000.0 if rtts else None,
+            'jitter_ms': self.jitter * 1000.0,
+        }
+        if transits:
+            stats['transit_p50_ms'] = transits[len(transits) // 2] * 1000.0
+            stats['transit_p99_ms'] = transits[min(len(transits) - 1,
+                                                   int(len(transits) * 0.99))] * 1000.0
+        return stats
+
+    def drift_ppm(self):
+        """Device clock rate error relative to the host, parts per million"""
+        return (self._b - 1.0) * 1e6
+
+    def offset(self, now=None):
+        """Device clock minus host clock, in seconds, at host time `now`"""
+        if now is None:
+            now = time.perf_counter()
+        return self._a + (now - self._x0) * self._b - now
@@ -13,9 +13,12 @@ PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
 MODEL_DIR = os.path.join(BASE_DIR, 'models')
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 
-# Ensure directories exist
-for directory in [DATA_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, MODEL_DIR, LOG_DIR]:
-    os.makedirs(directory, exist_ok=True)
+
+def ensure_directories():
+    """Create the data, model and log directories if they do not exist"""
+    for directory in [DATA_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, MODEL_DIR, LOG_DIR]:
+        os.makedirs(directory, exist_ok=True)
+
 
 # Data Collection Parameters
 SAMPLE_RATE = 100  # Hz
@@ -45,6 +48,7 @@ SERIAL_BAUDRATE = 115200
 SERIAL_TIMEOUT = 1.0
 COMMAND_TERMINATOR = '\n'
 DATA_DELIMITER = ','
+MAX_LINE_LENGTH = 256  # longer device lines are garbage and get dropped
 
 # Gesture Recognition
 SUPPORTED_GESTURES = [
@@ -58,6 +62,10 @@ SUPPORTED_GESTURES = [
     'circle'
 ]
 
+# Gesture names the firmware sends in GESTURE frames; metric labels for
+# anything else are folded into 'other'
+DEVICE_GESTURES = ['UP', 'DOWN', 'LEFT', 'RIGHT', 'CIRCLE', 'SHAKE']
+
 # Model Parameters
 MODEL_PARAMS = {
     'random_forest': {
@@ -105,13 +113,90 @@ GUI_CONFIG = {
     }
 }
 
-# Cursor Control Parameters
+# Cursor Control Parameters: defaults for settings.Settings; the live
+# values and saved profiles are managed by settings.SettingsStore
 CURSOR_CONFIG = {
-    'sensitivity': 2.0,
-    'smoothing_factor': 0.3,
-    'dead_zone': 0.1,
-    'max_speed': 1000,
-    'acceleration': 1.5
+    'cursor_speed': 5.0,   # multiplier applied to device velocity
+    'smoothing': 0.9,      # weight of the previous velocity per 20 ms, 0 to 0.95
+    'dead_zone': 10.0,     # scaled velocity below which the cursor holds still
+}
+
+# Named settings profiles, loaded once at startup
+SETTINGS_PATH = os.path.join(BASE_DIR, 'profiles.json')
+
+# Tilt-to-scroll output mode
+SCROLL_CONFIG = {
+    'dead_zone': 3.0,            # raw frame velocity ignored as hand tremor
+    'gain': 0.3,                 # clicks per second per unit of velocity past the dead zone
+    'max_velocity': 60.0,        # clicks per second
+    'response': 0.08,            # seconds for the scroll velocity to follow the tilt
+    'inertia': 0.35,             # seconds; decay time constant once the tilt is released
+    'stop_velocity': 0.5,        # clicks per second below which coasting stops
+    'output_interval': 1.0 / 60,  # at most one OS scroll event per tick, seconds
+    'max_dt': 0.1,               # longest gap integrated in one step, seconds
+    'stall_timeout': 0.1,        # seconds without samples before the tilt counts as released
+    'toggle_gesture': None,      # e.g. 'SHAKE': switches cursor/scroll output instead of its key action
+}
+
+# Host-side sensor fusion, used when the device streams raw IMU frames
+FUSION_CONFIG = {
+    'algorithm': 'madgwick',  # or 'mahony'
+    'beta': 0.1,              # Madgwick gradient step
+    'kp': 1.0,                # Mahony proportional gain
+    'ki': 0.0,                # Mahony integral gain
+    'max_dt': 0.1,            # clamp for gaps between samples, seconds
+}
+
+# Adaptive stream rate: the host asks the device for more frames while the
+# cursor moves and fewer at rest or when it cannot keep up
+FLOW_CONTROL_CONFIG = {
+    'enabled': True,
+    'idle_hz': 10,               # rate once the device has been still for idle_after
+    'base_hz': 50,               # firmware default cadence
+    'active_hz': 100,            # rate while moving
+    'min_hz': 10,
+    'max_hz': 200,
+    'still_threshold': 2.0,      # raw frame velocity; matches the cursor dead zone
+    'active_threshold': 10.0,    # motion EMA that switches to active_hz
+    'release_threshold': 5.0,    # motion EMA below which active_hz is released
+    'motion_alpha': 0.3,         # EMA weight of the newest frame
+    'idle_after': 0.5,           # seconds without motion before dropping to idle_hz
+    'backlog_lines': 8,          # lines framed from one recv that count as falling behind
+    'max_duty': 0.5,             # fraction of each frame interval the host may spend processing
+    'min_command_interval': 0.25,  # seconds between RATE commands
+}
+
+# Host/device clock synchronisation over PING/PONG, used to re-time
+# timestamped frames on the host clock
+CLOCK_SYNC_CONFIG = {
+    'enabled': True,
+    'ping_interval': 2.0,        # seconds between pings once synchronised
+    'fast_ping_interval': 0.25,  # seconds between pings while collecting the first samples
+    'fast_samples': 8,
+    'window': 64,                # exchanges kept for the fit
+    'fit_fraction': 0.5,         # fit only the lowest-delay share of the window
+    'min_fit_span': 5.0,         # seconds of history needed before estimating drift
+    'max_drift_ppm': 500.0,
+    'max_rtt': 0.2,              # exchanges slower than this are discarded, seconds
+    'max_reorder_ms': 1000,      # larger backward steps mean the device restarted
+}
+
+# Gesture recognition in worker processes, fed through a shared-memory
+# sample ring so models never hold the cursor path's GIL
+RECOGNITION_CONFIG = {
+    'enabled': False,
+    'recognizers': ['recognition:ShakeRecognizer'],  # one worker each; "module:Class" or (spec, options)
+    'ring_capacity': 8192,       # samples kept; about 80 s at 100 Hz
+    'batch': 256,                # most samples a worker reads at once
+    'poll_interval': 0.005,      # worker sleep when the ring has nothing new, seconds
+    'supervise_interval': 0.5,   # seconds between worker health checks
+    'heartbeat_timeout': 5.0,    # a worker silent this long is restarted
+    'startup_timeout': 30.0,     # time allowed to import a recognizer and its model
+    'backoff_initial': 0.5,      # first restart delay, doubled per consecutive failure
+    'backoff_max': 30.0,
+    'stable_after': 30.0,        # uptime that resets the restart delay
+    'nice': 5,                   # lower worker CPU priority below the cursor path
+    'start_method': 'spawn',     # no fork of a process already running threads
 }
 
 # Training Parameters
@@ -145,9 +230,12 @@ LOGGING_CONFIG = {
         'file': {
             'level': 'DEBUG',
             'formatter': 'detailed',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(LOG_DIR, 'gesture_control.log'),
             'mode': 'a',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
         }
     },
     'loggers': {
@@ -159,6 +247,27 @@ LOGGING_CONFIG = {
     }
 }
 
+# Log pipeline: the handlers above run on a listener thread, callers only
+# enqueue. Rate limits apply per logger name to records below WARNING.
+LOG_PIPELINE_CONFIG = {
+    'queue_size': 10000,
+    'rate_limits': {
+        'AirMouse.Controller': {'rate': 20, 'burst': 100},
+        'AirMouse.WiFi': {'rate': 10, 'burst': 50},
+        'GestureHandler': {'rate': 20, 'burst': 50},
+    }
+}
+
+# Metrics export: Prometheus text on http://host:port/metrics and a
+# periodic JSON snapshot file
+METRICS_CONFIG = {
+    'enabled': True,
+    'host': '127.0.0.1',
+    'port': 9108,
+    'snapshot_path': os.path.join(LOG_DIR, 'metrics.json'),
+    'snapshot_interval': 10.0,
+}
+
 # Error Messages
 ERROR_MESSAGES = {
     'serial_connection': 'Failed to establish serial connection. Please check the connection and try again.',
@@ -0,0 +1,418 @@
+"""
+Headless Air Mouse daemon.
+
+Runs the WiFi -> MouseController -> GestureHandler pipeline without Qt and
+accepts newline-terminated commands on a local Unix socket, answering each
+with one line of JSON.
+
+    python daemon.py run --ip 192.168.4.1
+    python daemon.py ctl status
+    python daemon.py ctl mode cursor
+    python daemon.py ctl profile load presentation
+"""
+
+import argparse
+import errno
+import inspect
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+
+from wifi_handler import WiFiHandler
+from mouse_controller import MouseController, NullBackend
+from gesture_handler import GestureHandler
+import logging_setup
+from logging_setup import setup_logging, get_pipeline_stats
+from metrics import MetricsRegistry, MetricsServer, SnapshotWriter
+from settings import SettingsStore
+from config import METRICS_CONFIG, SETTINGS_PATH, RECOGNITION_CONFIG
+
+MODE_COMMANDS = {
+    'cursor': 'CURSOR_MODE',
+    'gesture': 'GESTURE_MODE',
+    'idle': 'IDLE_MODE',
+    'raw': 'RAW_MODE',
+}
+
+
+def default_socket_path():
+    """Per-user control socket location"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, 'wavesense.sock')
+
+
+class AirMouseDaemon:
+    def __init__(self, dry_run=False, settings_path=SETTINGS_PATH):
+        self.logger = logging.getLogger('AirMouse.Daemon')
+        self.settings = SettingsStore(settings_path)
+        self.settings.load()
+        self.wifi_handler = WiFiHandler()
+        self.mouse_controller = MouseController(
+            backend=NullBackend() if dry_run else None,
+            wifi_handler=self.wifi_handler,
+            settings=self.settings)
+        self.gesture_handler = GestureHandler()
+
+        self.wifi_handler.set_data_callback(self.mouse_controller.process_data)
+        self.mouse_controller.set_gesture_callback(self.gesture_handler.process_data)
+        self.mouse_controller.register_default_actions(self.gesture_handler)
+
+        self.registry = MetricsRegistry()
+        self.wifi_handler.attach_metrics(self.registry)
+        self.mouse_controller.attach_metrics(self.registry)
+        self.gesture_handler.attach_metrics(self.registry)
+        logging_setup.attach_metrics(self.registry)
+        self.metrics_server = None
+        self.snapshot_writer = None
+        self.recognition = None
+
+        self.control_server = None
+        self._stop_event = threading.Event()
+        self.commands = {
+            'status': self.cmd_status,
+            'connect': self.cmd_connect,
+            'disconnect': self.cmd_disconnect,
+            'mode': self.cmd_mode,
+            'calibrate': self.cmd_calibrate,
+            'speed': self.cmd_speed,
+            'source': self.cmd_source,
+            'output': self.cmd_output,
+            'rate': self.cmd_rate,
+            'smoothing': self.cmd_smoothing,
+            'set': self.cmd_set,
+            'profile': self.cmd_profile,
+            'handlers': self.cmd_handlers,
+            'logging': self.cmd_logging,
+            'metrics': self.cmd_metrics,
+            'recognition': self.cmd_recognition,
+            'shutdown': self.cmd_shutdown,
+        }
+
+    def handle_command(self, line):
+        """Execute one control command and return a JSON-serialisable dict"""
+        parts = line.split()
+        if not parts:
+            return {'ok': False, 'error': 'empty command'}
+        handler = self.commands.get(parts[0].lower())
+        if handler is None:
+            return {'ok': False, 'error': f"unknown command: {parts[0]}"}
+        try:
+            inspect.signature(handler).bind(*parts[1:])
+        except TypeError:
+            return {'ok': False, 'error': f"bad arguments for {parts[0]}"}
+        try:
+            return handler(*parts[1:])
+        except Exception as e:
+            self.logger.error(f"Control command failed: {line}: {e}")
+            return {'ok': False, 'error': str(e)}
+
+    def cmd_status(self):
+        mouse = self.mouse_controller
+        return {
+            'ok': True,
+            'connected': self.wifi_handler.is_connected(),
+            'messages_received': self.wifi_handler.messages_received,
+            'bytes_received': self.wifi_handler.bytes_received,
+            'messages_processed': mouse.messages_processed,
+            'gesture_events': mouse.gesture_events,
+            'cursor_speed': mouse.cursor_speed,
+            'smoothing': mouse.smoothing_factor,
+            'settings': self.settings.current._asdict(),
+            'profile': self.settings.active_profile,
+            'input_source': mouse.input_source,
+            'output_mode': mouse.output_mode,
+            'stream_rate': mouse.flow_control.get_stats(),
+            'clock': mouse.clock_sync.get_stats(),
+        }
+
+    def cmd_connect(self, ip_address, port='80'):
+        ok = self.wifi_handler.connect(ip_address, int(port))
+        return {'ok': ok, 'connected': self.wifi_handler.is_connected()}
+
+    def cmd_disconnect(self):
+        return {'ok': self.wifi_handler.disconnect()}
+
+    def cmd_mode(self, mode):
+        command = MODE_COMMANDS.get(mode.lower())
+        if command is None:
+            return {'ok': False, 'error': f"unknown mode: {mode}"}
+        return {'ok': self.wifi_handler.write(command + "\n")}
+
+    def cmd_calibrate(self, kind='sensor'):
+        command = "CALIBRATE_TILT" if kind == 'tilt' else "CALIBRATE"
+        return {'ok': self.wifi_handler.write(command + "\n")}
+
+    def cmd_source(self, source):
+        """Switch cursor input between device CURSOR frames and host fusion"""
+        self.mouse_controller.set_input_source(source)
+        command = "RAW_MODE" if source == "fusion" else "CURSOR_MODE"
+        if self.wifi_handler.is_connected():
+            self.wifi_handler.write(command + "\n")
+        return {'ok': True, 'source': self.mouse_controller.input_source}
+
+    def cmd_output(self, mode):
+        """Route motion to the cursor or the scroll wheel"""
+        self.mouse_controller.set_output_mode(mode)
+        return {'ok': True, 'output_mode': self.mouse_controller.output_mode}
+
+    def cmd_rate(self, value='auto'):
+        """Pin the device stream rate in Hz, or 'auto' for adaptive control"""
+        self.mouse_controller.flow_control.set_fixed_rate(None if value == 'auto' else int(value))
+        return {'ok': True, 'stream_rate': self.mouse_controller.flow_control.get_stats()}
+
+    def cmd_speed(self, value):
+        self.mouse_controller.set_cursor_speed(float(value))
+        return {'ok': True, 'cursor_speed': self.mouse_controller.cursor_speed}
+
+    def cmd_smoothing(self, value):
+        self.mouse_controller.set_smoothing_factor(float(value))
+        return {'ok': True, 'smoothing': self.mouse_controller.smoothing_factor}
+
+    def cmd_set(self, name, value):
+        try:
+            current = self.settings.update(**{name: value})
+        except ValueError as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, name: getattr(current, name)}
+
+    def cmd_profile(self, action='list', name=None):
+        action = action.lower()
+        if action == 'save':
+            self.settings.save_profile(name)
+        elif action in ('load', 'delete'):
+            if name is None:
+                return {'ok': False, 'error': f"profile {action} needs a name"}
+            try:
+                if action == 'load':
+                    self.settings.load_profile(name)
+                else:
+                    self.settings.delete_profile(name)
+            except (KeyError, ValueError) as e:
+                return {'ok': False, 'error': str(e).strip("'")}
+        elif action != 'list':
+            return {'ok': False, 'error': f"unknown profile action: {action}"}
+        return {'ok': True, 'active': self.settings.active_profile,
+                'profiles': self.settings.profile_names(),
+                'settings': self.settings.current._asdict()}
+
+    def cmd_logging(self):
+        return dict(get_pipeline_stats(), ok=True)
+
+    def cmd_metrics(self):
+        return dict(self.registry.snapshot(), ok=True)
+
+    def cmd_recognition(self):
+        if self.recognition is None:
+            return {'ok': True, 'running': False}
+        return dict(self.recognition.get_stats(), ok=True)
+
+    def cmd_handlers(self):
+        return {'ok': True, 'handlers': self.gesture_handler.get_handler_stats()}
+
+    def cmd_shutdown(self):
+        self._stop_event.set()
+        return {'ok': True}
+
+    def start_metrics(self, host, port, snapshot_path=None, snapshot_interval=10.0):
+        """Start the Prometheus endpoint and, optionally, JSON snapshots"""
+        try:
+            self.metrics_server = MetricsServer(self.registry, host, port)
+            self.metrics_server.start()
+        except OSError as e:
+            self.metrics_server = None
+            self.logger.error(f"Metrics endpoint unavailable on {host}:{port}: {e}")
+        if snapshot_path:
+            self.snapshot_writer = SnapshotWriter(self.registry, snapshot_path, snapshot_interval)
+            self.snapshot_writer.start()
+
+    def start_recognition(self, config=RECOGNITION_CONFIG):
+        """Run gesture recognizers in worker processes fed from a shared-memory ring"""
+        # Imported here so the default daemon never loads multiprocessing
+        from recognition import RecognitionSupervisor
+        self.recognition = RecognitionSupervisor(self.mouse_controller.submit_gesture, config)
+        if not self.recognition.start():
+            self.recognition = None
+            return False
+        self.recognition.attach_metrics(self.registry)
+        self.mouse_controller.set_sample_sink(self.recognition.ring)
+        return True
+
+    def stop_recognition(self):
+        if self.recognition is None:
+            return
+        # Detach the writer first; this waits out a write already in progress
+        self.mouse_controller.set_sample_sink(None)
+        self.recognition.stop()
+        self.recognition = None
+
+    def run(self, socket_path, ip_address=None, port=80):
+        """Serve control requests until a shutdown command or signal"""
+        try:
+            self.control_server = ControlServer(socket_path, self)
+        except OSError:
+            self.stop()
+            raise
+        server_thread = threading.Thread(target=self.control_server.serve_forever,
+                                         name='ControlServer', daemon=True)
+        server_thread.start()
+        self.logger.info(f"Control socket listening on {socket_path}")
+
+        if ip_address and not self.wifi_handler.connect(ip_address, port):
+            self.logger.error(f"Failed to connect to ESP32 at {ip_address}")
+
+        self._stop_event.wait()
+        self.stop()
+
+    def request_stop(self, *args):
+        self._stop_event.set()
+
+    def stop(self):
+        if self.control_server:
+            self.control_server.shutdown()
+            self.control_server.server_close()
+            self.control_server = None
+        if self.wifi_handler.is_connected():
+            self.wifi_handler.disconnect()
+        self.mouse_controller.scroll.stop()
+        self.stop_recognition()
+        self.gesture_handler.shutdown(wait=False)
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.snapshot_writer:
+            self.snapshot_writer.stop()
+            self.snapshot_writer = None
+        self.logger.info("Daemon stopped")
+
+
+class ControlRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            reply = self.server.air_mouse.handle_command(line)
+            self.wfile.write((json.dumps(reply) + "\n").encode('utf-8'))
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, air_mouse):
+        self.air_mouse = air_mouse
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            if socket_in_use(socket_path):
+                raise OSError(errno.EADDRINUSE,
+                              f"A daemon is already listening on {socket_path}")
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        # Create the socket owner-only rather than tightening it after bind
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, ControlRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def socket_in_use(socket_path, timeout=1.0):
+    """Whether a process is accepting connections on `socket_path`"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def send_command(socket_path, command, timeout=10.0):
+    """Send one command to a running daemon and return its decoded reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((command + "\n").encode('utf-8'))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    if not reply:
+        raise ConnectionError("daemon closed connection without a reply")
+    if not reply.endswith(b"\n"):
+        raise ConnectionError("daemon closed connection in the middle of a reply")
+    return json.loads(reply.decode('utf-8'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Air Mouse daemon")
+    parser.add_argument('--socket', default=default_socket_path(),
+                        help="control socket path")
+    sub = parser.add_subparsers(dest='action')
+
+    run_parser = sub.add_parser('run', help="run the daemon in the foreground")
+    run_parser.add_argument('--ip', help="ESP32 address to connect to at startup")
+    run_parser.add_argument('--port', type=int, default=80)
+    run_parser.add_argument('--dry-run', action='store_true',
+                            help="process the stream without moving the real cursor")
+    run_parser.add_argument('--no-metrics', action='store_true',
+                            help="disable the metrics endpoint and snapshot file")
+    run_parser.add_argument('--metrics-port', type=int, default=METRICS_CONFIG['port'])
+    run_parser.add_argument('--metrics-snapshot', default=METRICS_CONFIG['snapshot_path'],
+                            help="JSON snapshot path, empty to disable")
+    run_parser.add_argument('--recognition', action=argparse.BooleanOptionalAction,
+                            default=RECOGNITION_CONFIG['enabled'],
+                            help="run gesture recognizers in worker processes")
+
+    ctl_parser = sub.add_parser('ctl', help="send a command to a running daemon")
+    ctl_parser.add_argument('command', nargs='+')
+
+    args = parser.parse_args(argv)
+    if not hasattr(socket, 'AF_UNIX'):
+        parser.error("the control socket needs Unix domain socket support")
+
+    if args.action == 'ctl':
+        try:
+            reply = send_command(args.socket, " ".join(args.command))
+        except OSError as e:
+            print(f"Cannot reach daemon at {args.socket}: {e}", file=sys.stderr)
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0 if reply.get('ok') else 1
+
+    if args.action != 'run':
+        parser.print_help()
+        return 2
+
+    # Fail before taking the metrics port or starting workers
+    if socket_in_use(args.socket):
+        print(f"A daemon is already listening on {args.socket}", file=sys.stderr)
+        return 1
+
+    setup_logging()
+    daemon = AirMouseDaemon(dry_run=args.dry_run)
+    if METRICS_CONFIG['enabled'] and not args.no_metrics:
+        daemon.start_metrics(METRICS_CONFIG['host'], args.metrics_port,
+                             args.metrics_snapshot, METRICS_CONFIG['snapshot_interval'])
+    if args.recognition:
+        daemon.start_recognition()
+    signal.signal(signal.SIGINT, daemon.request_stop)
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    daemon.run(args.socket, args.ip, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
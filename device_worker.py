@@ -0,0 +1,87 @@
+import logging
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+class DeviceWorker(QObject):
+    """Runs all device I/O on a dedicated QThread.
+
+    The GUI calls the public request methods, which only emit a signal;
+    the matching slot runs in the worker thread, so a slow connect or a
+    blocked send never stalls the Qt event loop. Results come back as
+    signals that Qt delivers on the GUI thread.
+    """
+
+    connect_progress = pyqtSignal(str)
+    connected = pyqtSignal(str)
+    connection_failed = pyqtSignal(str)
+    disconnected = pyqtSignal()
+    calibration_progress = pyqtSignal(int)
+    mode_acknowledged = pyqtSignal(str)
+    command_failed = pyqtSignal(str)
+
+    _connect_requested = pyqtSignal(str, int)
+    _disconnect_requested = pyqtSignal()
+    _command_requested = pyqtSignal(str)
+
+    def __init__(self, wifi_handler, mouse_controller):
+        super().__init__()
+        self.logger = logging.getLogger('AirMouse.DeviceWorker')
+        self.wifi_handler = wifi_handler
+        self.mouse_controller = mouse_controller
+        self.io_thread = None
+
+        # Called on the socket reader thread; the signals queue to the GUI
+        self.mouse_controller.set_calibration_callback(self.calibration_progress.emit)
+        self.mouse_controller.set_mode_callback(self.mode_acknowledged.emit)
+
+        self._connect_requested.connect(self._do_connect)
+        self._disconnect_requested.connect(self._do_disconnect)
+        self._command_requested.connect(self._do_command)
+
+    def start(self):
+        """Move the worker onto its own thread and start it"""
+        self.io_thread = QThread()
+        self.io_thread.setObjectName('DeviceIO')
+        self.moveToThread(self.io_thread)
+        self.io_thread.start()
+
+    def stop(self, timeout_ms=3000):
+        """Stop the worker thread and close any open connection"""
+        if self.io_thread is None:
+            return
+        self.io_thread.quit()
+        self.io_thread.wait(timeout_ms)
+        self.io_thread = None
+        if self.wifi_handler.is_connected():
+            self.wifi_handler.disconnect()
+
+    def connect_device(self, ip_address, port=80):
+        """Request a connection, reported via connected/connection_failed"""
+        self._connect_requested.emit(ip_address, port)
+
+    def disconnect_device(self):
+        """Request a disconnect, reported via disconnected"""
+        self._disconnect_requested.emit()
+
+    def send_command(self, command):
+        """Queue a single command line for the device"""
+        self._command_requested.emit(command)
+
+    @pyqtSlot(str, int)
+    def _do_connect(self, ip_address, port):
+        self.connect_progress.emit(f"Connecting to {ip_address}:{port}...")
+        if self.wifi_handler.connect(ip_address, port):
+            self.connected.emit(ip_address)
+        else:
+            self.connection_failed.emit(ip_address)
+
+    @pyqtSlot()
+    def _do_disconnect(self):
+        self.wifi_handler.disconnect()
+        self.disconnected.emit()
+
+    @pyqtSlot(str)
+    def _do_command(self, command):
+        if not self.wifi_handler.write(command + "\n"):
+            self.logger.error(f"Failed to send command: {command}")
+            self.command_failed.emit(command)
@@ -13,7 +13,10 @@ WiFiClient client;
 void handleWiFiConnection();
 void handleCursorMode();
 void handleGestureMode();
+void handleRawMode();
 void calibrateSensor();
+bool streamDue();
+void setStreamRate(int hz);
 bool detectCircleGesture(float cal_gx, float cal_gy, float cal_gz);
 bool isValidMovement();
 bool detectShakeGesture(float cal_gx);
@@ -22,6 +25,7 @@ bool isAtRest();
 void checkDirectionalGestures(String* gesture);
 void sendGesture(const String& gesture);
 void calibrateSensors();
+void sendCalibrationProgress(int percent);
 String detectTiltGesture();
 
 
@@ -67,9 +71,21 @@ int shake_count = 0;
 unsigned long shake_start_time = 0;
 
 // Operation Modes
-enum Mode { IDLE, CURSOR, GESTURE };
+enum Mode { IDLE, CURSOR, GESTURE, RAW };
 Mode currentMode = IDLE;
 
+// Stream cadence, set by the host with RATE,<hz>
+#define CURSOR_DEFAULT_INTERVAL_MS 20
+#define RAW_DEFAULT_INTERVAL_MS 10
+#define MIN_STREAM_HZ 1
+#define MAX_STREAM_HZ 500
+unsigned long streamIntervalMs = CURSOR_DEFAULT_INTERVAL_MS;
+unsigned long nextStreamMs = 0;
+
+// millis() when the current IMU sample was read; appended to every frame so
+// the host can re-time samples after clock sync (PING/PONG)
+unsigned long sampleMs = 0;
+
 void setup() {
     Serial.begin(115200);
     Wire.begin();
@@ -93,6 +109,7 @@ void setup() {
 void loop() {
     handleWiFiConnection();
     mpu.getMotion6(&ax, &ay, &az, &gx, &gy, &gz);
+    sampleMs = millis();
     
     switch(currentMode) {
         case CURSOR:
@@ -101,6 +118,9 @@ void loop() {
         case GESTURE:
             handleGestureMode();
             break;
+        case RAW:
+            handleRawMode();
+            break;
         default:
             delay(10);
     }
@@ -161,28 +181,80 @@ bool isValidMovement() {
 void handleWiFiConnection() {
     if (!client || !client.connected()) {
         client = server.available();
+        if (client) {
+            // A new host starts from the default cadence of the current mode
+            streamIntervalMs = currentMode == RAW ? RAW_DEFAULT_INTERVAL_MS : CURSOR_DEFAULT_INTERVAL_MS;
+        }
         return;
     }
     
     if (client.available()) {
+        unsigned long receivedMs = millis();
         String command = client.readStringUntil('\n');
         command.trim();
         
         if (command == "CURSOR_MODE") {
             currentMode = CURSOR;
+            streamIntervalMs = CURSOR_DEFAULT_INTERVAL_MS;
             client.println("MODE_CURSOR");
         } 
         else if (command == "GESTURE_MODE") {
             currentMode = GESTURE;
             client.println("MODE_GESTURE");
         }
+        else if (command == "RAW_MODE") {
+            currentMode = RAW;
+            streamIntervalMs = RAW_DEFAULT_INTERVAL_MS;
+            client.println("MODE_RAW");
+        }
+        else if (command == "IDLE_MODE") {
+            currentMode = IDLE;
+            client.println("MODE_IDLE");
+        }
+        else if (command.startsWith("PING,")) {
+            // NTP-style exchange: echo the sequence with receive and send times
+            client.print("PONG,");
+            client.print(command.substring(5));
+            client.print(",");
+            client.print(receivedMs);
+            client.print(",");
+            client.println(millis());
+        }
+        else if (command.startsWith("RATE,")) {
+            setStreamRate(command.substring(5).toInt());
+        }
         else if (command == "CALIBRATE") {
             calibrateSensors();
+            client.println("CALIBRATION_COMPLETE");
         }
     }
 }
 
+void setStreamRate(int hz) {
+    hz = constrain(hz, MIN_STREAM_HZ, MAX_STREAM_HZ);
+    streamIntervalMs = 1000 / hz;
+    nextStreamMs = millis();  // apply from the next frame rather than after the old interval
+    client.print("RATE_ACK,");
+    client.println(1000 / streamIntervalMs);
+}
+
+bool streamDue() {
+    // Fixed schedule instead of a blocking delay so commands are read between frames
+    unsigned long now = millis();
+    if ((long)(now - nextStreamMs) < 0) {
+        return false;
+    }
+    nextStreamMs += streamIntervalMs;
+    if ((long)(now - nextStreamMs) >= 0) {
+        nextStreamMs = now + streamIntervalMs;  // fell behind, don't burst to catch up
+    }
+    return true;
+}
+
 void handleCursorMode() {
+    if (!streamDue()) {
+        return;
+    }
     // Apply calibration and scaling
     float vx = (gz - gz_offset) * -SPEED_FACTOR;
     float vy = (gx - gx_offset) * -SPEED_FACTOR;
@@ -190,9 +262,27 @@ void handleCursorMode() {
         client.print("CURSOR,");
         client.print(vx);
         client.print(",");
-        client.println(vy);
+        client.print(vy);
+        client.print(",");
+        client.println(sampleMs);
+    }
+}
+
+void handleRawMode() {
+    if (!streamDue()) {
+        return;
+    }
+    // Stream accelerometer and offset-corrected gyro counts for host-side fusion
+    if (client.connected()) {
+        client.print("IMU,");
+        client.print(ax); client.print(",");
+        client.print(ay); client.print(",");
+        client.print(az); client.print(",");
+        client.print(gx - gx_offset); client.print(",");
+        client.print(gy - gy_offset); client.print(",");
+        client.print(gz - gz_offset); client.print(",");
+        client.println(sampleMs);
     }
-    delay(20);
 }
 
 void handleGestureMode() {
@@ -262,7 +352,9 @@ bool isAtRest() {
 void sendGesture(const String& gesture) {
     if (client.connected()) {
       client.print("GESTURE,");
-      client.println(gesture);
+      client.print(gesture);
+      client.print(",");
+      client.println(sampleMs);
       client.flush();
     }
     Serial.println("Sent gesture: " + gesture);
@@ -288,6 +380,7 @@ void calibrateSensors() {
       gz_sum += gz;
       accel_sum += sqrt(ax*ax + ay*ay + az*az);
       gyro_sum += sqrt(gx*gx + gy*gy + gz*gz);
+      if (i % 20 == 0) sendCalibrationProgress(i / 2);
       delay(10);
     }
     
@@ -302,8 +395,16 @@ void calibrateSensors() {
     for(int i=0; i<100; i++) {
         mpu.getMotion6(&ax, &ay, &az, &gx, &gy, &gz);
         gx_sum += gx;
+        if (i % 20 == 0) sendCalibrationProgress(50 + i / 2);
         delay(10);
     }
     tilt_threshold = abs(gx_sum / 100) * 1.5; // Dynamic threshold
     Serial.println("Calibration complete");
-  }
\ No newline at end of file
+  }
+
+void sendCalibrationProgress(int percent) {
+    if (client && client.connected()) {
+        client.print("CALIBRATION_PROGRESS,");
+        client.println(percent);
+    }
+}
@@ -0,0 +1,149 @@
+"""
+Adaptive stream-rate control.
+
+The host sets the device's frame rate with ``RATE,<hz>`` and the device
+answers ``RATE_ACK,<hz>`` with the rate it actually applied. The controller
+watches the incoming motion and the host's own backlog: it asks for
+``active_hz`` while the cursor moves, drops to ``idle_hz`` once the device
+has been still for a while, and halves the rate whenever the reader falls
+behind or processing would take more than ``max_duty`` of each frame
+interval. Rate commands are rate limited and only sent on a change.
+"""
+
+import logging
+import time
+
+
+class AdaptiveRateController:
+    IDLE = 'idle'
+    BASE = 'base'
+    ACTIVE = 'active'
+
+    def __init__(self, wifi_handler, config):
+        self.logger = logging.getLogger('AirMouse.FlowControl')
+        self.wifi_handler = wifi_handler
+        self.config = dict(config)
+        self.enabled = self.config.get('enabled', True)
+
+        self.fixed_rate = None      # pinned rate, bypasses the adaptive choice
+        self.rate = None            # last rate requested; None means device default
+        self.device_rate = None     # last rate acknowledged by the device
+        self.level = self.BASE
+        self.motion = 0.0
+        self.last_motion_time = None
+        self.last_command_time = None
+        self._connection = None
+
+        self.rate_commands = 0
+        self.overloads = 0
+
+    def reset(self):
+        """Forget the negotiated rate, e.g. after a mode change or reconnect"""
+        self.rate = None
+        self.device_rate = None
+        self.level = self.BASE
+        self.motion = 0.0
+        self.last_motion_time = None
+        self.last_command_time = None
+
+    def observe(self, vx, vy, backlog=0, process_seconds=0.0, now=None):
+        """Account one motion frame and send a RATE command if the target changed"""
+        if not self.enabled:
+            return
+        if now is None:
+            now = time.perf_counter()
+
+        # A new connection starts at the device's default rate
+        connection = self.wifi_handler.metric_connects.value
+        if connection != self._connection:
+            self._connection = connection
+            self.reset()
+
+        cfg = self.config
+        magnitude = abs(vx) + abs(vy)
+        alpha = cfg['motion_alpha']
+        self.motion = self.motion * (1.0 - alpha) + magnitude * alpha
+        if magnitude > cfg['still_threshold'] or self.last_motion_time is None:
+            self.last_motion_time = now
+
+        target = self._target_rate(magnitude, now)
+
+        current = self.rate if self.rate is not None else cfg['base_hz']
+        if backlog > cfg['backlog_lines'] or process_seconds * current > cfg['max_duty']:
+            self.overloads += 1
+            target = min(target, max(cfg['min_hz'], current // 2))
+
+        target = self._clamp(target)
+        if target == self.rate:
+            return
+        if (self.last_command_time is not None and
+                now - self.last_command_time < cfg['min_command_interval']):
+            return
+        self.set_rate(target, now)
+
+    def _target_rate(self, magnitude, now):
+        cfg = self.config
+        if self.fixed_rate is not None:
+            return self.fixed_rate
+
+        # Hysteresis between the active and base levels keeps the rate from
+        # flapping on a motion EMA hovering around one threshold. A single
+        # fast frame is enough to leave idle so the cursor wakes up promptly.
+        if magnitude > cfg['active_threshold'] or self.motion > cfg['active_threshold']:
+            self.level = self.ACTIVE
+        elif self.level == self.ACTIVE and self.motion > cfg['release_threshold']:
+            pass
+        elif now - self.last_motion_time > cfg['idle_after']:
+            self.level = self.IDLE
+        else:
+            self.level = self.BASE
+
+        return {
+            self.IDLE: cfg['idle_hz'],
+            self.BASE: cfg['base_hz'],
+            self.ACTIVE: cfg['active_hz'],
+        }[self.level]
+
+    def set_rate(self, hz, now=None):
+        """Ask the device to stream at `hz` frames per second"""
+        hz = self._clamp(hz)
+        self.last_command_time = now if now is not None else time.perf_counter()
+        if not self.wifi_handler.write(f"RATE,{hz}\n"):
+            return False
+        self.rate = hz
+        self.rate_commands += 1
+        self.logger.debug(f"Requested stream rate {hz} Hz ({self.level})")
+        return True
+
+    def _clamp(self, hz):
+        return int(max(self.config['min_hz'], min(self.config['max_hz'], hz)))
+
+    def set_fixed_rate(self, hz):
+        """Pin the stream rate, or pass None to return to adaptive control"""
+        self.fixed_rate = None if hz is None else int(hz)
+        if self.fixed_rate is not None:
+            self.set_rate(self.fixed_rate)
+        self.logger.info(f"Stream rate {'adaptive' if hz is None else f'pinned to {hz} Hz'}")
+
+    def on_ack(self, hz):
+        """Record the rate the device reports it applied
+
+        The firmware rounds to whole-millisecond intervals, so the ack may
+        differ from the request; later targets are still compared with the
+        requested rate, or the controller would re-send it forever.
+        """
+        self.device_rate = hz
+        if self.rate is not None and hz != self.rate:
+            self.logger.debug(f"Device applied {hz} Hz for a {self.rate} Hz request")
+
+    def get_stats(self):
+        return {
+            'enabled': self.enabled,
+            'level': self.level,
+            'requested_hz': self.rate,
+            'device_hz': self.device_rate,
+            'fixed_hz': self.fixed_rate,
+            'motion': self.motion,
+            'rate_commands': self.rate_commands,
+            'overloads': self.overloads,
+        }
@@ -0,0 +1,343 @@
+"""
+Host-side IMU sensor fusion.
+
+Madgwick and Mahony filters turn raw MPU6050 accelerometer and gyro
+samples into an orientation quaternion, Euler angles and a cursor
+velocity in the same units as the firmware's CURSOR frames.
+
+Two paths are provided:
+
+* ``OrientationTracker.update_raw`` - per-sample streaming, pure Python
+  floats, a few microseconds per update.
+* ``fuse_batch`` - recorded data held in NumPy arrays. Unit conversion,
+  Euler angles and velocities are vectorized; the filter recursion runs
+  either as a tight scalar loop (one stream) or as NumPy operations across
+  all streams at once (shape ``(T, N, 3)``).
+"""
+
+import math
+
+from config import ACCEL_SENSITIVITY, GYRO_SENSITIVITY, SAMPLE_RATE
+
+ACCEL_LSB_PER_G = 32768.0 / ACCEL_SENSITIVITY
+GYRO_LSB_PER_DPS = 32768.0 / GYRO_SENSITIVITY
+
+# CURSOR frames carry (raw gyro counts * 0.02), an angular rate whatever the
+# stream rate: GYRO_LSB_PER_DPS * 0.02 cursor units per deg/s. The host
+# turns cursor units into pixels per FIRMWARE_FRAME_DT, the 20 ms cadence
+# the cursor speed was tuned at (see MouseController.move_cursor).
+FIRMWARE_SPEED_FACTOR = 0.02
+FIRMWARE_FRAME_DT = 0.02
+DEFAULT_CURSOR_GAIN = GYRO_LSB_PER_DPS * FIRMWARE_SPEED_FACTOR  # cursor units per deg/s
+
+
+class MadgwickFilter:
+    """Madgwick gradient-descent orientation filter (IMU variant)"""
+
+    def __init__(self, beta=0.1):
+        self.beta = beta
+        self.q = (1.0, 0.0, 0.0, 0.0)
+
+    def reset(self):
+        self.q = (1.0, 0.0, 0.0, 0.0)
+
+    def update(self, gx, gy, gz, ax, ay, az, dt):
+        """Advance by dt seconds; gyro in rad/s, accel in any unit"""
+        q0, q1, q2, q3 = self.q
+
+        # Rate of change of quaternion from gyroscope
+        qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+        norm = math.sqrt(ax * ax + ay * ay + az * az)
+        if norm > 0.0:
+            ax /= norm
+            ay /= norm
+            az /= norm
+
+            _2q0 = 2.0 * q0
+            _2q1 = 2.0 * q1
+            _2q2 = 2.0 * q2
+            _2q3 = 2.0 * q3
+            _4q0 = 4.0 * q0
+            _4q1 = 4.0 * q1
+            _4q2 = 4.0 * q2
+            _8q1 = 8.0 * q1
+            _8q2 = 8.0 * q2
+            q0q0 = q0 * q0
+            q1q1 = q1 * q1
+            q2q2 = q2 * q2
+            q3q3 = q3 * q3
+
+            # Gradient descent corrective step
+            s0 = _4q0 * q2q2 + _2q2 * ax + _4q0 * q1q1 - _2q1 * ay
+            s1 = (_4q1 * q3q3 - _2q3 * ax + 4.0 * q0q0 * q1 - _2q0 * ay - _4q1
+                  + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * az)
+            s2 = (4.0 * q0q0 * q2 + _2q0 * ax + _4q2 * q3q3 - _2q3 * ay - _4q2
+                  + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * az)
+            s3 = 4.0 * q1q1 * q3 - _2q1 * ax + 4.0 * q2q2 * q3 - _2q2 * ay
+            norm = math.sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+            if norm > 0.0:
+                beta = self.beta / norm
+                qd0 -= beta * s0
+                qd1 -= beta * s1
+                qd2 -= beta * s2
+                qd3 -= beta * s3
+
+        q0 += qd0 * dt
+        q1 += qd1 * dt
+        q2 += qd2 * dt
+        q3 += qd3 * dt
+        norm = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        self.q = (q0 * norm, q1 * norm, q2 * norm, q3 * norm)
+        return self.q
+
+
+class MahonyFilter:
+    """Mahony complementary orientation filter with PI feedback"""
+
+    def __init__(self, kp=1.0, ki=0.0):
+        self.kp = kp
+        self.ki = ki
+        self.q = (1.0, 0.0, 0.0, 0.0)
+        self.integral = (0.0, 0.0, 0.0)
+
+    def reset(self):
+        self.q = (1.0, 0.0, 0.0, 0.0)
+        self.integral = (0.0, 0.0, 0.0)
+
+    def update(self, gx, gy, gz, ax, ay, az, dt):
+        """Advance by dt seconds; gyro in rad/s, accel in any unit"""
+        q0, q1, q2, q3 = self.q
+
+        norm = math.sqrt(ax * ax + ay * ay + az * az)
+        if norm > 0.0:
+            ax /= norm
+            ay /= norm
+            az /= norm
+
+            # Estimated direction of gravity
+            vx = q1 * q3 - q0 * q2
+            vy = q0 * q1 + q2 * q3
+            vz = q0 * q0 - 0.5 + q3 * q3
+
+            # Error is the cross product of measured and estimated gravity
+            ex = ay * vz - az * vy
+            ey = az * vx - ax * vz
+            ez = ax * vy - ay * vx
+
+            if self.ki > 0.0:
+                ix, iy, iz = self.integral
+                ix += 2.0 * self.ki * ex * dt
+                iy += 2.0 * self.ki * ey * dt
+                iz += 2.0 * self.ki * ez * dt
+                self.integral = (ix, iy, iz)
+                gx += ix
+                gy += iy
+                gz += iz
+
+            gx += 2.0 * self.kp * ex
+            gy += 2.0 * self.kp * ey
+            gz += 2.0 * self.kp * ez
+
+        half_dt = 0.5 * dt
+        gx *= half_dt
+        gy *= half_dt
+        gz *= half_dt
+        qa, qb, qc = q0, q1, q2
+        q0 += -qb * gx - qc * gy - q3 * gz
+        q1 += qa * gx + qc * gz - q3 * gy
+        q2 += qa * gy - qb * gz + q3 * gx
+        q3 += qa * gz + qb * gy - qc * gx
+        norm = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        self.q = (q0 * norm, q1 * norm, q2 * norm, q3 * norm)
+        return self.q
+
+
+def make_filter(algorithm='madgwick', beta=0.1, kp=1.0, ki=0.0):
+    if algorithm == 'madgwick':
+        return MadgwickFilter(beta)
+    if algorithm == 'mahony':
+        return MahonyFilter(kp, ki)
+    raise ValueError(f"Unknown fusion algorithm: {algorithm}")
+
+
+def quaternion_to_euler(q):
+    """Return (roll, pitch, yaw) in degrees"""
+    q0, q1, q2, q3 = q
+    roll = math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))
+    sin_pitch = max(-1.0, min(1.0, 2.0 * (q0 * q2 - q3 * q1)))
+    pitch = math.asin(sin_pitch)
+    yaw = math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
+    return math.degrees(roll), math.degrees(pitch), math.degrees(yaw)
+
+
+def _wrap_degrees(angle):
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class OrientationTracker:
+    """Streams raw MPU6050 samples through a fusion filter.
+
+    Produces the current quaternion, Euler angles and a cursor velocity
+    ``(vx, vy)`` in the same units as the firmware's CURSOR frames, taken
+    from the rate of change of yaw (horizontal) and roll (vertical), so it
+    does not depend on the sample interval.
+    """
+
+    def __init__(self, algorithm='madgwick', beta=0.1, kp=1.0, ki=0.0,
+                 cursor_gain=DEFAULT_CURSOR_GAIN, default_dt=1.0 / SAMPLE_RATE):
+        self.filter = make_filter(algorithm, beta, kp, ki)
+        self.cursor_gain = cursor_gain
+        self.default_dt = default_dt
+        self.euler = (0.0, 0.0, 0.0)
+        self.samples = 0
+
+    @property
+    def quaternion(self):
+        return self.filter.q
+
+    def reset(self):
+        self.filter.reset()
+        self.euler = (0.0, 0.0, 0.0)
+        self.samples = 0
+
+    def update_raw(self, ax, ay, az, gx, gy, gz, dt=None):
+        """Fuse one raw sample (LSB counts) and return the cursor velocity"""
+        scale = math.radians(1.0) / GYRO_LSB_PER_DPS
+        return self.update(gx * scale, gy * scale, gz * scale,
+                           ax / ACCEL_LSB_PER_G, ay / ACCEL_LSB_PER_G, az / ACCEL_LSB_PER_G, dt)
+
+    def update(self, gx, gy, gz, ax, ay, az, dt=None):
+        """Fuse one sample (rad/s, g) and return the cursor velocity"""
+        if dt is None or dt <= 0.0:
+            dt = self.default_dt
+        q = self.filter.update(gx, gy, gz, ax, ay, az, dt)
+        roll, pitch, yaw = quaternion_to_euler(q)
+        prev_roll, _, prev_yaw = self.euler
+        self.euler = (roll, pitch, yaw)
+        self.samples += 1
+        if self.samples == 1:
+            return 0.0, 0.0
+        vx = -_wrap_degrees(yaw - prev_yaw) / dt * self.cursor_gain
+        vy = -_wrap_degrees(roll - prev_roll) / dt * self.cursor_gain
+        return vx, vy
+
+
+def fuse_batch(accel, gyro, dt, algorithm='madgwick', beta=0.1, kp=1.0, ki=0.0,
+               raw=True, cursor_gain=DEFAULT_CURSOR_GAIN):
+    """Fuse recorded samples held in arrays.
+
+    ``accel`` and ``gyro`` have shape ``(T, 3)`` for one stream or
+    ``(T, N, 3)`` for N streams; ``dt`` is a scalar or a length-T array of
+    sample intervals in seconds. With ``raw=True`` inputs are MPU6050 LSB
+    counts, otherwise g and rad/s.
+
+    Returns a dict with ``quaternion`` ``(T, [N,] 4)``, ``euler`` in degrees
+    ``(T, [N,] 3)`` and ``velocity`` ``(T, [N,] 2)``.
+    """
+    import numpy as np
+
+    accel = np.asarray(accel, dtype=np.float64)
+    gyro = np.asarray(gyro, dtype=np.float64)
+    single = accel.ndim == 2
+    if single:
+        accel = accel[:, None, :]
+        gyro = gyro[:, None, :]
+    if raw:
+        accel = accel / ACCEL_LSB_PER_G
+        gyro = np.radians(gyro / GYRO_LSB_PER_DPS)
+    steps = accel.shape[0]
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), (steps,))
+
+    if accel.shape[1] == 1:
+        quats = _fuse_single(accel[:, 0, :], gyro[:, 0, :], dts,
+                             algorithm, beta, kp, ki)[:, None, :]
+    elif algorithm == 'madgwick':
+        quats = _madgwick_streams(accel, gyro, dts, beta)
+    else:
+        quats = np.stack([_fuse_single(accel[:, i, :], gyro[:, i, :], dts,
+                                       algorithm, beta, kp, ki)
+                          for i in range(accel.shape[1])], axis=1)
+
+    euler = _quaternions_to_euler(quats)
+    velocity = np.zeros(euler.shape[:-1] + (2,))
+    dyaw = (np.diff(euler[..., 2], axis=0) + 180.0) % 360.0 - 180.0
+    droll = (np.diff(euler[..., 0], axis=0) + 180.0) % 360.0 - 180.0
+    # Per-step rates, matching OrientationTracker.update
+    step_dt = dts[1:].reshape((-1,) + (1,) * (dyaw.ndim - 1))
+    velocity[1:, ..., 0] = -dyaw / step_dt * cursor_gain
+    velocity[1:, ..., 1] = -droll / step_dt * cursor_gain
+
+    if single:
+        quats, euler, velocity = quats[:, 0], euler[:, 0], velocity[:, 0]
+    return {'quaternion': quats, 'euler': euler, 'velocity': velocity}
+
+
+def _fuse_single(accel, gyro, dts, algorithm, beta, kp, ki):
+    # The recursion is inherently sequential; plain floats beat per-step
+    # NumPy calls for a single stream.
+    import numpy as np
+
+    fusion_filter = make_filter(algorithm, beta, kp, ki)
+    update = fusion_filter.update
+    out = []
+    for (ax, ay, az), (gx, gy, gz), dt in zip(accel.tolist(), gyro.tolist(), dts.tolist()):
+        out.append(update(gx, gy, gz, ax, ay, az, dt))
+    return np.array(out, dtype=np.float64).reshape(len(out), 4)
+
+
+def _madgwick_streams(accel, gyro, dts, beta):
+    """Madgwick update applied to N streams per step with NumPy"""
+    import numpy as np
+
+    steps, streams = accel.shape[:2]
+    q0 = np.ones(streams)
+    q1 = np.zeros(streams)
+    q2 = np.zeros(streams)
+    q3 = np.zeros(streams)
+    out = np.empty((steps, streams, 4))
+
+    norms = np.linalg.norm(accel, axis=2, keepdims=True)
+    unit = np.divide(accel, norms, out=np.zeros_like(accel), where=norms > 0)
+    has_accel = norms[..., 0] > 0
+
+    for t in range(steps):
+        gx, gy, gz = gyro[t, :, 0], gyro[t, :, 1], gyro[t, :, 2]
+        ax, ay, az = unit[t, :, 0], unit[t, :, 1], unit[t, :, 2]
+        qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+        q0q0, q1q1, q2q2, q3q3 = q0 * q0, q1 * q1, q2 * q2, q3 * q3
+        s0 = 4 * q0 * q2q2 + 2 * q2 * ax + 4 * q0 * q1q1 - 2 * q1 * ay
+        s1 = (4 * q1 * q3q3 - 2 * q3 * ax + 4 * q0q0 * q1 - 2 * q0 * ay - 4 * q1
+              + 8 * q1 * q1q1 + 8 * q1 * q2q2 + 4 * q1 * az)
+        s2 = (4 * q0q0 * q2 + 2 * q0 * ax + 4 * q2 * q3q3 - 2 * q3 * ay - 4 * q2
+              + 8 * q2 * q1q1 + 8 * q2 * q2q2 + 4 * q2 * az)
+        s3 = 4 * q1q1 * q3 - 2 * q1 * ax + 4 * q2q2 * q3 - 2 * q2 * ay
+        snorm = np.sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+        gain = np.where(has_accel[t] & (snorm > 0), beta / np.where(snorm > 0, snorm, 1.0), 0.0)
+
+        dt = dts[t]
+        q0 = q0 + (qd0 - gain * s0) * dt
+        q1 = q1 + (qd1 - gain * s1) * dt
+        q2 = q2 + (qd2 - gain * s2) * dt
+        q3 = q3 + (qd3 - gain * s3) * dt
+        inv = 1.0 / np.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        q0, q1, q2, q3 = q0 * inv, q1 * inv, q2 * inv, q3 * inv
+        out[t, :, 0], out[t, :, 1], out[t, :, 2], out[t, :, 3] = q0, q1, q2, q3
+    return out
+
+
+def _quaternions_to_euler(quats):
+    import numpy as np
+
+    q0, q1, q2, q3 = quats[..., 0], quats[..., 1], quats[..., 2], quats[..., 3]
+    roll = np.arctan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2))
+    pitch = np.arcsin(np.clip(2.0 * (q0 * q2 - q3 * q1), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
+    return np.degrees(np.stack([roll, pitch, yaw], axis=-1))
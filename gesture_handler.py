@@ -1,15 +1,150 @@
+import fnmatch
+import itertools
 import logging
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import Counter, Histogram, labeled
+from config import DEVICE_GESTURES
+
+
+class HandlerStats:
+    """Latency accounting for a single subscribed handler"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        self.max_queue_delay = 0.0
+
+    def record(self, elapsed, queue_delay=0.0, failed=False):
+        self.calls += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if queue_delay > self.max_queue_delay:
+            self.max_queue_delay = queue_delay
+        if failed:
+            self.errors += 1
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': (self.total_time / self.calls * 1000.0) if self.calls else 0.0,
+            'max_ms': self.max_time * 1000.0,
+            'last_ms': self.last_time * 1000.0,
+            'max_queue_delay_ms': self.max_queue_delay * 1000.0,
+        }
+
+
+class Subscription:
+    """A handler subscribed to one gesture name or wildcard pattern"""
+
+    def __init__(self, token, pattern, callback, priority, asynchronous, name):
+        self.token = token
+        self.pattern = pattern
+        self.callback = callback
+        self.priority = priority
+        self.asynchronous = asynchronous
+        self.is_wildcard = any(ch in pattern for ch in '*?[')
+        self.stats = HandlerStats(name)
+        self.metric = None  # per-handler latency histogram, set by GestureHandler
+        # Asynchronous calls finish on several worker threads at once
+        self.stats_lock = threading.Lock()
+
+    def matches(self, gesture):
+        if self.is_wildcard:
+            return fnmatch.fnmatchcase(gesture, self.pattern)
+        return gesture == self.pattern
+
 
 class GestureHandler:
-    def __init__(self):
+    """Gesture event bus.
+
+    Handlers subscribe to a gesture name (``"UP"``) or a wildcard pattern
+    (``"*"``) and are called with the gesture name. Synchronous handlers run
+    on the publishing thread in priority order (highest first); asynchronous
+    handlers are queued on a small worker pool so slow actions such as
+    synthetic key presses cannot hold up the socket reader or other handlers.
+    """
+
+    def __init__(self, max_workers=4, slow_handler_threshold=0.05):
         self.logger = logging.getLogger('GestureHandler')
-        self.callbacks = {}
+        self.max_workers = max_workers
+        self.slow_handler_threshold = slow_handler_threshold
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._tokens = itertools.count(1)
+        self._executor = None
 
-    def register_callback(self, gesture_name, callback):
-        """Register a callback function for a specific gesture"""
-        self.callbacks[gesture_name] = callback
-        self.logger.info(f"Registered callback for gesture: {gesture_name}")
+        # Device gestures plus every name a handler subscribed to exactly
+        self._label_names = set(DEVICE_GESTURES)
+        self.metric_published = labeled(Counter, 'gestures_published_total',
+                                        'Gestures delivered to the event bus', ['gesture'],
+                                        allowed=self._label_names)
+        self.metric_unhandled = Counter('gestures_unhandled_total',
+                                        'Gestures with no matching subscriber')
+        self.metric_handler_errors = Counter('gesture_handler_errors_total',
+                                             'Exceptions raised by gesture handlers')
+        self.metric_handler_seconds = labeled(Histogram, 'gesture_handler_seconds',
+                                              'Gesture handler run time', ['handler'])
+
+    def subscribe(self, pattern, callback, priority=0, asynchronous=False, name=None):
+        """Subscribe a handler to a gesture name or wildcard pattern.
+
+        Returns a token that can be passed to ``unsubscribe``.
+        """
+        if name is None:
+            name = getattr(callback, '__qualname__', repr(callback))
+        sub = Subscription(next(self._tokens), pattern, callback,
+                           priority, asynchronous, name)
+        sub.metric = self.metric_handler_seconds.labels(name)
+        with self._lock:
+            if not sub.is_wildcard:
+                self._label_names.add(pattern)
+            # Copy-on-write so publish() can iterate without holding the lock
+            subs = self._subscriptions + [sub]
+            subs.sort(key=lambda s: -s.priority)
+            self._subscriptions = subs
+        self.logger.info(f"Subscribed {name} to gesture: {pattern}")
+        return sub.token
+
+    def unsubscribe(self, token):
+        """Remove a subscription, returns True if it existed"""
+        with self._lock:
+            subs = [s for s in self._subscriptions if s.token != token]
+            removed = len(subs) != len(self._subscriptions)
+            self._subscriptions = subs
+        return removed
+
+    def register_callback(self, gesture_name, callback, priority=0, asynchronous=False):
+        """Register a no-argument callback for a specific gesture"""
+        name = getattr(callback, '__qualname__', repr(callback))
+        return self.subscribe(gesture_name, lambda gesture: callback(),
+                              priority=priority, asynchronous=asynchronous, name=name)
+
+    def publish(self, gesture):
+        """Deliver a gesture to every matching subscriber"""
+        self.metric_published.labels(gesture).inc()
+        matched = [s for s in self._subscriptions if s.matches(gesture)]
+        if not matched:
+            self.metric_unhandled.inc()
+            self.logger.warning(f"No callback registered for gesture: {gesture}")
+            return 0
+
+        published_at = time.perf_counter()
+        for sub in matched:
+            if sub.asynchronous:
+                self._get_executor().submit(self._invoke, sub, gesture, published_at)
+            else:
+                self._invoke(sub, gesture, published_at)
+        return len(matched)
 
     def process_data(self, data):
         """Process incoming gesture data"""
@@ -17,12 +152,55 @@ class GestureHandler:
             if data.startswith("GESTURE,"):
                 gesture = data.split(",")[1].strip()
                 self.logger.info(f"Detected gesture: {gesture}")
+                self.publish(gesture)
 
-                # Check if callback exists before executing
-                if gesture in self.callbacks:
-                    self.callbacks[gesture]()
-                else:
-                    self.logger.warning(f"No callback registered for gesture: {gesture}")
+        except Exception as e:
+            self.logger.error(f"Error processing gesture: {str(e)}")
+
+    def get_handler_stats(self):
+        """Return latency statistics for every subscribed handler"""
+        stats = []
+        for s in self._subscriptions:
+            with s.stats_lock:
+                stats.append(dict(s.stats.as_dict(), pattern=s.pattern,
+                                  asynchronous=s.asynchronous))
+        return stats
+
+    def attach_metrics(self, registry):
+        """Export event bus counters through a MetricsRegistry"""
+        for metric in (self.metric_published, self.metric_unhandled,
+                       self.metric_handler_errors, self.metric_handler_seconds):
+            registry.register(metric)
 
+    def shutdown(self, wait=True):
+        """Stop the asynchronous worker pool"""
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='GestureWorker')
+        return self._executor
+
+    def _invoke(self, sub, gesture, published_at):
+        start = time.perf_counter()
+        failed = False
+        try:
+            sub.callback(gesture)
         except Exception as e:
-            self.logger.error(f"Error processing gesture: {str(e)}")
\ No newline at end of file
+            failed = True
+            with self._lock:
+                self.metric_handler_errors.inc()
+            self.logger.error(f"Handler {sub.stats.name} failed for gesture {gesture}: {e}")
+        elapsed = time.perf_counter() - start
+        with sub.stats_lock:
+            sub.stats.record(elapsed, start - published_at, failed)
+            sub.metric.observe(elapsed)
+        if elapsed > self.slow_handler_threshold:
+            self.logger.warning(
+                f"Slow gesture handler {sub.stats.name}: {elapsed * 1000.0:.1f} ms for {gesture}")
@@ -0,0 +1,176 @@
+"""
+Non-blocking logging pipeline.
+
+The root logger gets a single queue handler; the real handlers from
+LOGGING_CONFIG (console, rotating file, and the GUI log view when present)
+run on a QueueListener thread. A logging call on the socket reader thread
+therefore costs a filter check and a queue put.
+"""
+
+import atexit
+import copy
+import logging
+import logging.config
+import logging.handlers
+import queue
+import threading
+import time
+
+import config
+
+_listener = None
+_queue_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Per-logger token bucket or 1-in-N sampling for chatty loggers.
+
+    ``limits`` maps a logger name to ``{'rate': per_second, 'burst': n}`` or
+    ``{'sample': n}``. Child loggers inherit the nearest configured parent.
+    Records at or above ``min_level_exempt`` always pass.
+    """
+
+    def __init__(self, limits, min_level_exempt=logging.WARNING):
+        super().__init__()
+        self.limits = limits
+        self.min_level_exempt = min_level_exempt
+        self.suppressed = {}
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _limit_for(self, name):
+        while name:
+            if name in self.limits:
+                return name, self.limits[name]
+            name = name.rpartition('.')[0]
+        return None, None
+
+    def filter(self, record):
+        if record.levelno >= self.min_level_exempt:
+            return True
+        key, limit = self._limit_for(record.name)
+        if limit is None:
+            return True
+
+        with self._lock:
+            if 'sample' in limit:
+                seen = self._state.get(key, 0) + 1
+                self._state[key] = seen
+                allowed = (seen - 1) % limit['sample'] == 0
+            else:
+                now = time.monotonic()
+                tokens, last = self._state.get(key, (limit['burst'], now))
+                tokens = min(limit['burst'], tokens + (now - last) * limit['rate'])
+                allowed = tokens >= 1.0
+                self._state[key] = (tokens - 1.0 if allowed else tokens, now)
+            if not allowed:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+        return allowed
+
+
+class EnqueueOnlyHandler(logging.handlers.QueueHandler):
+    """Queue handler that defers all formatting to the listener thread.
+
+    The stock QueueHandler formats the message in the caller so the record
+    can cross process boundaries; within one process the record can be
+    passed as is. A full queue drops the record and counts it instead of
+    blocking the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(logging_config=None, pipeline_config=None):
+    """Apply LOGGING_CONFIG behind a queue and start the listener thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    logging_config = copy.deepcopy(logging_config or config.LOGGING_CONFIG)
+    pipeline_config = pipeline_config or config.LOG_PIPELINE_CONFIG
+    config.ensure_directories()
+
+    # Build the configured handlers, then move them off the root logger
+    logging.config.dictConfig(logging_config)
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue = queue.Queue(maxsize=pipeline_config.get('queue_size', 10000))
+    _queue_handler = EnqueueOnlyHandler(log_queue)
+    rate_limits = pipeline_config.get('rate_limits')
+    if rate_limits:
+        _queue_handler.addFilter(RateLimitFilter(rate_limits))
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def add_handler(handler):
+    """Attach a handler to the listener thread, e.g. the GUI log view"""
+    if _listener is None:
+        logging.getLogger().addHandler(handler)
+        return
+    _listener.handlers = _listener.handlers + (handler,)
+
+
+def remove_handler(handler):
+    """Detach a handler previously passed to add_handler"""
+    if _listener is None:
+        logging.getLogger().removeHandler(handler)
+        return
+    _listener.handlers = tuple(h for h in _listener.handlers if h is not handler)
+
+
+def get_pipeline_stats():
+    """Return queue depth and drop/suppression counters"""
+    if _queue_handler is None:
+        return {'queued': 0, 'dropped': 0, 'suppressed': {}}
+    suppressed = {}
+    for f in _queue_handler.filters:
+        if isinstance(f, RateLimitFilter):
+            suppressed = dict(f.suppressed)
+    return {
+        'queued': _queue_handler.queue.qsize(),
+        'dropped': _queue_handler.dropped,
+        'suppressed': suppressed,
+    }
+
+
+def attach_metrics(registry):
+    """Export log pipeline drop counters through a MetricsRegistry"""
+    registry.function('log_queue_depth', 'Log records waiting for the listener',
+                      lambda: get_pipeline_stats()['queued'])
+    registry.function('log_dropped_total', 'Log records dropped on a full queue',
+                      lambda: get_pipeline_stats()['dropped'], kind='counter')
+    registry.function('log_suppressed_total', 'Log records suppressed by rate limits',
+                      lambda: sum(get_pipeline_stats()['suppressed'].values()), kind='counter')
+
+
+def stop_logging():
+    """Flush pending records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _queue_handler = None
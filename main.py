@@ -1,81 +1,256 @@
 import sys
 import logging
-import os
 import threading
 import time
+from collections import deque
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QSlider, QTextEdit, QGroupBox, QGridLayout, QComboBox, QMessageBox
+    QSlider, QPlainTextEdit, QGroupBox, QGridLayout, QComboBox, QMessageBox, QCheckBox
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject
+from PyQt5.QtCore import Qt, QTimer, QPointF, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
 from wifi_handler import WiFiHandler
 from mouse_controller import MouseController
 from gesture_handler import GestureHandler
-import pyautogui
-
-class QTextEditLogger(logging.Handler, QObject):
-    append_text = pyqtSignal(str)
-
-    def __init__(self, text_edit):
+from telemetry import TelemetrySampler
+from device_worker import DeviceWorker
+import logging_setup
+from logging_setup import setup_logging, add_handler, remove_handler
+from metrics import MetricsRegistry, MetricsServer, SnapshotWriter
+from settings import SCHEMA, SettingsStore
+from config import METRICS_CONFIG, SETTINGS_PATH, RECOGNITION_CONFIG
+
+class QTextEditLogger(logging.Handler):
+    """Log handler that feeds a line-capped QPlainTextEdit in batches.
+
+    emit() may run on any thread and only appends the formatted line to a
+    bounded ring; a QTimer on the Qt thread drains the ring at a capped rate
+    so bursts of log records can never flood the event loop.
+    """
+
+    def __init__(self, text_edit, max_lines=2000, buffer_size=5000,
+                 flush_interval_ms=100, max_batch=500):
         logging.Handler.__init__(self)
-        QObject.__init__(self)
         self.text_edit = text_edit
-        self.append_text.connect(self._append)
+        self.text_edit.setMaximumBlockCount(max_lines)
+        self.max_batch = max_batch
+        self._pending = deque(maxlen=buffer_size)
+        self._pending_lock = threading.Lock()
+        self.dropped = 0
+        self._reported_dropped = 0
+
+        self.timer = QTimer(text_edit)
+        self.timer.timeout.connect(self.flush_pending)
+        self.timer.start(flush_interval_ms)
 
     def emit(self, record):
-        msg = self.format(record)
-        self.append_text.emit(msg)
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._pending_lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(msg)
+
+    def flush_pending(self):
+        with self._pending_lock:
+            count = min(len(self._pending), self.max_batch)
+            batch = [self._pending.popleft() for _ in range(count)]
+            dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        if dropped:
+            batch.insert(0, f"... {dropped} log records dropped (total {self.dropped})")
+        if not batch:
+            return
+
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        self.text_edit.appendPlainText("\n".join(batch))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+class TelemetryPlot(QWidget):
+    """Scrolling line plot drawn straight from telemetry ring buffers"""
+
+    def __init__(self, title, series, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.series = series  # list of (label, RingBuffer, color)
+        self.setMinimumHeight(70)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        painter.fillRect(0, 0, w, h, QColor('#f8f9fa'))
+
+        lo, hi = 0.0, 0.0
+        for _, ring, _ in self.series:
+            r_lo, r_hi = ring.min_max()
+            lo, hi = min(lo, r_lo), max(hi, r_hi)
+        span = (hi - lo) or 1.0
+
+        painter.setPen(QColor('#6c757d'))
+        zero_y = h - 1 - (0.0 - lo) / span * (h - 1)
+        painter.drawLine(0, int(zero_y), w, int(zero_y))
+
+        legend = [self.title]
+        for label, ring, color in self.series:
+            values = ring.ordered()
+            if len(values) > 1:
+                step = (w - 1) / (ring.capacity - 1)
+                x0 = (w - 1) - (len(values) - 1) * step
+                points = QPolygonF([
+                    QPointF(x0 + i * step, h - 1 - (v - lo) / span * (h - 1))
+                    for i, v in enumerate(values)
+                ])
+                painter.setPen(QPen(QColor(color), 1))
+                painter.drawPolyline(points)
+            legend.append(f"{label}={ring.last():.1f}")
+
+        painter.setPen(QColor('#343a40'))
+        painter.drawText(4, 12, "  ".join(legend))
+        painter.end()
+
+
+class TelemetryPanel(QGroupBox):
+    """Live plots of stream rate, velocities, gestures and host timing"""
+
+    def __init__(self, wifi_handler, mouse_controller, history_seconds=10, parent=None):
+        super().__init__("Telemetry", parent)
+        refresh_hz = 60
+        screen = QApplication.primaryScreen()
+        if screen is not None and screen.refreshRate() > 0:
+            refresh_hz = min(60, int(screen.refreshRate()))
+
+        self.sampler = TelemetrySampler(wifi_handler, mouse_controller,
+                                        capacity=history_seconds * refresh_hz)
+        s = self.sampler.series
+        self.plots = [
+            TelemetryPlot("vx", [("raw", s['raw_vx'], '#6c757d'),
+                                 ("smooth", s['smooth_vx'], '#007bff')]),
+            TelemetryPlot("vy", [("raw", s['raw_vy'], '#6c757d'),
+                                 ("smooth", s['smooth_vy'], '#28a745')]),
+            TelemetryPlot("msg/s", [("rate", s['msg_rate'], '#17a2b8'),
+                                    ("gestures", s['gesture_events'], '#dc3545')]),
+            TelemetryPlot("host", [("ms/msg", s['proc_time_ms'], '#ffc107'),
+                                   ("lines/recv", s['queue_depth'], '#343a40')]),
+        ]
+        layout = QVBoxLayout()
+        for plot in self.plots:
+            layout.addWidget(plot)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(int(1000 / refresh_hz))
+
+    def refresh(self):
+        self.sampler.sample()
+        if self.isVisible():
+            for plot in self.plots:
+                plot.update()
 
-    def _append(self, msg):
-        self.text_edit.append(msg)
-        self.text_edit.ensureCursorVisible()
 
 class AirMouseGUI(QWidget):
+    # Gestures are published on the socket reader thread; widgets are
+    # only touched after the signal hops back onto the Qt thread.
+    gesture_detected = pyqtSignal(str)
+    output_mode_changed = pyqtSignal(str)
+    settings_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Air Mouse Controller (WiFi)")
-        self.setGeometry(100, 100, 500, 600)
+        self.setGeometry(100, 100, 500, 900)
 
         self.setup_logging()
 
+        self.settings = SettingsStore(SETTINGS_PATH)
+        self.settings.load()
+
         self.wifi_handler = WiFiHandler()
-        self.mouse_controller = MouseController()
+        self.mouse_controller = MouseController(wifi_handler=self.wifi_handler,
+                                                settings=self.settings)
         self.gesture_handler = GestureHandler()
 
         self.wifi_handler.set_data_callback(self.mouse_controller.process_data)
-        self.gesture_handler.register_callback("GESTURE", self.handle_gesture)
+        self.gesture_detected.connect(self.handle_gesture)
+        self.gesture_handler.subscribe("*", self.gesture_detected.emit, priority=100,
+                                       name="AirMouseGUI.handle_gesture")
         self.mouse_controller.set_gesture_callback(self.gesture_handler.process_data)
+        # The toggle gesture switches output synchronously on the reader thread:
+        # device gestures are published there and recognised ones are queued
+        # to it (submit_gesture); the signal hands the change to Qt
+        self.output_mode_changed.connect(self.on_output_mode_changed)
+        self.mouse_controller.set_output_mode_callback(self.output_mode_changed.emit)
+
+        self.device_worker = DeviceWorker(self.wifi_handler, self.mouse_controller)
+        self.device_mode = None  # last mode the device acknowledged
+        self.device_worker.connect_progress.connect(self.on_connect_progress)
+        self.device_worker.connected.connect(self.on_connected)
+        self.device_worker.connection_failed.connect(self.on_connection_failed)
+        self.device_worker.disconnected.connect(self.on_disconnected)
+        self.device_worker.calibration_progress.connect(self.on_calibration_progress)
+        self.device_worker.mode_acknowledged.connect(self.on_mode_acknowledged)
+        self.device_worker.command_failed.connect(self.on_command_failed)
+        self.device_worker.start()
 
         self.setup_gesture_callbacks()
         self.init_ui()
+        self.setup_metrics()
+        self.setup_recognition()
+
+        # Profile loads and control commands may change settings off the GUI thread
+        self.settings_changed.connect(self.sync_settings_widgets)
+        self.settings.add_listener(self.settings_changed.emit)
+        self.sync_settings_widgets(self.settings.current)
 
     def setup_gesture_callbacks(self):
-        gestures = ["UP", "DOWN", "LEFT", "RIGHT", "CIRCLE", "SHAKE"]
-        actions = {
-            "UP": lambda: pyautogui.press('f5'),
-            "DOWN": lambda: pyautogui.press('esc'),
-            "LEFT": lambda: pyautogui.press('left'),
-            "RIGHT": lambda: pyautogui.press('right'),
-            "CIRCLE": lambda: pyautogui.hotkey('alt', 'tab'),
-            "SHAKE": lambda: pyautogui.press('')
-        }
-        for gesture in gestures:
-            self.gesture_handler.register_callback(gesture, actions[gesture])
+        self.mouse_controller.register_default_actions(self.gesture_handler)
 
     def setup_logging(self):
-        log_dir = "logs"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(os.path.join(log_dir, "air_mouse.log")),
-                logging.StreamHandler()
-            ]
-        )
+        setup_logging()
         self.logger = logging.getLogger('AirMouse.GUI')
 
+    def setup_recognition(self):
+        """Start out-of-process gesture recognizers when enabled in config"""
+        self.recognition = None
+        if not RECOGNITION_CONFIG['enabled']:
+            return
+        from recognition import RecognitionSupervisor
+        recognition = RecognitionSupervisor(self.mouse_controller.submit_gesture,
+                                            RECOGNITION_CONFIG)
+        if recognition.start():
+            recognition.attach_metrics(self.metrics_registry)
+            self.mouse_controller.set_sample_sink(recognition.ring)
+            self.recognition = recognition
+
+    def setup_metrics(self):
+        self.metrics_registry = MetricsRegistry()
+        self.wifi_handler.attach_metrics(self.metrics_registry)
+        self.mouse_controller.attach_metrics(self.metrics_registry)
+        self.gesture_handler.attach_metrics(self.metrics_registry)
+        logging_setup.attach_metrics(self.metrics_registry)
+        self.metrics_registry.function('gui_log_dropped_total', 'Log lines dropped by the GUI view',
+                                       lambda: self.text_handler.dropped, kind='counter')
+        self.metrics_server = None
+        self.snapshot_writer = None
+        if not METRICS_CONFIG['enabled']:
+            return
+
+        try:
+            self.metrics_server = MetricsServer(self.metrics_registry, METRICS_CONFIG['host'],
+                                                METRICS_CONFIG['port'])
+            self.metrics_server.start()
+        except OSError as e:
+            self.metrics_server = None
+            self.logger.error(f"Metrics endpoint unavailable: {e}")
+        self.snapshot_writer = SnapshotWriter(self.metrics_registry, METRICS_CONFIG['snapshot_path'],
+                                              METRICS_CONFIG['snapshot_interval'])
+        self.snapshot_writer.start()
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
 
@@ -98,8 +273,14 @@ class AirMouseGUI(QWidget):
         mode_layout = QHBoxLayout()
         mode_group.setLayout(mode_layout)
         self.cursor_btn = QPushButton("Cursor Mode")
+        self.cursor_btn.setCheckable(True)
+        self.cursor_btn.setChecked(True)
         self.cursor_btn.clicked.connect(self.set_cursor_mode)
         mode_layout.addWidget(self.cursor_btn)
+        self.scroll_btn = QPushButton("Scroll Mode")
+        self.scroll_btn.setCheckable(True)
+        self.scroll_btn.clicked.connect(self.set_scroll_mode)
+        mode_layout.addWidget(self.scroll_btn)
         self.gesture_btn = QPushButton("Gesture Mode")
         self.gesture_btn.clicked.connect(self.set_gesture_mode)
         mode_layout.addWidget(self.gesture_btn)
@@ -112,20 +293,33 @@ class AirMouseGUI(QWidget):
         cursor_group = QGroupBox("Cursor Settings")
         cursor_layout = QGridLayout()
         cursor_group.setLayout(cursor_layout)
+        cursor_layout.addWidget(QLabel("Profile:"), 4, 0)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setEditable(True)  # type a new name, then Save
+        self.profile_combo.addItems(self.settings.profile_names())
+        self.profile_combo.setCurrentText(self.settings.active_profile)
+        self.profile_combo.activated[str].connect(self.load_profile)
+        cursor_layout.addWidget(self.profile_combo, 4, 1)
+        self.save_profile_btn = QPushButton("Save Profile")
+        self.save_profile_btn.clicked.connect(self.save_profile)
+        cursor_layout.addWidget(self.save_profile_btn, 4, 2)
+
         cursor_layout.addWidget(QLabel("Speed:"), 0, 0)
+        # Slider steps are tenths, covering the whole range the settings accept
+        _, speed_min, speed_max, speed_default = SCHEMA['cursor_speed']
         self.speed_slider = QSlider(Qt.Horizontal)
-        self.speed_slider.setMinimum(1)
-        self.speed_slider.setMaximum(10)
-        self.speed_slider.setValue(5)
+        self.speed_slider.setMinimum(round(speed_min * 10))
+        self.speed_slider.setMaximum(round(speed_max * 10))
+        self.speed_slider.setValue(round(speed_default * 10))
         self.speed_slider.valueChanged.connect(self.update_cursor_speed)
         cursor_layout.addWidget(self.speed_slider, 0, 1)
-        self.speed_label = QLabel("5.0")
+        self.speed_label = QLabel(f"{speed_default:.1f}")
         cursor_layout.addWidget(self.speed_label, 0, 2)
 
         cursor_layout.addWidget(QLabel("Smoothing:"), 1, 0)
         self.smoothing_slider = QSlider(Qt.Horizontal)
         self.smoothing_slider.setMinimum(0)
-        self.smoothing_slider.setMaximum(90)
+        self.smoothing_slider.setMaximum(95)
         self.smoothing_slider.setValue(50)
         self.smoothing_slider.valueChanged.connect(self.update_cursor_smoothing)
         cursor_layout.addWidget(self.smoothing_slider, 1, 1)
@@ -140,6 +334,10 @@ class AirMouseGUI(QWidget):
         cursor_layout.addWidget(self.calibrate_tilt_btn, 2, 1)
         self.calibration_label = QLabel("Not calibrated")
         cursor_layout.addWidget(self.calibration_label, 2, 2)
+
+        self.fusion_checkbox = QCheckBox("Host sensor fusion (raw IMU stream)")
+        self.fusion_checkbox.toggled.connect(self.toggle_fusion)
+        cursor_layout.addWidget(self.fusion_checkbox, 3, 0, 1, 3)
         main_layout.addWidget(cursor_group)
 
         # Gesture Control Group
@@ -154,39 +352,64 @@ class AirMouseGUI(QWidget):
         gesture_layout.addWidget(self.gesture_status_label)
         main_layout.addWidget(gesture_group)
 
+        # Telemetry Group
+        self.telemetry_panel = TelemetryPanel(self.wifi_handler, self.mouse_controller)
+        main_layout.addWidget(self.telemetry_panel)
+
         # Log Group
         log_group = QGroupBox("Log")
         log_layout = QVBoxLayout()
         log_group.setLayout(log_layout)
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         log_layout.addWidget(self.log_text)
         main_layout.addWidget(log_group)
 
         # Logging handler
-        text_handler = QTextEditLogger(self.log_text)
-        text_handler.setLevel(logging.INFO)
-        logging.getLogger().addHandler(text_handler)
+        self.text_handler = QTextEditLogger(self.log_text)
+        self.text_handler.setLevel(logging.INFO)
+        add_handler(self.text_handler)
 
         self.setLayout(main_layout)
 
     def set_cursor_mode(self):
+        self.mouse_controller.set_output_mode("cursor")
+        self.request_motion_stream("cursor")
+
+    def set_scroll_mode(self):
+        self.mouse_controller.set_output_mode("scroll")
+        self.request_motion_stream("scroll")
+
+    def request_motion_stream(self, label):
+        # Cursor and scroll output both consume the device's motion stream
+        self.on_output_mode_changed(self.mouse_controller.output_mode)
         if self.wifi_handler.is_connected():
-            self.wifi_handler.write("CURSOR_MODE\n")
-            self.logger.info("Switched to cursor mode")
+            fusion = self.mouse_controller.input_source == "fusion"
+            self.device_worker.send_command("RAW_MODE" if fusion else "CURSOR_MODE")
+            self.logger.info(f"Requested {label} mode" + (" with host fusion" if fusion else ""))
+
+    def on_output_mode_changed(self, mode):
+        self.cursor_btn.setChecked(mode == "cursor")
+        self.scroll_btn.setChecked(mode == "scroll")
+
+    def toggle_fusion(self, enabled):
+        self.mouse_controller.set_input_source("fusion" if enabled else "device")
+        # A streaming device must switch to the frames the new source reads
+        if self.device_mode in ("CURSOR", "RAW"):
+            self.request_motion_stream(self.mouse_controller.output_mode)
 
     def set_gesture_mode(self):
         if self.wifi_handler.is_connected():
-            self.wifi_handler.write("GESTURE_MODE\n")
-            self.logger.info("Switched to gesture mode")
+            self.device_worker.send_command("GESTURE_MODE")
+            self.logger.info("Requested gesture mode")
 
     def set_idle_mode(self):
         if self.wifi_handler.is_connected():
-            self.wifi_handler.write("IDLE_MODE\n")
-            self.logger.info("Switched to idle mode")
+            self.device_worker.send_command("IDLE_MODE")
+            self.logger.info("Requested idle mode")
 
     def update_cursor_speed(self):
-        speed = self.speed_slider.value()
+        speed = self.speed_slider.value() / 10.0
         self.speed_label.setText(f"{speed:.1f}")
         self.mouse_controller.set_cursor_speed(speed)
         self.logger.info(f"Updated cursor speed: {speed}")
@@ -197,35 +420,90 @@ class AirMouseGUI(QWidget):
         self.mouse_controller.set_smoothing(smoothing)
         self.logger.info(f"Updated cursor smoothing: {smoothing}")
 
+    def sync_settings_widgets(self, settings):
+        """Show a settings snapshot on the sliders without feeding it back"""
+        for slider, value in ((self.speed_slider, round(settings.cursor_speed * 10)),
+                              (self.smoothing_slider, round(settings.smoothing * 100))):
+            slider.blockSignals(True)
+            slider.setValue(value)
+            slider.blockSignals(False)
+        self.speed_label.setText(f"{settings.cursor_speed:.1f}")
+        self.smoothing_label.setText(f"{settings.smoothing:.2f}")
+
+    def load_profile(self, name):
+        try:
+            self.settings.load_profile(name)
+        except KeyError:
+            # A name typed but not saved yet
+            return
+        self.logger.info(f"Loaded profile: {name}")
+
+    def save_profile(self):
+        name = self.profile_combo.currentText().strip()
+        if not name:
+            return
+        self.settings.save_profile(name)
+        if self.profile_combo.findText(name) < 0:
+            self.profile_combo.addItem(name)
+        self.logger.info(f"Saved profile: {name}")
+
     def calibrate_sensor(self):
         if self.wifi_handler.is_connected():
-            self.wifi_handler.write("CALIBRATE\n")
+            self.device_worker.send_command("CALIBRATE")
             self.calibration_label.setText("Calibrating...")
             self.logger.info("Started sensor calibration")
 
     def calibrate_tilt(self):
         if self.wifi_handler.is_connected():
-            self.wifi_handler.write("CALIBRATE_TILT\n")
+            self.device_worker.send_command("CALIBRATE_TILT")
             self.calibration_label.setText("Calibrating tilt...")
             self.logger.info("Started tilt calibration")
 
     def toggle_connection(self):
+        self.connect_btn.setEnabled(False)
         if self.connect_btn.text() == "Connect":
-            ip = self.ip_input.text()
-            if self.wifi_handler.connect(ip):
-                self.status_label.setText("Connected")
-                self.connect_btn.setText("Disconnect")
-                self.logger.info(f"Connected to ESP32 at {ip}")
-            else:
-                self.status_label.setText("Connection failed")
-                self.logger.error(f"Failed to connect to ESP32 at {ip}")
+            self.device_worker.connect_device(self.ip_input.text())
         else:
-            if self.wifi_handler.disconnect():
-                self.status_label.setText("Disconnected")
-                self.connect_btn.setText("Connect")
-                self.logger.info("Disconnected from ESP32")
-            else:
-                self.logger.error("Failed to disconnect from ESP32")
+            self.status_label.setText("Disconnecting...")
+            self.device_worker.disconnect_device()
+
+    def on_connect_progress(self, message):
+        self.status_label.setText("Connecting...")
+        self.logger.info(message)
+
+    def on_connected(self, ip):
+        self.status_label.setText("Connected")
+        self.connect_btn.setText("Disconnect")
+        self.connect_btn.setEnabled(True)
+        self.device_mode = None
+        self.logger.info(f"Connected to ESP32 at {ip}")
+
+    def on_connection_failed(self, ip):
+        self.status_label.setText("Connection failed")
+        self.connect_btn.setEnabled(True)
+        self.logger.error(f"Failed to connect to ESP32 at {ip}")
+
+    def on_disconnected(self):
+        self.status_label.setText("Disconnected")
+        self.connect_btn.setText("Connect")
+        self.connect_btn.setEnabled(True)
+        self.device_mode = None
+        self.logger.info("Disconnected from ESP32")
+
+    def on_calibration_progress(self, progress):
+        if progress >= 100:
+            self.calibration_label.setText("Calibrated")
+            self.logger.info("Calibration complete")
+        else:
+            self.calibration_label.setText(f"Calibrating... {progress}%")
+
+    def on_mode_acknowledged(self, mode):
+        self.device_mode = mode
+        self.status_label.setText(f"Connected ({mode.lower()} mode)")
+        self.logger.info(f"Device confirmed {mode.lower()} mode")
+
+    def on_command_failed(self, command):
+        self.logger.error(f"Failed to send {command} to ESP32")
 
     def handle_gesture(self, gesture):
         self.gesture_status_label.setText(gesture)
@@ -240,23 +518,22 @@ class AirMouseGUI(QWidget):
         }
         self.gesture_icon_label.setText(icons.get(gesture, "○"))
 
-        actions = {
-            "UP": lambda: pyautogui.press('f5'),
-            "DOWN": lambda: pyautogui.press('esc'),
-            "LEFT": lambda: pyautogui.press('left'),
-            "RIGHT": lambda: pyautogui.press('right'),
-            "CIRCLE": self.switch_application,
-            "SHAKE": lambda: pyautogui.hotkey('esc')
-        }
-        if gesture in actions:
-            actions[gesture]()
-
-    def switch_application(self):
-        try:
-            pyautogui.hotkey('alt', 'tab')
-            self.logger.info("Switched application")
-        except Exception as e:
-            self.logger.error(f"Error switching apps: {e}")
+    def closeEvent(self, event):
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.snapshot_writer:
+            self.snapshot_writer.stop()
+        self.device_worker.stop()
+        self.mouse_controller.scroll.stop()
+        if self.recognition:
+            # Waits out an in-progress write before the ring is freed
+            self.mouse_controller.set_sample_sink(None)
+            self.recognition.stop()
+        self.telemetry_panel.timer.stop()
+        self.text_handler.timer.stop()
+        remove_handler(self.text_handler)
+        self.gesture_handler.shutdown(wait=False)
+        super().closeEvent(event)
 
 def main():
     app = QApplication(sys.argv)
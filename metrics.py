@@ -0,0 +1,341 @@
+"""
+Low-overhead metrics: counters, gauges and fixed-bucket histograms.
+
+Instruments are plain objects that components create up front and update
+on the hot path with a single attribute increment (histograms add one
+bisect). Updates are not locked: each instrument is expected to have a
+single writer thread, which holds for the reader-thread metrics here.
+A registry collects instruments for export as Prometheus text over a
+local HTTP endpoint or as a periodic JSON snapshot file.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+# Seconds, from 50 us up to 1 s
+DEFAULT_LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation=''):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def collect(self):
+        return self.value
+
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self, name, documentation=''):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def collect(self):
+        return self.value
+
+
+class FunctionMetric:
+    """Counter or gauge whose value is read from a callable at export time.
+
+    Lets existing plain-attribute counters be exported with zero per-sample
+    cost.
+    """
+
+    def __init__(self, name, documentation, func, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.kind = kind
+
+    def collect(self):
+        return self.func()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation='', buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def collect(self):
+        cumulative = []
+        running = 0
+        for count in self.counts:
+            running += count
+            cumulative.append(running)
+        return {
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], cumulative)),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class MetricFamily:
+    """A metric split by one or more label values
+
+    Label values from outside the program (device input, say) should pass
+    `allowed`: values not in it are counted under `other`, which keeps the
+    number of series bounded.
+    """
+
+    def __init__(self, factory, name, documentation, labelnames, allowed=None, other='other'):
+        self.factory = factory
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.allowed = allowed
+        self.other = other
+        self.kind = factory(name, documentation).kind
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        if self.allowed is not None:
+            values = tuple(v if v in self.allowed else self.other for v in values)
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = self.factory(self.name, self.documentation)
+                    self.children[values] = child
+        return child
+
+    def collect(self):
+        return {values: child.collect() for values, child in list(self.children.items())}
+
+
+class MetricsRegistry:
+    def __init__(self, prefix='wavesense_'):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Register an instrument; a second instrument with the same name replaces the first"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, metric):
+        with self._lock:
+            if self._metrics.get(metric.name) is metric:
+                del self._metrics[metric.name]
+
+    def counter(self, name, documentation=''):
+        return self.register(Counter(name, documentation))
+
+    def gauge(self, name, documentation=''):
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name, documentation='', buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, buckets))
+
+    def function(self, name, documentation, func, kind='gauge'):
+        return self.register(FunctionMetric(name, documentation, func, kind))
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+    def snapshot(self):
+        """Return every metric value as a JSON-serialisable dict"""
+        data = {}
+        for metric in self.metrics():
+            value = _safe_collect(metric)
+            if value is _FAILED:
+                data[self.prefix + metric.name] = None
+                continue
+            if isinstance(metric, MetricFamily):
+                value = [dict(zip(metric.labelnames, labels), value=v)
+                         for labels, v in value.items()]
+            data[self.prefix + metric.name] = value
+        return {'timestamp': time.time(), 'metrics': data}
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics():
+            name = self.prefix + metric.name
+            if metric.documentation:
+                lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            value = _safe_collect(metric)
+            if value is _FAILED:
+                continue
+            if isinstance(metric, MetricFamily):
+                for labels, child_value in value.items():
+                    label_text = ",".join(f'{k}="{_escape(v)}"'
+                                          for k, v in zip(metric.labelnames, labels))
+                    lines.extend(_render_value(name, metric.kind, child_value, label_text))
+            else:
+                lines.extend(_render_value(name, metric.kind, value, ''))
+        return "\n".join(lines) + "\n"
+
+
+# Returned by _safe_collect for a metric whose collector raised
+_FAILED = object()
+
+
+def _safe_collect(metric):
+    try:
+        return metric.collect()
+    except Exception as e:
+        logging.getLogger('AirMouse.Metrics').error(f"Failed to collect {metric.name}: {e}")
+        return _FAILED
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_value(name, kind, value, label_text):
+    if kind == 'histogram' and not isinstance(value, dict):
+        return []
+    if kind != 'histogram':
+        suffix = f"{{{label_text}}}" if label_text else ''
+        return [f"{name}{suffix} {value}"]
+    lines = []
+    sep = ',' if label_text else ''
+    for bound, count in value['buckets'].items():
+        lines.append(f'{name}_bucket{{{label_text}{sep}le="{bound}"}} {count}')
+    suffix = f"{{{label_text}}}" if label_text else ''
+    lines.append(f"{name}_sum{suffix} {value['sum']}")
+    lines.append(f"{name}_count{suffix} {value['count']}")
+    return lines
+
+
+def labeled(factory, name, documentation, labelnames, allowed=None):
+    """Create an unregistered labeled family of `factory` instruments"""
+    return MetricFamily(factory, name, documentation, labelnames, allowed)
+
+
+def _make_request_handler():
+    # http.server pulls in the email package; only pay for it when serving
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            registry = self.server.registry
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(registry.snapshot()).encode('utf-8')
+                content_type = 'application/json'
+            elif self.path.startswith('/metrics'):
+                body = registry.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsRequestHandler
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /metrics.json on localhost"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        self.logger = logging.getLogger('AirMouse.Metrics')
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        from http.server import ThreadingHTTPServer
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_request_handler())
+        self._httpd.daemon_threads = True
+        self._httpd.registry = self.registry
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name='MetricsServer', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        return self.port
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+class SnapshotWriter:
+    """Periodically writes registry.snapshot() to a JSON file atomically"""
+
+    def __init__(self, registry, path, interval=10.0):
+        self.logger = logging.getLogger('AirMouse.Metrics')
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='MetricsSnapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.write()
+
+    def write(self):
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.registry.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+
@@ -1,53 +1,200 @@
-import pyautogui
 import logging
+import queue
+import threading
 import time
 from wifi_handler import WiFiHandler
 from gesture_handler import GestureHandler
+from metrics import Counter, Histogram, labeled
+from fusion import OrientationTracker, FIRMWARE_FRAME_DT
+from flow_control import AdaptiveRateController
+from clock_sync import ClockSync, WRAP_MS
+from scroll import ScrollController
+from settings import SettingsStore
+from shm_ring import KIND_CURSOR, KIND_IMU
+from config import (FUSION_CONFIG, FLOW_CONTROL_CONFIG, CLOCK_SYNC_CONFIG,
+                    SCROLL_CONFIG, SAMPLE_RATE, DEVICE_GESTURES)
+
+
+# Longest gap between motion frames counted as movement, seconds
+MAX_MOTION_DT = 0.1
+
+
+class PyAutoGUIBackend:
+    """Mouse and keyboard output through pyautogui, imported on first use"""
 
-class MouseController:
     def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def size(self):
+        return self._pyautogui.size()
+
+    def position(self):
+        return self._pyautogui.position()
+
+    def move_to(self, x, y):
+        self._pyautogui.moveTo(x, y)
+
+    def move_rel(self, dx, dy):
+        self._pyautogui.move(dx, dy)
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self._pyautogui.hotkey(*keys)
+
+    def scroll(self, clicks):
+        self._pyautogui.scroll(clicks)
+
+
+class NullBackend:
+    """Output backend that tracks a virtual cursor and emits nothing"""
+
+    def __init__(self, width=1920, height=1080):
+        self.width = width
+        self.height = height
+        self.x = width // 2
+        self.y = height // 2
+        self.keys = 0
+        self.scroll_clicks = 0
+        self.scroll_events = 0
+
+    def size(self):
+        return self.width, self.height
+
+    def position(self):
+        return self.x, self.y
+
+    def move_to(self, x, y):
+        self.x, self.y = x, y
+
+    def move_rel(self, dx, dy):
+        self.x += dx
+        self.y += dy
+
+    def press(self, key):
+        self.keys += 1
+
+    def hotkey(self, *keys):
+        self.keys += 1
+
+    def scroll(self, clicks):
+        self.scroll_clicks += clicks
+        self.scroll_events += 1
+
+
+class MouseController:
+    # Default gesture to action mapping used by the GUI and the daemon
+    GESTURE_ACTIONS = {
+        "UP": ('press', 'f5'),
+        "DOWN": ('press', 'esc'),
+        "LEFT": ('press', 'left'),
+        "RIGHT": ('press', 'right'),
+        "CIRCLE": ('hotkey', 'alt', 'tab'),
+        "SHAKE": ('press', 'esc'),
+    }
+
+    def __init__(self, backend=None, wifi_handler=None, settings=None):
         self.logger = logging.getLogger('AirMouse.Controller')
+        self.backend = backend if backend is not None else PyAutoGUIBackend()
+
+        # Tuning values; move_cursor reads one immutable snapshot per sample
+        self.settings = settings if settings is not None else SettingsStore()
 
-        # Initialize all attributes
-        self.cursor_speed = 5.0
-        self.smoothing_factor = 0.9
         self.current_vx = 0.0
         self.current_vy = 0.0
+        self.last_motion_time = None   # sample time of the previous motion frame
+        self.carry_x = 0.0             # sub-pixel movement not yet applied
+        self.carry_y = 0.0
         self.gesture_callback = None  # Initialize gesture_callback
+        self.last_gesture = None
+        self.last_gesture_time = 0.0
+        # Gestures from recognition workers, dispatched on the reader thread
+        self._recognised = queue.SimpleQueue()
 
-        self.wifi_handler = WiFiHandler()
+        self.wifi_handler = wifi_handler if wifi_handler is not None else WiFiHandler()
         self.gesture_handler = GestureHandler()
         self.is_running = False
         self.is_calibrating = False
         self.initialized = False
 
         # Mouse control parameters
-        self.sensitivity = 1.0
-        self.smoothing = 0.5
         self.prev_x = 0
         self.prev_y = 0
 
         # Screen boundaries
-        self.screen_width, self.screen_height = pyautogui.size()
+        self.screen_width, self.screen_height = self.backend.size()
 
         # Calibration callback
         self.calibration_callback = lambda x: None
 
+        # Mode acknowledgement callback, called with "CURSOR", "GESTURE", "IDLE" or "RAW"
+        self.mode_callback = None
+
+        # Cursor input: "device" uses CURSOR frames, "fusion" fuses raw IMU frames on the host
+        self.input_source = "device"
+        self.orientation = None
+        self.last_imu_time = None
+
+        # Asks the device for a stream rate that suits the current motion and host load
+        self.flow_control = AdaptiveRateController(self.wifi_handler, FLOW_CONTROL_CONFIG)
+
+        # Maps device millis() timestamps on frames onto the host clock
+        self.clock_sync = ClockSync(self.wifi_handler, CLOCK_SYNC_CONFIG)
+        self.last_arrival_time = None
+        self.last_sample_time = None  # host-clock time the last stamped sample was taken
+        self.last_imu_device_ms = None
+
+        # Motion output: "cursor" moves the pointer, "scroll" drives the scroll wheel
+        self.output_mode = "cursor"
+        self.output_mode_callback = None
+        self.scroll = ScrollController(self.backend, SCROLL_CONFIG)
+
+        # Optional shared-memory ring (shm_ring.SampleRing) feeding recognition workers;
+        # the lock keeps the ring from being detached and freed mid-write
+        self.sample_sink = None
+        self._sink_lock = threading.Lock()
+
         # Tilt calibration
         self.tilt_calibrating = False
 
-        # Configure PyAutoGUI
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.001
-
-        self.logger.info("MouseController initialized")
-        print("MouseController initialized with speed:", self.cursor_speed)
+        # Telemetry counters, written by the data thread only
+        self.last_raw_vx = 0.0
+        self.last_raw_vy = 0.0
+        self.messages_processed = 0
+        self.gesture_events = 0
+        self.processing_time_total = 0.0
+        self.last_process_time = 0.0
+
+        self.metric_parse_errors = Counter('controller_parse_errors_total',
+                                           'Messages that failed to parse or process')
+        self.metric_unknown = Counter('controller_unknown_messages_total',
+                                      'Messages with an unrecognised prefix')
+        self.metric_process_seconds = Histogram('controller_process_seconds',
+                                                'Host time spent handling one message')
+        self.metric_output_seconds = Histogram('controller_cursor_output_seconds',
+                                               'Time spent in the output backend per cursor move')
+        self.metric_frame_transit = Histogram('controller_frame_transit_seconds',
+                                              'Device sample time to host arrival, synchronised clock')
+        self.metric_gestures = labeled(Counter, 'controller_gestures_total',
+                                       'Gesture frames received, by gesture', ['gesture'],
+                                       allowed=frozenset(DEVICE_GESTURES))
+
+        self.logger.info(f"MouseController initialized with speed: {self.cursor_speed}")
+
+    @property
+    def cursor_speed(self):
+        return self.settings.current.cursor_speed
+
+    @property
+    def smoothing_factor(self):
+        return self.settings.current.smoothing
 
     def set_smoothing(self, smoothing):
-        """Set smoothing factor"""
-        self.smoothing_factor = smoothing
-        self.smoothing = smoothing  # Update both for consistency
-        self.logger.info(f"Smoothing factor set to {smoothing}")
+        """Set smoothing factor, clamped to 0..0.95"""
+        applied = self.settings.update(smoothing=smoothing).smoothing
+        self.logger.info(f"Smoothing factor set to {applied}")
 
     def connect(self, ip_address, port=80):
         """Connect to ESP32 via WiFi"""
@@ -144,75 +291,87 @@ class MouseController:
             return False
 
     def process_data(self, data):
+        """Process incoming data from ESP32 and account the host time spent"""
+        start = time.perf_counter()
+        # Lines framed from one recv share its arrival time
+        self.last_arrival_time = self.wifi_handler.last_recv_time or start
+        self.last_sample_time = None
+        if not self._recognised.empty():
+            self._drain_recognised()
+        self._handle_message(data)
+        elapsed = time.perf_counter() - start
+        self.processing_time_total += elapsed
+        self.last_process_time = elapsed
+        self.messages_processed += 1
+        self.metric_process_seconds.observe(elapsed)
+        self.clock_sync.maybe_ping(start)
+
+    def _handle_message(self, data):
         """Process incoming data from ESP32 with improved gesture handling"""
         try:
-            print(f"Received: {data}")  # Debug print
-
             # Handle cursor data
             if data.startswith("CURSOR,"):
+                if self.input_source != "device":
+                    return
                 parts = data.split(',')
-                if len(parts) == 3:
+                if len(parts) in (3, 4):
                     vx = float(parts[1])
                     vy = float(parts[2])
-                    print(f"Moving cursor: {vx}, {vy}")  # Debug print
+                    if len(parts) == 4:
+                        self._retime(int(parts[3]))
+                    if self.sample_sink is not None:
+                        self._write_sample(KIND_CURSOR, (vx, vy))
                     self.move_cursor(vx, vy)
                 return
 
+            # Handle raw IMU samples for host-side fusion and recognition
+            if data.startswith("IMU,"):
+                if self.input_source == "fusion" or self.sample_sink is not None:
+                    parts = data.split(',')
+                    if len(parts) in (7, 8):
+                        values = [float(p) for p in parts[1:7]]
+                        dt = None
+                        if len(parts) == 8:
+                            # Device timestamps are immune to WiFi batching of frames
+                            device_ms = int(parts[7])
+                            self._retime(device_ms)
+                            if self.last_imu_device_ms is not None:
+                                elapsed_ms = (device_ms - self.last_imu_device_ms) % WRAP_MS
+                                dt = min(elapsed_ms / 1000.0, FUSION_CONFIG['max_dt']) or None
+                            self.last_imu_device_ms = device_ms
+                        if self.sample_sink is not None:
+                            self._write_sample(KIND_IMU, values)
+                        if self.input_source == "fusion":
+                            self.process_imu_sample(*values, dt=dt)
+                return
+
+            # Handle clock synchronisation replies
+            if data.startswith("PONG,"):
+                seq, recv_ms, send_ms = (int(p) for p in data.split(',')[1:4])
+                self.clock_sync.on_pong(seq, recv_ms, send_ms, self.last_arrival_time)
+                return
+
             # Handle gesture data with cooldown and priority
             if data.startswith("GESTURE,"):
-                current_time = time.time()
-                gesture = data.split(',')[1].strip()
-
-                # Apply gesture-specific cooldowns
-                min_cooldown = 0.3  # Base cooldown (300ms)
-
-                # Longer cooldown for circles to prevent overlap
-                if gesture == "CIRCLE":
-                    min_cooldown = 0.8
-                # Shorter cooldown for directional gestures
-                elif gesture in ["LEFT", "RIGHT"]:
-                    min_cooldown = 0.2
-
-                # Check if we should process this gesture
-                if (not hasattr(self, 'last_gesture') or
-                    current_time - self.last_gesture_time > min_cooldown or
-                    gesture != self.last_gesture):
-
-                    self.last_gesture = gesture
-                    self.last_gesture_time = current_time
-
-                    # Handle different gesture types
-                    if gesture == "CIRCLE":
-                        print("Pure circle gesture detected")
-                        pyautogui.press('right')  # Example: Next slide
-
-                    elif gesture in ["LEFT", "RIGHT"]:
-                        print(f"Tilt gesture: {gesture}")
-                        distance = 30  # pixels to move
-                        if gesture == "LEFT":
-                            pyautogui.move(-distance, 0)
-                        else:
-                            pyautogui.move(distance, 0)
-
-                    elif gesture == "SHAKE":
-                        print("Shake gesture detected")
-                        pyautogui.press('esc')  # Example: Exit mode
-
-                    # Call external callback if set
-                    if self.gesture_callback:
-                        self.gesture_callback(data)
+                self.gesture_events += 1
+                parts = data.split(',')
+                gesture = parts[1].strip()
+                if len(parts) >= 3:
+                    self._retime(int(parts[2]))
+                self.metric_gestures.labels(gesture).inc()
+                self._dispatch_gesture(gesture, data)
                 return
             # Handle calibration progress
             if data.startswith("CALIBRATION_PROGRESS,"):
                 progress = int(data.split(',')[1])
-                print(f"Calibration progress: {progress}%")
+                self.logger.debug(f"Calibration progress: {progress}%")
                 if self.calibration_callback:
                     self.calibration_callback(progress)
                 return
 
             # Handle calibration completion
             if data == "CALIBRATION_COMPLETE":
-                print("Calibration complete")
+                self.logger.info("Calibration complete")
                 self.is_calibrating = False
                 if self.calibration_callback:
                     self.calibration_callback(100)  # 100% complete
@@ -221,112 +380,284 @@ class MouseController:
             # Handle tilt calibration progress
             if data.startswith("TILT_CALIBRATION_PROGRESS,"):
                 progress = int(data.split(',')[1])
-                print(f"Tilt calibration progress: {progress}%")
+                self.logger.debug(f"Tilt calibration progress: {progress}%")
                 if self.calibration_callback:
                     self.calibration_callback(progress)
                 return
 
             # Handle tilt calibration completion
             if data == "TILT_CALIBRATION_COMPLETE":
-                print("Tilt calibration complete")
+                self.logger.info("Tilt calibration complete")
                 self.tilt_calibrating = False
                 if self.calibration_callback:
                     self.calibration_callback(100)  # 100% complete
                 return
 
-            # Handle mode changes
+            # Handle stream rate acknowledgements
+            if data.startswith("RATE_ACK,"):
+                self.flow_control.on_ack(int(data.split(',')[1]))
+                return
+
+            # Handle mode changes; each mode starts at the device's default rate
+            if data.startswith("MODE_"):
+                self.flow_control.reset()
+
             if data == "MODE_CURSOR":
-                print("Switched to cursor mode")
+                self.logger.info("Switched to cursor mode")
+                if self.mode_callback:
+                    self.mode_callback("CURSOR")
                 return
 
             if data == "MODE_GESTURE":
-                print("Switched to gesture mode")
+                self.logger.info("Switched to gesture mode")
+                if self.mode_callback:
+                    self.mode_callback("GESTURE")
+                return
+
+            if data == "MODE_RAW":
+                self.logger.info("Switched to raw IMU mode")
+                if self.mode_callback:
+                    self.mode_callback("RAW")
                 return
 
             if data == "MODE_IDLE":
-                print("Switched to idle mode")
+                self.logger.info("Switched to idle mode")
+                if self.mode_callback:
+                    self.mode_callback("IDLE")
                 return
 
             # Handle initialization
             if data == "INIT_COMPLETE":
-                print("ESP32 initialization complete")
+                self.logger.info("ESP32 initialization complete")
                 self.initialized = True
                 return
 
             # Unknown data
-            print(f"Unknown data: {data}")
+            self.metric_unknown.inc()
+            self.logger.debug(f"Unknown data: {data}")
 
         except Exception as e:
+            self.metric_parse_errors.inc()
             self.logger.error(f"Data processing error: {e}")
-            print(f"Error: {e}")
+
+    def _dispatch_gesture(self, gesture, data):
+        """Apply the per-gesture cooldown and publish `data` on the gesture bus"""
+        current_time = time.time()
+
+        # Apply gesture-specific cooldowns
+        min_cooldown = 0.3  # Base cooldown (300ms)
+
+        # Longer cooldown for circles to prevent overlap
+        if gesture == "CIRCLE":
+            min_cooldown = 0.8
+        # Shorter cooldown for directional gestures
+        elif gesture in ["LEFT", "RIGHT"]:
+            min_cooldown = 0.2
+
+        # Check if we should process this gesture
+        if (self.last_gesture is None or
+            current_time - self.last_gesture_time > min_cooldown or
+            gesture != self.last_gesture):
+
+            self.last_gesture = gesture
+            self.last_gesture_time = current_time
+
+            # Actions are bus subscriptions (register_default_actions),
+            # queued off this thread
+            if self.gesture_callback:
+                self.gesture_callback(data)
+
+    def submit_gesture(self, gesture):
+        """Queue a gesture recognised on another thread
+
+        process_data dispatches it on the reader thread before the next
+        message, so it shares the device gestures' cooldown and never
+        changes output state under move_cursor.
+        """
+        self._recognised.put(gesture)
+
+    def _drain_recognised(self):
+        while True:
+            try:
+                gesture = self._recognised.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._dispatch_gesture(gesture, f"GESTURE,{gesture}")
+            except Exception as e:
+                self.logger.error(f"Recognised gesture handling error: {e}")
+
+    def _retime(self, device_ms):
+        """Place a device-stamped sample on the host clock and record its transit time"""
+        self.last_sample_time = self.clock_sync.observe_frame(device_ms, self.last_arrival_time)
+        if self.clock_sync.synced:
+            self.metric_frame_transit.observe(self.last_arrival_time - self.last_sample_time)
+
+    def set_input_source(self, source):
+        """Select cursor input: "device" (CURSOR frames) or "fusion" (IMU frames)"""
+        if source not in ("device", "fusion"):
+            raise ValueError(f"Unknown input source: {source}")
+        if source == "fusion":
+            self.orientation = OrientationTracker(
+                algorithm=FUSION_CONFIG['algorithm'], beta=FUSION_CONFIG['beta'],
+                kp=FUSION_CONFIG['kp'], ki=FUSION_CONFIG['ki'],
+                default_dt=1.0 / SAMPLE_RATE)
+            self.last_imu_time = None
+            self.last_imu_device_ms = None
+        self.input_source = source
+        self.logger.info(f"Cursor input source set to {source}")
+
+    def process_imu_sample(self, ax, ay, az, gx, gy, gz, dt=None):
+        """Fuse one raw IMU sample and move the cursor with the derived velocity"""
+        if dt is None:
+            now = time.perf_counter()
+            if self.last_imu_time is not None:
+                dt = min(now - self.last_imu_time, FUSION_CONFIG['max_dt'])
+            self.last_imu_time = now
+        vx, vy = self.orientation.update_raw(ax, ay, az, gx, gy, gz, dt)
+        self.move_cursor(vx, vy)
 
     def handle_gesture(self, gesture):
         """Handle pre-defined gestures"""
         try:
-            import pyautogui
-
-            if gesture == "UP":
-                pyautogui.press('f5')
-            elif gesture == "DOWN":
-                pyautogui.press('esc')
-            elif gesture == "LEFT":
-                pyautogui.press('left')
-            elif gesture == "RIGHT":
-                pyautogui.press('right')
-            elif gesture == "CIRCLE":
-                pyautogui.hotkey('alt', 'tab')  # Switch applications
-            elif gesture == "SHAKE":
-                pyautogui.press('esc')  # Cancel/back action
+            action = self.GESTURE_ACTIONS.get(gesture)
+            if action is None:
+                return
+
+            kind, keys = action[0], action[1:]
+            if kind == 'hotkey':
+                self.backend.hotkey(*keys)
+            else:
+                self.backend.press(keys[0])
 
             self.logger.info(f"Executed gesture: {gesture}")
 
         except Exception as e:
             self.logger.error(f"Gesture handling error: {e}")
-    
+
+    def register_default_actions(self, gesture_handler):
+        """Subscribe the default gesture actions on a GestureHandler"""
+        toggle = SCROLL_CONFIG.get('toggle_gesture')
+        for gesture in self.GESTURE_ACTIONS:
+            # The output toggle is the only action of its gesture
+            if gesture == toggle:
+                continue
+            gesture_handler.subscribe(gesture, self.handle_gesture, asynchronous=True,
+                                      name=f"MouseController.action[{gesture}]")
+        if toggle:
+            gesture_handler.subscribe(toggle, self.toggle_output_mode,
+                                      name="MouseController.toggle_output_mode")
+
+    def set_output_mode(self, mode):
+        """Route motion to the cursor ("cursor") or the scroll wheel ("scroll")"""
+        if mode not in ("cursor", "scroll"):
+            raise ValueError(f"Unknown output mode: {mode}")
+        if mode == self.output_mode:
+            return
+        self.output_mode = mode
+        self.scroll.reset()
+        # Scroll output keeps ticking on its own thread between samples
+        if mode == "scroll":
+            self.scroll.start()
+        else:
+            self.scroll.stop()
+        self.current_vx = 0.0
+        self.current_vy = 0.0
+        self.logger.info(f"Output mode set to {mode}")
+        if self.output_mode_callback:
+            self.output_mode_callback(mode)
+
+    def toggle_output_mode(self, gesture=None):
+        """Switch between cursor and scroll output"""
+        self.set_output_mode("scroll" if self.output_mode == "cursor" else "cursor")
+
+    def set_output_mode_callback(self, callback):
+        """Set callback for output mode changes"""
+        self.output_mode_callback = callback
+
+    def _motion_dt(self):
+        """Seconds covered by this motion sample, in units of 20 ms firmware frames"""
+        now = self.last_sample_time
+        if now is None:
+            now = time.perf_counter()
+        last, self.last_motion_time = self.last_motion_time, now
+        if last is None:
+            return 1.0
+        return min(max(now - last, 0.0), MAX_MOTION_DT) / FIRMWARE_FRAME_DT
+
     def move_cursor(self, vx, vy):
-        """Move the cursor based on sensor data"""
+        """Move the cursor based on sensor data
+
+        vx, vy are rates (CURSOR frame units). Speed, dead zone and
+        smoothing were tuned per 20 ms frame and are applied per elapsed
+        time, so the cursor feels the same at any stream rate.
+        """
         try:
-            # Apply sensitivity
-            vx *= self.cursor_speed
-            vy *= self.cursor_speed
+            self.flow_control.observe(vx, vy, self.wifi_handler.last_batch_lines,
+                                      self.last_process_time)
 
-            if abs(vx) < 10.0: vx = 0
-            if abs(vy) < 10.0: vy = 0
-            
+            if self.output_mode == "scroll":
+                self.scroll.update(vy, self.last_sample_time)
+                return
+
+            frames = self._motion_dt()
+            settings = self.settings.current
+
+            # Apply sensitivity: pixels per 20 ms frame
+            vx *= settings.cursor_speed
+            vy *= settings.cursor_speed
+
+            # A threshold on a rate holds at any frame interval
+            if abs(vx) < settings.dead_zone: vx = 0
+            if abs(vy) < settings.dead_zone: vy = 0
 
-            # Apply smoothing
-            self.current_vx = self.current_vx * self.smoothing_factor + vx * (1 - self.smoothing_factor)
-            self.current_vy = self.current_vy * self.smoothing_factor + vy * (1 - self.smoothing_factor)
+            # Velocity going into the smoother, for the telemetry panel
+            self.last_raw_vx = vx
+            self.last_raw_vy = vy
+
+            # Apply smoothing: `smoothing` is the weight kept per 20 ms frame
+            keep = settings.smoothing ** frames
+            self.current_vx = self.current_vx * keep + vx * (1 - keep)
+            self.current_vy = self.current_vy * keep + vy * (1 - keep)
 
             if abs(self.current_vx) < 0.5:
                 self.current_vx = 0
+                self.carry_x = 0.0
             if abs(self.current_vy) < 0.5:
                 self.current_vy = 0
+                self.carry_y = 0.0
+
+            # Whole pixels for the elapsed time; the remainder carries over
+            self.carry_x += self.current_vx * frames
+            self.carry_y += self.current_vy * frames
+            step_x = int(self.carry_x)
+            step_y = int(self.carry_y)
+            self.carry_x -= step_x
+            self.carry_y -= step_y
 
-            # Only move if above threshold
-            if abs(self.current_vx) > 0.1 or abs(self.current_vy) > 0.1:
+            if step_x or step_y:
                 # Get current position
-                current_x, current_y = pyautogui.position()
+                current_x, current_y = self.backend.position()
 
                 # Calculate new position
-                new_x = current_x + int(self.current_vx)
-                new_y = current_y + int(self.current_vy)
+                new_x = current_x + step_x
+                new_y = current_y + step_y
 
                 # Ensure cursor stays within screen boundaries
                 new_x = max(0, min(new_x, self.screen_width - 1))
                 new_y = max(0, min(new_y, self.screen_height - 1))
 
                 # Move cursor
-                pyautogui.moveTo(new_x, new_y)
-                print(f"Moved cursor to: {new_x}, {new_y}")
+                output_start = time.perf_counter()
+                self.backend.move_to(new_x, new_y)
+                self.metric_output_seconds.observe(time.perf_counter() - output_start)
         except Exception as e:
             self.logger.error(f"Error moving cursor: {e}")
-            print(f"Cursor error: {e}")
 
     def center_cursor(self):
         """Center the cursor on the screen"""
         try:
-            pyautogui.moveTo(self.screen_width // 2, self.screen_height // 2)
+            self.backend.move_to(self.screen_width // 2, self.screen_height // 2)
             self.logger.info("Cursor centered")
         except Exception as e:
             self.logger.error(f"Error centering cursor: {e}")
@@ -337,14 +668,12 @@ class MouseController:
 
     def set_cursor_speed(self, speed):
         """Set cursor speed"""
-        self.cursor_speed = speed
-        self.logger.info(f"Cursor speed set to {speed}")
+        applied = self.settings.update(cursor_speed=speed).cursor_speed
+        self.logger.info(f"Cursor speed set to {applied}")
 
     def set_smoothing_factor(self, factor):
-        """Set the smoothing factor"""
-        self.smoothing_factor = max(0.0, min(0.95, factor))  # Clamp between 0 and 0.95
-        self.smoothing = self.smoothing_factor  # Keep both in sync
-        self.logger.info(f"Smoothing factor set to: {factor}")
+        """Alias of set_smoothing, kept for existing callers"""
+        self.set_smoothing(factor)
 
     def set_cursor_mode(self):
         """Switch to cursor mode"""
@@ -364,6 +693,50 @@ class MouseController:
         self.wifi_handler.write(b"GESTURE_MODE\n")
         return True
 
+    def attach_metrics(self, registry):
+        """Export this controller's counters through a MetricsRegistry"""
+        for metric in (self.metric_parse_errors, self.metric_unknown,
+                       self.metric_process_seconds, self.metric_output_seconds,
+                       self.metric_frame_transit, self.metric_gestures):
+            registry.register(metric)
+        registry.function('controller_messages_total', 'Messages handled by the controller',
+                          lambda: self.messages_processed, kind='counter')
+        registry.function('stream_rate_hz', 'Stream rate requested from the device',
+                          lambda: self.flow_control.rate or 0)
+        registry.function('clock_offset_seconds', 'Device clock minus host clock',
+                          lambda: self.clock_sync.offset() if self.clock_sync.synced else 0.0)
+        registry.function('clock_drift_ppm', 'Device clock drift relative to the host',
+                          self.clock_sync.drift_ppm)
+        registry.function('frame_jitter_seconds', 'RFC 3550 jitter of frame transit times',
+                          lambda: self.clock_sync.jitter)
+        registry.function('scroll_events_total', 'Coalesced scroll events sent to the OS',
+                          lambda: self.scroll.events, kind='counter')
+        registry.function('scroll_clicks_total', 'Scroll clicks sent to the OS',
+                          lambda: self.scroll.clicks, kind='counter')
+        registry.function('stream_rate_commands_total', 'RATE commands sent to the device',
+                          lambda: self.flow_control.rate_commands, kind='counter')
+        registry.function('stream_overloads_total', 'Frames that found the host behind',
+                          lambda: self.flow_control.overloads, kind='counter')
+
+    def set_mode_callback(self, callback):
+        """Set callback for mode acknowledgements from the device"""
+        self.mode_callback = callback
+
+    def set_sample_sink(self, sink):
+        """Copy every parsed motion sample into `sink`, or stop with None
+
+        Returns once no write to the previous sink is in progress, so the
+        caller may close it straight away.
+        """
+        with self._sink_lock:
+            self.sample_sink = sink
+
+    def _write_sample(self, kind, values):
+        with self._sink_lock:
+            if self.sample_sink is not None:
+                self.sample_sink.write(self.last_sample_time or self.last_arrival_time,
+                                       kind, values)
+
     def set_gesture_callback(self, callback):
         """Set callback for gesture data"""
         self.gesture_callback = callback
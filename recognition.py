@@ -0,0 +1,403 @@
+"""
+Out-of-process gesture recognition.
+
+Recognition models written in Python would compete for the GIL with the
+socket reader and cursor output if they ran in the host process. Here
+``MouseController`` only appends each parsed sample to a shared-memory
+ring (``shm_ring.SampleRing``); every recognizer runs in its own worker
+process, reads new samples straight from the ring and puts recognised
+gesture names on a multiprocessing queue. ``RecognitionSupervisor`` drains
+that queue on a thread of the host process, hands each gesture to its
+``publish`` callable (``MouseController.submit_gesture``, which dispatches it
+on the reader thread) and restarts workers that exit or stop sending
+heartbeats, backing off exponentially when one keeps failing.
+
+Recognizers are named ``"module:Class"`` (optionally ``(spec, options)``)
+so a spawned worker can import them. A recognizer has ``feed(rows)``,
+called with lists of ring records, returning the gestures it recognised.
+"""
+
+import collections
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+from config import WINDOW_SIZE, OVERLAP, DEVICE_GESTURES
+from fusion import GYRO_LSB_PER_DPS, DEFAULT_CURSOR_GAIN
+from metrics import Counter, Histogram, labeled
+from shm_ring import SampleRing, HAS_SHARED_MEMORY, KIND_CURSOR, KIND_IMU
+
+
+def load_recognizer(spec, options=None):
+    """Instantiate a recognizer from a "module:Class" spec"""
+    module_name, _, class_name = spec.partition(':')
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(**(options or {}))
+
+
+def run_recognizer(ring, recognizer, emit, stop, heartbeat=None, batch=256,
+                   poll_interval=0.005):
+    """Feed new ring samples to `recognizer` until `stop` is set
+
+    Calls ``emit(kind, payload)`` with ``('gesture', name)`` and
+    ``('dropped', count)``. Shared by the worker processes and by
+    in-process comparison runs in the benchmarks.
+    """
+    position = ring.written()
+    while not stop.is_set():
+        if heartbeat is not None:
+            heartbeat.value = time.monotonic()
+        position, rows, dropped = ring.read(position, batch)
+        if dropped:
+            emit('dropped', dropped)
+        if not rows:
+            time.sleep(poll_interval)
+            continue
+        for gesture in recognizer.feed(rows) or ():
+            emit('gesture', gesture)
+
+
+def _worker_main(index, spec, options, ring_name, events, heartbeat, stop, config):
+    """Entry point of one recognition worker process"""
+    # The host process owns shutdown; Ctrl+C must not kill workers mid-write
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if config.get('nice') and hasattr(os, 'nice'):
+        os.nice(config['nice'])
+
+    def emit(kind, payload):
+        events.put((kind, index, payload, time.monotonic()))
+
+    ring = None
+    try:
+        ring = SampleRing.attach(ring_name)
+        recognizer = load_recognizer(spec, options)
+        run_recognizer(ring, recognizer, emit, stop, heartbeat,
+                       config['batch'], config['poll_interval'])
+    except Exception as e:
+        # Worker processes have no logging set up; report to the supervisor
+        emit('error', f"{type(e).__name__}: {e}")
+        raise SystemExit(1)
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+class WindowRecognizer:
+    """Base for recognizers that classify sliding windows of ring samples
+
+    Only records whose kind is in `kinds` enter the window.
+    """
+
+    kinds = (KIND_IMU,)
+
+    def __init__(self, window=WINDOW_SIZE, overlap=OVERLAP):
+        self.window = collections.deque(maxlen=window)
+        self.stride = max(1, int(window * (1.0 - overlap)))
+        self._since_last = 0
+
+    def feed(self, rows):
+        gestures = []
+        for row in rows:
+            if row[1] not in self.kinds:
+                continue
+            self.window.append(row)
+            self._since_last += 1
+            if len(self.window) == self.window.maxlen and self._since_last >= self.stride:
+                self._since_last = 0
+                gesture = self.classify(list(self.window))
+                if gesture:
+                    gestures.append(gesture)
+        return gestures
+
+    def classify(self, window):
+        """Return a gesture name for a full window, or None"""
+        raise NotImplementedError
+
+
+class ShakeRecognizer(WindowRecognizer):
+    """Fast back-and-forth rotation: high gyro RMS with repeated reversals
+
+    Reads rotation rates from raw IMU frames and from CURSOR frames, whose
+    values are the firmware's yaw and pitch rates times its speed factor,
+    so it works in cursor mode as well as with host fusion.
+    """
+
+    kinds = (KIND_CURSOR, KIND_IMU)
+
+    def __init__(self, min_rms_dps=150.0, min_reversals=4, cooldown_windows=2, **kwargs):
+        super().__init__(**kwargs)
+        self.min_rms_dps = min_rms_dps
+        self.min_reversals = min_reversals
+        self.cooldown_windows = cooldown_windows
+        self._cooldown = 0
+
+    def classify(self, window):
+        if self._cooldown:
+            self._cooldown -= 1
+            return None
+        rates = [self.rates_dps(row) for row in window]
+        gyro = [[rate[axis] for rate in rates] for axis in range(3)]
+        energy = [sum(v * v for v in axis) / len(axis) for axis in gyro]
+        if math.sqrt(sum(energy)) < self.min_rms_dps:
+            return None
+        # Count sign changes on the dominant axis, ignoring small wobble
+        dominant = gyro[energy.index(max(energy))]
+        threshold = self.min_rms_dps / 2.0
+        reversals = 0
+        sign = 0
+        for value in dominant:
+            if abs(value) < threshold:
+                continue
+            current = 1 if value > 0 else -1
+            if sign and current != sign:
+                reversals += 1
+            sign = current
+        if reversals < self.min_reversals:
+            return None
+        self._cooldown = self.cooldown_windows
+        return "SHAKE"
+
+    @staticmethod
+    def rates_dps(row):
+        """Rotation rates of one ring record in deg/s; CURSOR frames have no roll"""
+        if row[1] == KIND_IMU:
+            return (row[5] / GYRO_LSB_PER_DPS, row[6] / GYRO_LSB_PER_DPS,
+                    row[7] / GYRO_LSB_PER_DPS)
+        return (row[2] / DEFAULT_CURSOR_GAIN, row[3] / DEFAULT_CURSOR_GAIN, 0.0)
+
+
+class WorkerSlot:
+    """One supervised recognizer and the process currently running it"""
+
+    def __init__(self, index, spec, options, backoff):
+        self.index = index
+        self.spec = spec
+        self.options = options
+        self.name = spec.rpartition(':')[2] or spec
+        self.process = None
+        self.heartbeat = None
+        self.started_at = None
+        self.restart_at = 0.0
+        self.backoff = backoff
+        self.restarts = 0
+        self.last_exit = None
+        self.last_error = None
+
+    def as_dict(self, now):
+        alive = self.process is not None and self.process.is_alive()
+        beat = self.heartbeat.value if self.heartbeat is not None else 0.0
+        return {
+            'name': self.name,
+            'spec': self.spec,
+            'pid': self.process.pid if alive else None,
+            'alive': alive,
+            'restarts': self.restarts,
+            'last_exit': self.last_exit,
+            'last_error': self.last_error,
+            'heartbeat_age_s': now - beat if alive and beat else None,
+            'restart_in_s': max(0.0, self.restart_at - now) if not alive else None,
+        }
+
+
+class RecognitionSupervisor:
+    def __init__(self, publish, config):
+        self.logger = logging.getLogger('AirMouse.Recognition')
+        self.publish = publish
+        self.config = dict(config)
+        self.ring = None
+        self.workers = []
+        self.running = False
+        self._context = None
+        self._events = None
+        self._worker_stop = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.metric_events = labeled(Counter, 'recognition_gestures_total',
+                                     'Gestures recognised by worker processes', ['gesture'],
+                                     allowed=frozenset(DEVICE_GESTURES))
+        self.metric_restarts = Counter('recognition_worker_restarts_total',
+                                       'Recognition workers restarted after exiting or hanging')
+        self.metric_dropped = Counter('recognition_samples_dropped_total',
+                                      'Ring samples overwritten before a worker read them')
+        self.metric_event_delay = Histogram('recognition_event_delay_seconds',
+                                            'Worker recognition to host publish')
+
+    def start(self):
+        """Create the sample ring and start one worker per recognizer"""
+        if self.running:
+            return True
+        if not HAS_SHARED_MEMORY:
+            self.logger.error("Recognition workers need Python 3.8+ (multiprocessing.shared_memory)")
+            return False
+        cfg = self.config
+        try:
+            self.ring = SampleRing.create(cfg['ring_capacity'])
+        except OSError as e:
+            self.logger.error(f"Could not allocate the recognition sample ring: {e}")
+            return False
+        self._context = multiprocessing.get_context(cfg['start_method'])
+        self._events = self._context.Queue()
+        self._worker_stop = self._context.Event()
+
+        self.workers = []
+        for index, entry in enumerate(cfg['recognizers']):
+            spec, options = (entry, {}) if isinstance(entry, str) else entry
+            self.workers.append(WorkerSlot(index, spec, options, cfg['backoff_initial']))
+        now = time.monotonic()
+        for slot in self.workers:
+            self._spawn(slot, now)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='RecognitionSupervisor',
+                                        daemon=True)
+        self._thread.start()
+        self.running = True
+        self.logger.info(f"Started {len(self.workers)} recognition workers on ring {self.ring.name}")
+        return True
+
+    def stop(self, timeout=2.0):
+        """Stop the workers and free the ring; detach any sample writer first"""
+        if not self.running:
+            return
+        self.running = False
+        # Stop supervising first so exiting workers are not restarted
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._worker_stop.set()
+        for slot in self.workers:
+            process = slot.process
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+            slot.process = None
+        self._events.close()
+        self._events.join_thread()
+        self.ring.close()
+        self.ring = None
+        self.logger.info("Recognition workers stopped")
+
+    def _spawn(self, slot, now):
+        slot.heartbeat = self._context.Value('d', 0.0, lock=False)
+        process = self._context.Process(
+            target=_worker_main, name=f"Recognition-{slot.name}",
+            args=(slot.index, slot.spec, slot.options, self.ring.name, self._events,
+                  slot.heartbeat, self._worker_stop, self.config),
+            daemon=True)
+        try:
+            process.start()
+        except OSError as e:
+            self.logger.error(f"Could not start recognition worker {slot.name}: {e}")
+            self._schedule_restart(slot, now)
+            return
+        slot.process = process
+        slot.started_at = now
+
+    def _run(self):
+        interval = self.config['supervise_interval']
+        next_check = time.monotonic() + interval
+        while not self._stop.is_set():
+            try:
+                event = self._events.get(timeout=interval)
+            except queue.Empty:
+                event = None
+            except (EOFError, OSError) as e:
+                self.logger.error(f"Recognition event queue failed: {e}")
+                break
+            if event is not None:
+                self._handle_event(*event)
+            now = time.monotonic()
+            if now >= next_check:
+                self._supervise(now)
+                next_check = now + interval
+
+    def _handle_event(self, kind, index, payload, sent):
+        slot = self.workers[index]
+        if kind == 'gesture':
+            self.metric_event_delay.observe(time.monotonic() - sent)
+            self.metric_events.labels(payload).inc()
+            self.logger.debug(f"Recognised gesture: {payload} ({slot.name})")
+            self.publish(payload)
+        elif kind == 'dropped':
+            self.metric_dropped.inc(payload)
+        elif kind == 'error':
+            slot.last_error = payload
+            self.logger.error(f"Recognition worker {slot.name} failed: {payload}")
+
+    def _supervise(self, now):
+        """Restart workers that exited or stopped sending heartbeats"""
+        cfg = self.config
+        for slot in self.workers:
+            process = slot.process
+            if process is None:
+                if now >= slot.restart_at:
+                    slot.restarts += 1
+                    self.metric_restarts.inc()
+                    self._spawn(slot, now)
+                continue
+
+            if not process.is_alive():
+                slot.last_exit = process.exitcode
+                self.logger.warning(f"Recognition worker {slot.name} exited with code "
+                                    f"{process.exitcode}; restarting in {slot.backoff:.1f} s")
+            else:
+                beat = slot.heartbeat.value
+                if beat:
+                    hung = now - beat > cfg['heartbeat_timeout']
+                else:
+                    hung = now - slot.started_at > cfg['startup_timeout']
+                if not hung:
+                    if now - slot.started_at > cfg['stable_after']:
+                        slot.backoff = cfg['backoff_initial']
+                    continue
+                # Terminating can break a queue the worker is writing to; a
+                # hung worker is unlikely to be in the middle of a put
+                self.logger.warning(f"Recognition worker {slot.name} stopped responding; "
+                                    f"restarting in {slot.backoff:.1f} s")
+                process.terminate()
+                process.join(1.0)
+                if process.is_alive():
+                    process.kill()
+                    process.join(1.0)
+                slot.last_exit = process.exitcode
+            slot.process = None
+            self._schedule_restart(slot, now)
+
+    def _schedule_restart(self, slot, now):
+        cfg = self.config
+        slot.restart_at = now + slot.backoff
+        slot.backoff = min(slot.backoff * 2.0, cfg['backoff_max'])
+
+    def get_stats(self):
+        now = time.monotonic()
+        return {
+            'running': self.running,
+            'ring': self.ring.name if self.ring else None,
+            'ring_capacity': self.config['ring_capacity'],
+            'samples_written': self.ring.written() if self.ring else 0,
+            'samples_dropped': self.metric_dropped.value,
+            'restarts': self.metric_restarts.value,
+            'workers': [slot.as_dict(now) for slot in self.workers],
+        }
+
+    def attach_metrics(self, registry):
+        """Export recognition counters through a MetricsRegistry"""
+        for metric in (self.metric_events, self.metric_restarts,
+                       self.metric_dropped, self.metric_event_delay):
+            registry.register(metric)
+        registry.function('recognition_workers_alive', 'Recognition worker processes running',
+                          lambda: sum(1 for s in self.workers
+                                      if s.process is not None and s.process.is_alive()))
+        registry.function('recognition_samples_written_total', 'Samples written to the ring',
+                          lambda: self.ring.written() if self.ring else 0, kind='counter')
@@ -0,0 +1,148 @@
+"""
+Tilt-to-scroll output.
+
+In scroll mode the vertical motion channel drives a scroll velocity
+instead of the cursor. Tilt inside the dead zone is ignored; past it the
+target velocity grows linearly up to ``max_velocity``. The actual velocity
+follows the target with a short response time and, once the tilt is
+released, coasts down with the ``inertia`` time constant. Fractional
+clicks are accumulated and at most one OS scroll event carrying every
+whole click is emitted per ``output_interval``, however fast samples
+arrive.
+
+Between start() and stop() an output thread calls tick() every
+``output_interval``, so coasting and leftover clicks keep going out on the
+host's own schedule when samples are slow or the device stops sending.
+"""
+
+import logging
+import math
+import threading
+import time
+
+
+class ScrollController:
+    def __init__(self, backend, config):
+        self.logger = logging.getLogger('AirMouse.Scroll')
+        self.backend = backend
+        self.config = dict(config)
+
+        self.velocity = 0.0      # clicks per second, positive scrolls down
+        self.pending = 0.0       # fractional clicks not yet emitted
+        self.target = 0.0        # velocity asked for by the last sample
+        self.last_sample = None
+        self.last_update = None
+        self.last_flush = None
+
+        self.events = 0
+        self.clicks = 0
+
+        # update() runs on the data thread, tick() on the output thread
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run tick() every output_interval on a background thread"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ScrollOutput', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.config['output_interval']):
+            self.tick()
+
+    def reset(self):
+        """Stop any coasting and drop fractional clicks"""
+        with self._lock:
+            self.velocity = 0.0
+            self.pending = 0.0
+            self.target = 0.0
+            self.last_sample = None
+            self.last_update = None
+            self.last_flush = None
+
+    def target_velocity(self, tilt):
+        cfg = self.config
+        excess = abs(tilt) - cfg['dead_zone']
+        if excess <= 0:
+            return 0.0
+        return math.copysign(min(excess * cfg['gain'], cfg['max_velocity']), tilt)
+
+    def update(self, tilt, now=None):
+        """Feed one vertical motion sample; emits a coalesced scroll when a tick is due"""
+        if now is None:
+            now = time.perf_counter()
+        with self._lock:
+            self.target = self.target_velocity(tilt)
+            if self.last_update is None:
+                self.last_sample = self.last_update = self.last_flush = now
+                return 0
+            self.last_sample = max(self.last_sample, now)
+            self._advance(self.target, now)
+            if now - self.last_flush >= self.config['output_interval']:
+                return self._flush(now)
+            return 0
+
+    def tick(self, now=None):
+        """Host-side output step: integrate up to `now` and flush due clicks
+
+        Between samples the last tilt holds; once none has arrived for
+        ``stall_timeout`` the tilt counts as released and the scroll coasts.
+        """
+        cfg = self.config
+        if now is None:
+            now = time.perf_counter()
+        with self._lock:
+            if self.last_update is None:
+                return 0
+            stalled = now - self.last_sample >= cfg['stall_timeout']
+            self._advance(0.0 if stalled else self.target, now)
+            if now - self.last_flush >= cfg['output_interval']:
+                return self._flush(now)
+            return 0
+
+    def flush(self, now=None):
+        """Emit every whole accumulated click as one scroll event"""
+        with self._lock:
+            return self._flush(now if now is not None else time.perf_counter())
+
+    def _advance(self, target, now):
+        cfg = self.config
+        dt = min(max(now - self.last_update, 0.0), cfg['max_dt'])
+        # Sample times may trail a tick slightly; never step back over coasted time
+        self.last_update = max(self.last_update, now)
+
+        # Follow the tilt quickly, coast slowly once it is released
+        tau = cfg['response'] if target != 0.0 else cfg['inertia']
+        self.velocity += (target - self.velocity) * (1.0 - math.exp(-dt / tau))
+        if target == 0.0 and abs(self.velocity) < cfg['stop_velocity']:
+            self.velocity = 0.0
+            self.pending = 0.0
+
+        self.pending += self.velocity * dt
+
+    def _flush(self, now):
+        self.last_flush = now
+        clicks = int(self.pending)  # toward zero, the remainder carries over
+        if not clicks:
+            return 0
+        self.pending -= clicks
+        try:
+            # Screen coordinates grow downward, OS scroll amounts grow upward
+            self.backend.scroll(-clicks)
+        except Exception as e:
+            self.logger.error(f"Scroll output error: {e}")
+            return 0
+        self.events += 1
+        self.clicks += abs(clicks)
+        return clicks
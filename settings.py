@@ -0,0 +1,171 @@
+"""
+Runtime tuning settings and named profiles.
+
+``Settings`` is an immutable snapshot of every value the hot path reads.
+``SettingsStore.update`` validates a change, builds a new snapshot and
+swaps it in with a single reference assignment, so the reader thread
+takes ``store.current`` once per sample and never sees a half-applied
+update or waits on a lock. Writers (GUI sliders, the control socket,
+profile loads) are serialised among themselves only.
+
+Named profiles persist as JSON and are read once at startup.
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+
+from config import CURSOR_CONFIG
+
+# name -> (type, minimum, maximum, default); out-of-range values are clamped
+SCHEMA = collections.OrderedDict([
+    ('cursor_speed', (float, 0.1, 50.0, CURSOR_CONFIG['cursor_speed'])),
+    ('smoothing', (float, 0.0, 0.95, CURSOR_CONFIG['smoothing'])),
+    ('dead_zone', (float, 0.0, 100.0, CURSOR_CONFIG['dead_zone'])),
+])
+
+
+class Settings(collections.namedtuple('Settings', list(SCHEMA))):
+    """Immutable, validated settings snapshot"""
+    __slots__ = ()
+
+    @classmethod
+    def defaults(cls):
+        return cls(*(spec[3] for spec in SCHEMA.values()))
+
+    @classmethod
+    def validated(cls, base=None, **values):
+        """Return a snapshot of `base` (defaults if None) with `values` applied"""
+        unknown = set(values) - set(SCHEMA)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        fields = (base or cls.defaults())._asdict()
+        for name, value in values.items():
+            kind, minimum, maximum, _ = SCHEMA[name]
+            try:
+                value = kind(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{name} must be {kind.__name__}, got {value!r}") from e
+            if value != value:  # NaN
+                raise ValueError(f"{name} must be a number")
+            fields[name] = max(minimum, min(maximum, value))
+        return cls(**fields)
+
+
+class SettingsStore:
+    def __init__(self, path=None, default_profile='default'):
+        self.logger = logging.getLogger('AirMouse.Settings')
+        self.path = path
+        self.default_profile = default_profile
+        self.current = Settings.defaults()
+        self.active_profile = default_profile
+        self.profiles = {default_profile: self.current}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def update(self, **values):
+        """Validate `values`, swap in the new snapshot and return it"""
+        with self._lock:
+            snapshot = Settings.validated(self.current, **values)
+            self.current = snapshot
+        self._notify(snapshot)
+        return snapshot
+
+    def add_listener(self, callback):
+        """Call `callback(snapshot)` after every change, on the writer's thread"""
+        self._listeners.append(callback)
+
+    def _notify(self, snapshot):
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.logger.error(f"Settings listener failed: {e}")
+
+    def profile_names(self):
+        return sorted(self.profiles)
+
+    def save_profile(self, name=None):
+        """Store the current values under `name` (the active profile by default)"""
+        name = name or self.active_profile
+        with self._lock:
+            self.profiles[name] = self.current
+            self.active_profile = name
+        self.save()
+        self.logger.info(f"Saved settings profile: {name}")
+
+    def load_profile(self, name):
+        """Make profile `name` the active one and apply its values"""
+        with self._lock:
+            if name not in self.profiles:
+                raise KeyError(f"Unknown settings profile: {name}")
+            snapshot = self.profiles[name]
+            self.current = snapshot
+            self.active_profile = name
+        self.save()
+        self._notify(snapshot)
+        self.logger.info(f"Loaded settings profile: {name}")
+        return snapshot
+
+    def delete_profile(self, name):
+        if name == self.default_profile:
+            raise ValueError("The default profile cannot be deleted")
+        with self._lock:
+            self.profiles.pop(name, None)
+            if self.active_profile == name:
+                self.active_profile = self.default_profile
+        self.save()
+
+    def load(self):
+        """Read profiles from disk and apply the active one; call once at startup"""
+        if not self.path or not os.path.exists(self.path):
+            return self.current
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to read settings from {self.path}: {e}")
+            return self.current
+        if not isinstance(data, dict) or not isinstance(data.get('profiles', {}), dict):
+            self.logger.error(f"Ignoring settings in {self.path}: not a profiles object")
+            return self.current
+
+        profiles = {}
+        for name, values in data.get('profiles', {}).items():
+            try:
+                # Drop fields from older or newer versions rather than the whole profile
+                known = {k: v for k, v in values.items() if k in SCHEMA}
+                profiles[name] = Settings.validated(**known)
+            except (AttributeError, ValueError) as e:
+                self.logger.error(f"Ignoring invalid settings profile {name}: {e}")
+        profiles.setdefault(self.default_profile, Settings.defaults())
+
+        active = data.get('active', self.default_profile)
+        if not isinstance(active, str) or active not in profiles:
+            active = self.default_profile
+        with self._lock:
+            self.profiles = profiles
+            self.active_profile = active
+            self.current = profiles[active]
+        self._notify(self.current)
+        self.logger.info(f"Loaded {len(profiles)} settings profiles, active: {active}")
+        return self.current
+
+    def save(self):
+        """Write every profile to disk atomically"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                'active': self.active_profile,
+                'profiles': {name: s._asdict() for name, s in self.profiles.items()},
+            }
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.error(f"Failed to write settings to {self.path}: {e}")
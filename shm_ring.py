@@ -0,0 +1,146 @@
+"""
+Shared-memory ring buffer of motion samples.
+
+One writer (the data thread, through ``MouseController``) appends fixed
+size records to a ``multiprocessing.shared_memory`` block; any number of
+reader processes attach to it by name and read new records straight out of
+the shared pages, so samples never pass through a pipe or get pickled.
+
+Each record is ``RECORD_FIELDS`` float64 values: the host sample time
+(``time.perf_counter`` seconds), the record kind and up to six values
+(``vx, vy`` for cursor frames, raw ``ax, ay, az, gx, gy, gz`` for IMU
+frames). The header holds a running count of records written; the writer
+fills a slot before publishing it by bumping the count. Readers keep their
+own position, skip ahead when the writer has lapped them and drop any rows
+that were overwritten while they were being copied.
+
+Needs Python 3.8+ for ``multiprocessing.shared_memory``; check
+``HAS_SHARED_MEMORY`` first.
+"""
+
+import struct
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+HAS_SHARED_MEMORY = shared_memory is not None
+
+KIND_CURSOR = 0.0
+KIND_IMU = 1.0
+
+VALUES = 6
+RECORD_FIELDS = 2 + VALUES
+RECORD = struct.Struct('<' + 'd' * RECORD_FIELDS)
+HEADER = struct.Struct('<QQQ')  # records written, capacity, record fields
+HEADER_SIZE = 64                # keeps the slots cache-line aligned
+COUNT = struct.Struct('<Q')
+
+_ZEROS = (0.0,) * VALUES
+
+
+class SampleRing:
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self.owner = owner
+        self.name = shm.name
+        written, self.capacity, fields = HEADER.unpack_from(self._buf, 0)
+        if fields != RECORD_FIELDS:
+            raise ValueError(f"Ring {self.name} has {fields} fields per record, "
+                             f"expected {RECORD_FIELDS}")
+        self._written = written
+
+    @classmethod
+    def create(cls, capacity):
+        """Allocate a new ring holding the last `capacity` samples"""
+        if not HAS_SHARED_MEMORY:
+            raise RuntimeError("multiprocessing.shared_memory needs Python 3.8 or newer")
+        shm = shared_memory.SharedMemory(create=True,
+                                         size=HEADER_SIZE + capacity * RECORD.size)
+        HEADER.pack_into(shm.buf, 0, 0, capacity, RECORD_FIELDS)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Open an existing ring by name, e.g. in a worker process"""
+        if not HAS_SHARED_MEMORY:
+            raise RuntimeError("multiprocessing.shared_memory needs Python 3.8 or newer")
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def write(self, t, kind, values):
+        """Append one sample; only one thread may write"""
+        if len(values) < VALUES:
+            values = tuple(values) + _ZEROS[len(values):]
+        index = self._written
+        RECORD.pack_into(self._buf, HEADER_SIZE + (index % self.capacity) * RECORD.size,
+                         t, kind, *values)
+        # Publish the slot only once it is complete
+        self._written = index + 1
+        COUNT.pack_into(self._buf, 0, self._written)
+
+    def written(self):
+        """Total records written since the ring was created"""
+        return COUNT.unpack_from(self._buf, 0)[0]
+
+    def read(self, position, limit=None):
+        """Records from `position` on; returns (new_position, rows, dropped)
+
+        Start a new reader at ``written()``. `dropped` counts records the
+        writer overwrote before this reader got to them.
+        """
+        written = self.written()
+        dropped = 0
+        oldest = written - self.capacity
+        if position < oldest:
+            dropped = oldest - position
+            position = oldest
+        stop = written if limit is None else min(written, position + limit)
+        rows = self._rows(position, stop)
+
+        # The writer may have reused slots while they were being copied
+        lapped = self.written() - self.capacity + 1 - position
+        if lapped > 0:
+            lapped = min(lapped, len(rows))
+            rows = rows[lapped:]
+            dropped += lapped
+        return stop, rows, dropped
+
+    def _rows(self, start, stop):
+        if stop <= start:
+            return []
+        first = start % self.capacity
+        count = stop - start
+        end = first + count
+        buf = self._buf
+        if end <= self.capacity:
+            return list(RECORD.iter_unpack(
+                buf[HEADER_SIZE + first * RECORD.size:HEADER_SIZE + end * RECORD.size]))
+        wrapped = end - self.capacity
+        return (list(RECORD.iter_unpack(buf[HEADER_SIZE + first * RECORD.size:
+                                            HEADER_SIZE + self.capacity * RECORD.size])) +
+                list(RECORD.iter_unpack(buf[HEADER_SIZE:HEADER_SIZE + wrapped * RECORD.size])))
+
+    def as_array(self):
+        """NumPy view of every slot, shape (capacity, RECORD_FIELDS), without copying
+
+        Row ``i % capacity`` holds record ``i``; the writer keeps
+        overwriting it, so copy the rows a computation needs first.
+        """
+        import numpy as np
+        return np.ndarray((self.capacity, RECORD_FIELDS), dtype='<f8',
+                          buffer=self._buf, offset=HEADER_SIZE)
+
+    def close(self):
+        """Detach; the creating side also frees the shared memory"""
+        if self._shm is None:
+            return
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
@@ -0,0 +1,259 @@
+"""
+Simulated ESP32 for development, benchmarks and soak tests.
+
+Speaks the same line protocol as esp32_code/src/main.cpp over TCP: it
+accepts mode, rate, ping and calibration commands and, in cursor mode,
+streams CURSOR frames at a configurable rate (IMU frames in raw mode); in
+gesture mode it emits GESTURE frames periodically. Frames carry a
+millis()-style timestamp from a device clock with a configurable offset
+and drift, so clock synchronisation can be exercised.
+
+    python simulator.py --port 8080 --rate 200
+"""
+
+import argparse
+import logging
+import math
+import random
+import socket
+import threading
+import time
+
+GESTURES = ["UP", "DOWN", "LEFT", "RIGHT", "CIRCLE", "SHAKE"]
+WRAP_MS = 2 ** 32
+
+# Same clamp as the firmware's RATE command
+MIN_RATE_HZ = 1
+MAX_RATE_HZ = 500
+
+
+class SimulatedDevice:
+    def __init__(self, host='127.0.0.1', port=0, rate_hz=50.0, gesture_interval=1.0,
+                 seed=42, sequence_velocity=False, record_send_times=False,
+                 timestamps=True, clock_offset_ms=1000000, clock_drift_ppm=0.0):
+        self.logger = logging.getLogger('AirMouse.Simulator')
+        self.host = host
+        self.port = port
+        self.rate_hz = rate_hz
+        self.gesture_interval = gesture_interval
+        self.random = random.Random(seed)
+        # Benchmarks put a frame sequence number in vx so latency can be matched
+        self.sequence_velocity = sequence_velocity
+        self.sent_times = {} if record_send_times else None
+        self.timestamps = timestamps
+        self.clock_offset_ms = clock_offset_ms
+        self.clock_drift_ppm = clock_drift_ppm
+        self._epoch = time.perf_counter()
+
+        self.mode = 'IDLE'
+        self.frames_sent = 0
+        self.commands_received = []
+        self.running = False
+        self._server = None
+        self._client = None
+        self._threads = []
+        self._send_lock = threading.Lock()
+        self._reschedule = False  # a RATE change takes effect with the next frame
+
+    def start(self):
+        """Listen on host:port and serve one client at a time"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(1)
+        self._server.settimeout(0.2)
+        self.port = self._server.getsockname()[1]
+        self.running = True
+        for target in (self._accept_loop, self._stream_loop):
+            thread = threading.Thread(target=target, name='Simulator', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"Simulated ESP32 listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        self.running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        for sock in (self._client, self._server):
+            if sock:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        self._client = None
+        self._server = None
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._client = client
+            self._command_loop(client)
+            self._client = None
+            self.mode = 'IDLE'
+
+    def _command_loop(self, client):
+        client.settimeout(0.2)
+        pending = b""
+        while self.running:
+            try:
+                data = client.recv(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not data:
+                break
+            pending += data
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                self.handle_command(line.decode('utf-8', errors='replace').strip())
+        try:
+            client.close()
+        except OSError:
+            pass
+
+    def device_millis(self, now=None):
+        """The simulated device's millis() at host perf_counter time `now`"""
+        if now is None:
+            now = time.perf_counter()
+        elapsed = (now - self._epoch) * (1.0 + self.clock_drift_ppm * 1e-6)
+        return int(elapsed * 1000.0 + self.clock_offset_ms) % WRAP_MS
+
+    def handle_command(self, command):
+        """Apply one host command, mirroring the firmware's replies"""
+        received_ms = self.device_millis()
+        self.commands_received.append(command)
+        if command.startswith("PING,"):
+            self.send_line(f"PONG,{command[5:]},{received_ms},{self.device_millis()}")
+        elif command == "CURSOR_MODE":
+            self.mode = 'CURSOR'
+            self.send_line("MODE_CURSOR")
+        elif command == "GESTURE_MODE":
+            self.mode = 'GESTURE'
+            self.send_line("MODE_GESTURE")
+        elif command == "RAW_MODE":
+            self.mode = 'RAW'
+            self.send_line("MODE_RAW")
+        elif command == "IDLE_MODE":
+            self.mode = 'IDLE'
+            self.send_line("MODE_IDLE")
+        elif command.startswith("RATE,"):
+            try:
+                hz = int(command.split(',')[1])
+            except ValueError:
+                return
+            self.rate_hz = max(MIN_RATE_HZ, min(MAX_RATE_HZ, hz))
+            self._reschedule = True
+            self.send_line(f"RATE_ACK,{int(self.rate_hz)}")
+        elif command == "CALIBRATE":
+            for progress in range(0, 100, 10):
+                self.send_line(f"CALIBRATION_PROGRESS,{progress}")
+            self.send_line("CALIBRATION_COMPLETE")
+        elif command == "INIT_CHECK":
+            self.send_line("INIT_COMPLETE")
+
+    def send_line(self, line):
+        self._send(line + "\n")
+
+    def _send(self, text):
+        client = self._client
+        if client is None:
+            return False
+        try:
+            with self._send_lock:
+                client.sendall(text.encode('utf-8'))
+            return True
+        except OSError:
+            return False
+
+    def _cursor_frame(self, seq, now):
+        if self.sequence_velocity:
+            return f"CURSOR,{seq},0.00"
+        phase = now * 2.0 * math.pi * 0.5
+        vx = 40.0 * math.sin(phase) + self.random.uniform(-2.0, 2.0)
+        vy = 25.0 * math.cos(phase) + self.random.uniform(-2.0, 2.0)
+        return f"CURSOR,{vx:.2f},{vy:.2f}"
+
+    def _imu_frame(self, now):
+        # Level device swinging about the vertical (yaw) and x (roll) axes
+        phase = now * 2.0 * math.pi * 0.5
+        gz = int(3000 * math.sin(phase)) + self.random.randint(-30, 30)
+        gx = int(2000 * math.cos(phase)) + self.random.randint(-30, 30)
+        gy = self.random.randint(-30, 30)
+        ax = self.random.randint(-150, 150)
+        ay = self.random.randint(-150, 150)
+        az = 16384 + self.random.randint(-150, 150)
+        return f"IMU,{ax},{ay},{az},{gx},{gy},{gz}"
+
+    def _stamp(self, frame, now):
+        if not self.timestamps:
+            return frame
+        return f"{frame},{self.device_millis(now)}"
+
+    def _stream_loop(self):
+        """Emit frames on a fixed schedule, catching up in batches if late"""
+        next_frame = time.perf_counter()
+        next_gesture = next_frame + self.gesture_interval
+        seq = 0
+        while self.running:
+            now = time.perf_counter()
+            if self._client is None or self.mode == 'IDLE':
+                next_frame = now
+                time.sleep(0.01)
+                continue
+
+            if self.mode == 'GESTURE':
+                next_frame = now  # no burst of stale cursor frames on the way back
+                if now >= next_gesture:
+                    self.send_line(self._stamp("GESTURE," + self.random.choice(GESTURES), now))
+                    self.frames_sent += 1
+                    next_gesture = now + self.gesture_interval
+                time.sleep(0.01)
+                continue
+
+            if self._reschedule:
+                self._reschedule = False
+                next_frame = min(next_frame, now)
+            interval = 1.0 / self.rate_hz
+            lines = []
+            while next_frame <= now:
+                if self.mode == 'RAW':
+                    lines.append(self._stamp(self._imu_frame(now), now))
+                else:
+                    lines.append(self._stamp(self._cursor_frame(seq, now), now))
+                if self.sent_times is not None and self.mode == 'CURSOR':
+                    self.sent_times[seq] = now
+                seq += 1
+                next_frame += interval
+            if lines and self._send("\n".join(lines) + "\n"):
+                self.frames_sent += len(lines)
+            time.sleep(max(0.0, min(next_frame - time.perf_counter(), 0.01)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated ESP32 air mouse")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--rate', type=float, default=50.0, help="cursor frames per second")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    device = SimulatedDevice(args.host, args.port, rate_hz=args.rate)
+    device.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        device.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import time
+from array import array
+
+
+class RingBuffer:
+    """Fixed-capacity ring of floats, preallocated once"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', [0.0] * capacity)
+        self.index = 0  # next slot to write
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self):
+        if not self.count:
+            return 0.0
+        return self.data[self.index - 1]
+
+    def ordered(self):
+        """Return the stored values oldest first"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return self.data[self.index:] + self.data[:self.index]
+
+    def min_max(self):
+        values = self.ordered()
+        if not values:
+            return 0.0, 0.0
+        return min(values), max(values)
+
+
+class TelemetrySampler:
+    """Samples pipeline counters into ring buffers once per display frame.
+
+    The device may stream at any rate; the counters are plain attributes
+    updated by the reader thread, and the sampler reads them once per
+    frame, so plotting cost depends only on the frame rate and ring size.
+    """
+
+    SERIES = (
+        'raw_vx', 'raw_vy', 'smooth_vx', 'smooth_vy',
+        'msg_rate', 'gesture_events', 'proc_time_ms', 'queue_depth',
+    )
+
+    def __init__(self, wifi_handler, mouse_controller, capacity=600):
+        self.wifi_handler = wifi_handler
+        self.mouse_controller = mouse_controller
+        self.series = {name: RingBuffer(capacity) for name in self.SERIES}
+        self._last_time = None
+        self._last_messages = 0
+        self._last_processed = 0
+        self._last_gestures = 0
+        self._last_proc_time = 0.0
+
+    def sample(self, now=None):
+        """Append one point to every series"""
+        if now is None:
+            now = time.monotonic()
+        wifi = self.wifi_handler
+        mouse = self.mouse_controller
+
+        messages = wifi.messages_received
+        processed = mouse.messages_processed
+        gestures = mouse.gesture_events
+        proc_time = mouse.processing_time_total
+
+        if self._last_time is None:
+            msg_rate = 0.0
+        else:
+            elapsed = now - self._last_time
+            msg_rate = (messages - self._last_messages) / elapsed if elapsed > 0 else 0.0
+        handled = processed - self._last_processed
+        proc_ms = (proc_time - self._last_proc_time) / handled * 1000.0 if handled else 0.0
+
+        s = self.series
+        s['raw_vx'].append(mouse.last_raw_vx)
+        s['raw_vy'].append(mouse.last_raw_vy)
+        s['smooth_vx'].append(mouse.current_vx)
+        s['smooth_vy'].append(mouse.current_vy)
+        s['msg_rate'].append(msg_rate)
+        s['gesture_events'].append(gestures - self._last_gestures)
+        s['proc_time_ms'].append(proc_ms)
+        s['queue_depth'].append(wifi.last_batch_lines)
+
+        self._last_time = now
+        self._last_messages = messages
+        self._last_processed = processed
+        self._last_gestures = gestures
+        self._last_proc_time = proc_time
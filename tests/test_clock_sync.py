@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from clock_sync import WRAP_MS, ClockSync
+from config import CLOCK_SYNC_CONFIG
+from metrics import Counter
+
+
+class FakeWiFi:
+    def __init__(self):
+        self.metric_connects = Counter('connects', 'test')
+        self.metric_connects.inc()
+        self.sent = []
+
+    def write(self, text):
+        self.sent.append(text.strip())
+        return True
+
+
+class DeviceClock:
+    """millis() of a device booted `offset` seconds before host time 0, running `ppm` fast"""
+
+    def __init__(self, offset=3.0, ppm=0.0, start_ms=0):
+        self.offset = offset
+        self.rate = 1.0 + ppm * 1e-6
+        self.start_ms = start_ms
+
+    def ms(self, host_time):
+        return int(self.start_ms + (host_time + self.offset) * self.rate * 1000.0) % WRAP_MS
+
+
+def exchange(sync, device, sent, delay=0.002, processing=0.0005):
+    """One PING/PONG with `delay` each way, as seen by the host"""
+    seq = len(sync._pending) + sync.pongs_received + 1
+    sync._pending[seq] = sent
+    recv_ms = device.ms(sent + delay)
+    send_ms = device.ms(sent + delay + processing)
+    return sync.on_pong(seq, recv_ms, send_ms, now=sent + 2 * delay + processing)
+
+
+def test_fit_recovers_offset_and_drift():
+    wifi = FakeWiFi()
+    sync = ClockSync(wifi, CLOCK_SYNC_CONFIG)
+    device = DeviceClock(offset=3.0, ppm=120.0)
+    rng = random.Random(7)
+    sync.observe_frame(device.ms(0.0), 0.0)
+    for i in range(60):
+        # Queueing delay only ever adds to the symmetric 2 ms path
+        assert exchange(sync, device, 1.0 + i * 0.5, delay=0.002 + rng.expovariate(500))
+
+    assert sync.synced
+    assert sync.drift_ppm() == pytest.approx(120.0, abs=25.0)
+    for host_time in (10.0, 30.0):
+        assert sync.offset(host_time) == pytest.approx(
+            device.ms(host_time) / 1000.0 - host_time, abs=0.002)
+    # A frame stamped at host time 25 s maps back to it
+    assert sync.to_host(device.ms(25.0) / 1000.0) == pytest.approx(25.0, abs=0.002)
+
+
+def test_implausible_drift_is_ignored():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    device = DeviceClock(ppm=5000.0)
+    sync.observe_frame(device.ms(0.0), 0.0)
+    for i in range(30):
+        exchange(sync, device, i * 0.5)
+    assert sync.drift_ppm() == 0.0
+
+
+def test_slow_and_unexpected_replies_are_discarded():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    device = DeviceClock()
+    assert not exchange(sync, device, 1.0, delay=0.15)
+    assert not sync.on_pong(999, 0, 0, now=1.0)
+    assert not sync.synced
+
+
+def test_millis_wrap_is_unwrapped():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    before = sync.device_seconds(WRAP_MS - 500)
+    after = sync.device_seconds(300)
+    assert after - before == pytest.approx(0.8)
+    # A straggler stamped before the wrap still maps before it
+    assert sync.device_seconds(WRAP_MS - 100) == pytest.approx(before + 0.4)
+    assert sync.device_seconds(400) == pytest.approx(after + 0.1)
+
+
+def test_frames_across_a_wrap_keep_host_spacing():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    device = DeviceClock(offset=0.0, start_ms=WRAP_MS - 1000)
+    times = [sync.observe_frame(device.ms(t), t + 0.003) for t in (0.0, 0.5, 1.0, 1.5)]
+    assert [b - a for a, b in zip(times, times[1:])] == pytest.approx([0.5] * 3, abs=0.002)
+
+
+def test_device_restart_resets_state():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    sync.observe_frame(500000, 0.0)
+    sync.observe_frame(1000, 1.0)
+    assert sync._wraps == 0
+    assert sync.get_stats()['exchanges'] == 0
+
+
+def test_jitter_follows_rfc3550():
+    sync = ClockSync(FakeWiFi(), CLOCK_SYNC_CONFIG)
+    # Constant transit: no jitter whatever the offset
+    for i in range(50):
+        sync.observe_frame(i * 20, 100.0 + i * 0.02 + 0.004)
+    assert sync.jitter == pytest.approx(0.0, abs=1e-9)
+
+    # Transit alternating by 2 ms converges to a 2 ms jitter
+    for i in range(50, 400):
+        extra = 0.002 if i % 2 else 0.0
+        sync.observe_frame(i * 20, 100.0 + i * 0.02 + 0.004 + extra)
+    assert sync.jitter == pytest.approx(0.002, rel=0.01)
+    assert sync.get_stats()['jitter_ms'] == pytest.approx(2.0, rel=0.01)
+
+
+def test_reconnect_resets_clock():
+    wifi = FakeWiFi()
+    sync = ClockSync(wifi, CLOCK_SYNC_CONFIG)
+    device = DeviceClock()
+    sync.observe_frame(device.ms(0.0), 0.0)
+    for i in range(10):
+        exchange(sync, device, i * 0.25)
+    assert sync.synced
+
+    wifi.metric_connects.inc()
+    # The new device's clock is unrelated to the old fit
+    new_device = DeviceClock(offset=50.0)
+    sample_time = sync.observe_frame(new_device.ms(5.0), 5.004)
+    assert not sync.synced
+    assert sample_time == pytest.approx(5.004)
+    assert sync.get_stats()['exchanges'] == 0
+
+
+def test_pings_wait_for_timestamps_and_back_off():
+    wifi = FakeWiFi()
+    sync = ClockSync(wifi, CLOCK_SYNC_CONFIG)
+    assert not sync.maybe_ping(0.0)
+    sync.observe_frame(0, 0.0)
+    assert sync.maybe_ping(0.0)
+    assert not sync.maybe_ping(0.1)
+    assert sync.maybe_ping(0.3)
+    assert wifi.sent == ['PING,1', 'PING,2']
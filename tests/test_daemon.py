@@ -0,0 +1,131 @@
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+import daemon
+from daemon import AirMouseDaemon, ControlServer
+
+
+@pytest.fixture
+def air_mouse():
+    instance = AirMouseDaemon(dry_run=True, settings_path=None)
+    yield instance
+    instance.gesture_handler.shutdown()
+
+
+def test_wrong_argument_count_is_reported(air_mouse):
+    reply = air_mouse.handle_command("speed")
+    assert reply == {'ok': False, 'error': "bad arguments for speed"}
+    assert air_mouse.handle_command("status extra")['ok'] is False
+
+
+def test_type_error_inside_a_handler_is_not_hidden(air_mouse):
+    def broken():
+        return None + 1
+    air_mouse.commands['broken'] = broken
+    reply = air_mouse.handle_command("broken")
+    assert reply['ok'] is False
+    assert 'bad arguments' not in reply['error']
+    assert 'unsupported operand' in reply['error']
+
+
+def test_unknown_and_empty_commands(air_mouse):
+    assert air_mouse.handle_command("")['error'] == 'empty command'
+    assert air_mouse.handle_command("bogus")['error'] == 'unknown command: bogus'
+
+
+def test_recognition_flag_can_be_turned_off(monkeypatch):
+    seen = {}
+
+    class FakeDaemon:
+        def __init__(self, dry_run=False):
+            pass
+
+        def start_recognition(self):
+            seen['started'] = True
+
+        def request_stop(self, *args):
+            pass
+
+        def run(self, *args):
+            seen['ran'] = True
+
+    monkeypatch.setattr(daemon, 'AirMouseDaemon', FakeDaemon)
+    monkeypatch.setattr(daemon, 'setup_logging', lambda: None)
+    monkeypatch.setattr(daemon.signal, 'signal', lambda *args: None)
+    monkeypatch.setitem(daemon.METRICS_CONFIG, 'enabled', False)
+    assert daemon.main(['run', '--no-recognition']) == 0
+    assert seen == {'ran': True}
+    assert daemon.main(['run', '--recognition']) == 0
+    assert seen == {'ran': True, 'started': True}
+
+
+@pytest.mark.skipif(not hasattr(os, 'umask') or os.name != 'posix', reason="Unix sockets")
+def test_control_socket_is_owner_only(tmp_path, air_mouse):
+    path = str(tmp_path / 'ctl.sock')
+    server = ControlServer(path, air_mouse)
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+    finally:
+        server.server_close()
+
+
+def serve_once(path, reply):
+    """Accept one connection on `path`, send `reply` and hang up"""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            conn.recv(4096)
+            conn.sendall(reply)
+        listener.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix sockets")
+@pytest.mark.parametrize('reply, message', [
+    (b'', "without a reply"),
+    (b'{"ok": tr', "in the middle of a reply"),
+])
+def test_client_reports_a_missing_reply(tmp_path, reply, message):
+    path = str(tmp_path / 'ctl.sock')
+    thread = serve_once(path, reply)
+    with pytest.raises(ConnectionError, match=message):
+        daemon.send_command(path, "status")
+    thread.join(5.0)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix sockets")
+def test_second_daemon_does_not_take_over_a_live_socket(tmp_path, air_mouse):
+    path = str(tmp_path / 'ctl.sock')
+    server = ControlServer(path, air_mouse)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(OSError, match="already listening"):
+            ControlServer(path, air_mouse)
+        assert daemon.main(['--socket', path, 'run']) == 1
+        # The first daemon still answers
+        assert daemon.send_command(path, "status")['ok'] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix sockets")
+def test_stale_socket_file_is_replaced(tmp_path, air_mouse):
+    path = str(tmp_path / 'ctl.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()  # the file stays, nobody listens
+    server = ControlServer(path, air_mouse)
+    server.server_close()
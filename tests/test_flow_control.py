@@ -0,0 +1,163 @@
+import pytest
+
+from config import FLOW_CONTROL_CONFIG
+from flow_control import AdaptiveRateController
+from metrics import Counter
+
+
+class FakeWiFi:
+    def __init__(self):
+        self.metric_connects = Counter('connects', 'test')
+        self.metric_connects.inc()
+        self.sent = []
+        self.connected = True
+
+    def write(self, text):
+        if not self.connected:
+            return False
+        self.sent.append(text.strip())
+        return True
+
+
+def make_controller(**overrides):
+    wifi = FakeWiFi()
+    return wifi, AdaptiveRateController(wifi, dict(FLOW_CONTROL_CONFIG, **overrides))
+
+
+def feed(controller, frames, velocity, start, dt=0.02, **kwargs):
+    now = start
+    for _ in range(frames):
+        controller.observe(velocity, 0.0, now=now, **kwargs)
+        now += dt
+    return now
+
+
+def test_motion_raises_rate_and_stillness_drops_to_idle():
+    wifi, controller = make_controller()
+    now = feed(controller, 5, 20.0, 0.0)
+    assert controller.level == controller.ACTIVE
+    assert wifi.sent == ['RATE,100']
+
+    # The motion EMA decays through the release threshold, then idle_after passes
+    now = feed(controller, 100, 0.0, now)
+    assert controller.level == controller.IDLE
+    assert wifi.sent[-1] == 'RATE,10'
+    assert controller.rate == 10
+
+
+def test_hysteresis_keeps_active_rate_while_motion_lingers():
+    wifi, controller = make_controller()
+    now = feed(controller, 10, 20.0, 0.0)
+    # Between the release and active thresholds the level holds
+    now = feed(controller, 20, 7.0, now)
+    assert controller.level == controller.ACTIVE
+    assert wifi.sent == ['RATE,100']
+
+
+def test_backlog_halves_the_rate():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    now = feed(controller, 5, 20.0, 0.0)
+    controller.observe(20.0, 0.0, backlog=FLOW_CONTROL_CONFIG['backlog_lines'] + 1, now=now)
+    assert wifi.sent[-1] == 'RATE,50'
+    assert controller.overloads == 1
+
+
+def test_processing_time_over_duty_counts_as_overload():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    now = feed(controller, 5, 20.0, 0.0)
+    # 6 ms per frame is 60 % of a 10 ms interval at 100 Hz
+    controller.observe(20.0, 0.0, process_seconds=0.006, now=now)
+    assert controller.overloads == 1
+    assert controller.rate == 50
+
+
+def test_overload_never_goes_below_min_rate():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    now = 0.0
+    for _ in range(10):
+        controller.observe(0.0, 0.0, backlog=100, now=now)
+        now += 0.02
+    assert controller.rate == FLOW_CONTROL_CONFIG['min_hz']
+
+
+def test_rate_commands_are_rate_limited():
+    wifi, controller = make_controller(min_command_interval=0.25)
+    controller.observe(20.0, 0.0, now=0.0)
+    # Overload right away wants 50 Hz but the last command was just sent
+    controller.observe(20.0, 0.0, backlog=100, now=0.1)
+    assert wifi.sent == ['RATE,100']
+    controller.observe(20.0, 0.0, backlog=100, now=0.3)
+    assert wifi.sent == ['RATE,100', 'RATE,50']
+
+
+def test_reconnect_resets_negotiated_rate():
+    wifi, controller = make_controller()
+    feed(controller, 5, 20.0, 0.0)
+    controller.on_ack(100)
+    assert controller.device_rate == 100
+
+    wifi.metric_connects.inc()
+    controller.observe(0.0, 0.0, now=10.0)
+    # A fresh connection forgets the old rate and the command rate limit
+    assert controller.device_rate is None
+    assert controller.level == controller.BASE
+    assert wifi.sent[-1] == 'RATE,50'
+
+
+def test_failed_write_is_retried():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    wifi.connected = False
+    controller.observe(20.0, 0.0, now=0.0)
+    assert controller.rate is None
+    wifi.connected = True
+    controller.observe(20.0, 0.0, now=0.02)
+    assert wifi.sent == ['RATE,100']
+
+
+def test_fixed_rate_is_clamped_and_sent_once():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    now = feed(controller, 20, 0.0, 0.0)
+    controller.set_fixed_rate(500)
+    assert wifi.sent[-1] == 'RATE,200'  # clamped to max_hz
+    sent = len(wifi.sent)
+    feed(controller, 20, 0.0, now)
+    assert len(wifi.sent) == sent
+
+    controller.set_fixed_rate(None)
+    assert controller.fixed_rate is None
+
+
+def test_quantised_ack_is_not_chased():
+    wifi, controller = make_controller(min_command_interval=0.25)
+    now = feed(controller, 1, 0.0, 0.0)
+    controller.set_fixed_rate(150)
+    # 150 Hz is not a whole number of milliseconds per frame
+    controller.on_ack(166)
+    feed(controller, 200, 20.0, now)  # four seconds of command intervals
+    assert wifi.sent[-1] == 'RATE,150'
+    assert wifi.sent.count('RATE,150') == 1
+    stats = controller.get_stats()
+    assert (stats['requested_hz'], stats['device_hz']) == (150, 166)
+
+
+def test_overload_halves_the_requested_rate_not_the_ack():
+    wifi, controller = make_controller(min_command_interval=0.0)
+    now = feed(controller, 5, 20.0, 0.0)
+    controller.on_ack(111)
+    controller.observe(20.0, 0.0, backlog=100, now=now)
+    assert wifi.sent == ['RATE,100', 'RATE,50']
+
+
+def test_disabled_controller_sends_nothing():
+    wifi, controller = make_controller(enabled=False)
+    feed(controller, 50, 30.0, 0.0, backlog=100)
+    assert wifi.sent == []
+    assert controller.get_stats()['enabled'] is False
+
+
+@pytest.mark.parametrize('velocity', [0.0, 1.0])
+def test_stillness_below_idle_after_stays_at_base(velocity):
+    wifi, controller = make_controller()
+    feed(controller, 10, velocity, 0.0)  # 0.2 s
+    assert controller.level == controller.BASE
+    assert wifi.sent == ['RATE,50']
@@ -0,0 +1,121 @@
+import math
+
+import pytest
+
+from fusion import (ACCEL_LSB_PER_G, DEFAULT_CURSOR_GAIN, GYRO_LSB_PER_DPS, MadgwickFilter,
+                    MahonyFilter, OrientationTracker, fuse_batch, quaternion_to_euler)
+from mouse_controller import MouseController, NullBackend
+
+
+def tilted_gravity(roll_degrees):
+    roll = math.radians(roll_degrees)
+    return 0.0, math.sin(roll), math.cos(roll)
+
+
+@pytest.mark.parametrize('fusion_filter', [MadgwickFilter(beta=0.5), MahonyFilter(kp=5.0)])
+def test_filters_converge_to_static_tilt(fusion_filter):
+    ax, ay, az = tilted_gravity(30.0)
+    for _ in range(2000):
+        q = fusion_filter.update(0.0, 0.0, 0.0, ax, ay, az, 0.01)
+    roll, pitch, _ = quaternion_to_euler(q)
+    assert roll == pytest.approx(30.0, abs=0.5)
+    assert pitch == pytest.approx(0.0, abs=0.5)
+    assert sum(c * c for c in q) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize('fusion_filter', [MadgwickFilter(beta=0.0), MahonyFilter(kp=0.0)])
+def test_gyro_integration_without_correction(fusion_filter):
+    # 90 deg/s about z for one second
+    rate = math.radians(90.0)
+    for _ in range(100):
+        q = fusion_filter.update(0.0, 0.0, rate, 0.0, 0.0, 1.0, 0.01)
+    assert quaternion_to_euler(q)[2] == pytest.approx(90.0, abs=0.5)
+
+
+@pytest.mark.parametrize('dt', [0.005, 0.01, 0.02])
+def test_cursor_velocity_is_a_rate_independent_of_sample_interval(dt):
+    tracker = OrientationTracker(beta=0.0)
+    yaw_rate_dps = 40.0
+    gz = yaw_rate_dps * GYRO_LSB_PER_DPS
+    for _ in range(int(0.5 / dt)):
+        vx, vy = tracker.update_raw(0, 0, ACCEL_LSB_PER_G, 0, 0, gz, dt)
+    # The firmware would send -gz * 0.02 for the same motion
+    assert vx == pytest.approx(-yaw_rate_dps * DEFAULT_CURSOR_GAIN, rel=1e-3)
+    assert vy == pytest.approx(0.0, abs=1e-6)
+
+
+def recorded_motion(steps, streams, seed=3):
+    np = pytest.importorskip('numpy')
+    rng = np.random.default_rng(seed)
+    t = np.arange(steps) * 0.01
+    gyro = np.empty((steps, streams, 3))
+    accel = np.empty((steps, streams, 3))
+    for i in range(streams):
+        gyro[:, i, 0] = 2000 * np.cos(t * (3 + i)) + rng.normal(0, 30, steps)
+        gyro[:, i, 1] = rng.normal(0, 30, steps)
+        gyro[:, i, 2] = 3000 * np.sin(t * (2 + i)) + rng.normal(0, 30, steps)
+        accel[:, i, :] = rng.normal(0, 150, (steps, 3))
+        accel[:, i, 2] += ACCEL_LSB_PER_G
+    return accel, gyro
+
+
+@pytest.mark.parametrize('algorithm', ['madgwick', 'mahony'])
+def test_batch_single_stream_matches_streaming_tracker(algorithm):
+    np = pytest.importorskip('numpy')
+    accel, gyro = recorded_motion(400, 1)
+    accel, gyro = accel[:, 0], gyro[:, 0]
+    dt = np.full(len(accel), 0.01)
+    dt[::7] = 0.013  # uneven intervals
+
+    batch = fuse_batch(accel, gyro, dt, algorithm=algorithm)
+    tracker = OrientationTracker(algorithm=algorithm)
+    quats, velocities = [], []
+    for (ax, ay, az), (gx, gy, gz), step in zip(accel, gyro, dt):
+        velocities.append(tracker.update_raw(ax, ay, az, gx, gy, gz, step))
+        quats.append(tracker.quaternion)
+
+    np.testing.assert_allclose(batch['quaternion'], quats, atol=1e-9)
+    np.testing.assert_allclose(batch['velocity'], velocities, atol=1e-6)
+
+
+def test_vectorized_streams_match_scalar_filter():
+    np = pytest.importorskip('numpy')
+    accel, gyro = recorded_motion(300, 4)
+    batch = fuse_batch(accel, gyro, 0.01, algorithm='madgwick')
+    assert batch['quaternion'].shape == (300, 4, 4)
+    for stream in range(4):
+        single = fuse_batch(accel[:, stream], gyro[:, stream], 0.01, algorithm='madgwick')
+        np.testing.assert_allclose(batch['quaternion'][:, stream], single['quaternion'],
+                                   atol=1e-9)
+        np.testing.assert_allclose(batch['velocity'][:, stream], single['velocity'],
+                                   atol=1e-6)
+
+
+def cursor_travel(rate_hz, seconds=1.0):
+    controller = MouseController(backend=NullBackend())
+    controller.flow_control.enabled = False
+    start_x = controller.backend.x
+    dt = 1.0 / rate_hz
+    for i in range(int(seconds * rate_hz)):
+        controller.last_sample_time = i * dt
+        controller.move_cursor(4.0, 0.0)
+    return controller.backend.x - start_x
+
+
+@pytest.mark.parametrize('rate_hz', [25, 100, 200])
+def test_cursor_travel_does_not_depend_on_stream_rate(rate_hz):
+    # The firmware's 50 Hz stream is the reference feel
+    reference = cursor_travel(50)
+    assert reference > 500
+    assert cursor_travel(rate_hz) == pytest.approx(reference, rel=0.03)
+
+
+def test_slow_motion_accumulates_below_one_pixel_per_frame():
+    controller = MouseController(backend=NullBackend())
+    controller.flow_control.enabled = False
+    controller.settings.update(cursor_speed=1.0, smoothing=0.0, dead_zone=0.0)
+    start_x = controller.backend.x
+    for i in range(200):  # 0.25 px per frame at 200 Hz
+        controller.last_sample_time = i * 0.005
+        controller.move_cursor(1.0, 0.0)
+    assert controller.backend.x - start_x == pytest.approx(50, abs=2)
@@ -0,0 +1,93 @@
+import threading
+
+from config import SCROLL_CONFIG
+from gesture_handler import GestureHandler
+from mouse_controller import MouseController, NullBackend
+
+
+class RecordingBackend(NullBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def press(self, key):
+        self.calls.append(('press', key, threading.current_thread().name))
+
+    def hotkey(self, *keys):
+        self.calls.append(('hotkey', keys, threading.current_thread().name))
+
+    def move_rel(self, dx, dy):
+        self.calls.append(('move_rel', (dx, dy), threading.current_thread().name))
+
+
+def make_pipeline():
+    backend = RecordingBackend()
+    controller = MouseController(backend=backend)
+    handler = GestureHandler()
+    controller.set_gesture_callback(handler.process_data)
+    controller.register_default_actions(handler)
+    return controller, handler, backend
+
+
+def test_gesture_frame_fires_one_action_off_the_reader_thread():
+    controller, handler, backend = make_pipeline()
+    for gesture in ("CIRCLE", "LEFT", "UP"):
+        controller.process_data(f"GESTURE,{gesture}")
+    handler.shutdown(wait=True)
+
+    # One mapped action per gesture, nothing inline
+    assert sorted(call[:2] for call in backend.calls) == [
+        ('hotkey', ('alt', 'tab')), ('press', 'f5'), ('press', 'left')]
+    reader = threading.current_thread().name
+    assert all(call[2] != reader for call in backend.calls)
+
+
+def test_toggle_gesture_only_switches_output_mode(monkeypatch):
+    monkeypatch.setitem(SCROLL_CONFIG, 'toggle_gesture', 'DOWN')
+    controller, handler, backend = make_pipeline()
+    controller.process_data("GESTURE,DOWN")
+    handler.shutdown(wait=True)
+    controller.scroll.stop()
+
+    # DOWN's key action gives way to the toggle
+    assert controller.output_mode == "scroll"
+    assert backend.calls == []
+
+
+def test_toggle_gesture_is_opt_in():
+    assert SCROLL_CONFIG['toggle_gesture'] is None
+    controller, handler, backend = make_pipeline()
+    controller.process_data("GESTURE,SHAKE")
+    handler.shutdown(wait=True)
+    assert controller.output_mode == "cursor"
+    assert [call[:2] for call in backend.calls] == [('press', 'esc')]
+
+
+def test_repeated_gesture_within_cooldown_is_dropped():
+    controller, handler, backend = make_pipeline()
+    controller.process_data("GESTURE,UP")
+    controller.process_data("GESTURE,UP")
+    handler.shutdown(wait=True)
+    assert len(backend.calls) == 1
+
+
+def test_async_handler_stats_are_consistent_across_workers():
+    handler = GestureHandler(max_workers=4)
+    handler.subscribe("TICK", lambda gesture: None, asynchronous=True, name='tick')
+    for _ in range(500):
+        handler.publish("TICK")
+    handler.shutdown(wait=True)
+
+    stats = handler.get_handler_stats()[0]
+    assert stats['calls'] == 500
+    assert handler.metric_handler_seconds.labels('tick').count == 500
+
+
+def test_wildcard_and_priority_order():
+    handler = GestureHandler()
+    seen = []
+    handler.subscribe("*", lambda g: seen.append(('any', g)), priority=0)
+    handler.subscribe("UP", lambda g: seen.append(('up', g)), priority=10)
+    assert handler.publish("UP") == 2
+    assert seen == [('up', 'UP'), ('any', 'UP')]
+    assert handler.publish("NOPE") == 1
@@ -0,0 +1,98 @@
+import logging
+import queue
+
+import pytest
+
+import logging_setup
+from logging_setup import EnqueueOnlyHandler, RateLimitFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(logging_setup.time, 'monotonic', clock)
+    return clock
+
+
+def record(name, level=logging.DEBUG, msg='message'):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def passed(log_filter, name, count, level=logging.DEBUG):
+    return sum(bool(log_filter.filter(record(name, level))) for _ in range(count))
+
+
+def test_token_bucket_allows_burst_then_rate(clock):
+    log_filter = RateLimitFilter({'AirMouse.Controller': {'rate': 10, 'burst': 5}})
+    assert passed(log_filter, 'AirMouse.Controller', 20) == 5
+    assert log_filter.suppressed == {'AirMouse.Controller': 15}
+
+    clock.now += 0.35  # 3.5 tokens refilled
+    assert passed(log_filter, 'AirMouse.Controller', 10) == 3
+    clock.now += 60.0  # refill stops at the burst size
+    assert passed(log_filter, 'AirMouse.Controller', 10) == 5
+
+
+def test_sampling_keeps_one_in_n(clock):
+    log_filter = RateLimitFilter({'GestureHandler': {'sample': 4}})
+    kept = [log_filter.filter(record('GestureHandler')) for _ in range(10)]
+    assert kept == [True, False, False, False, True, False, False, False, True, False]
+    assert log_filter.suppressed == {'GestureHandler': 7}
+
+
+def test_warnings_and_above_are_never_limited(clock):
+    log_filter = RateLimitFilter({'AirMouse.WiFi': {'rate': 1, 'burst': 1}})
+    assert passed(log_filter, 'AirMouse.WiFi', 5, logging.WARNING) == 5
+    assert passed(log_filter, 'AirMouse.WiFi', 5, logging.ERROR) == 5
+    # Exempt records do not spend tokens
+    assert passed(log_filter, 'AirMouse.WiFi', 5) == 1
+    assert log_filter.suppressed == {'AirMouse.WiFi': 4}
+
+
+def test_children_share_the_nearest_configured_parent(clock):
+    log_filter = RateLimitFilter({
+        'AirMouse': {'rate': 1, 'burst': 2},
+        'AirMouse.WiFi': {'sample': 2},
+    })
+    # AirMouse.Controller and AirMouse.Scroll draw from the AirMouse bucket
+    assert passed(log_filter, 'AirMouse.Controller', 3) == 2
+    assert passed(log_filter, 'AirMouse.Scroll', 3) == 0
+    # A closer parent wins
+    assert passed(log_filter, 'AirMouse.WiFi.Reader', 4) == 2
+    assert log_filter.suppressed == {'AirMouse': 4, 'AirMouse.WiFi': 2}
+
+
+def test_unconfigured_loggers_pass(clock):
+    log_filter = RateLimitFilter({'AirMouse': {'sample': 100}})
+    assert passed(log_filter, 'AirMouseTools', 5) == 5
+    assert passed(log_filter, 'root', 5) == 5
+    assert log_filter.suppressed == {}
+
+
+def test_full_queue_drops_and_counts_without_blocking():
+    handler = EnqueueOnlyHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(record('AirMouse.Controller', msg=f'message {i}'))
+    assert handler.dropped == 3
+    assert handler.queue.qsize() == 2
+    # Records cross unformatted, as they were logged
+    first = handler.queue.get_nowait()
+    assert first.msg == 'message 0'
+    assert first.args is None
+
+
+def test_filter_on_handler_suppresses_before_the_queue(clock):
+    handler = EnqueueOnlyHandler(queue.Queue(maxsize=100))
+    handler.addFilter(RateLimitFilter({'AirMouse': {'sample': 10}}))
+    for _ in range(30):
+        handler.handle(record('AirMouse.Controller'))
+    assert handler.queue.qsize() == 3
+    assert handler.dropped == 0
@@ -0,0 +1,58 @@
+import json
+
+from gesture_handler import GestureHandler
+from metrics import Counter, Histogram, MetricsRegistry, labeled
+
+
+def failing():
+    raise RuntimeError("gone")
+
+
+def test_failed_collector_gives_valid_json_and_no_prometheus_sample():
+    registry = MetricsRegistry()
+    registry.function('broken', 'Raises on collect', failing)
+    registry.counter('ok_total', 'Fine').inc(3)
+
+    snapshot = registry.snapshot()
+    text = json.dumps(snapshot, allow_nan=False)
+    assert json.loads(text)['metrics'] == {'wavesense_broken': None, 'wavesense_ok_total': 3}
+
+    lines = registry.render_prometheus().splitlines()
+    assert 'wavesense_ok_total 3' in lines
+    assert not any(line.startswith('wavesense_broken') for line in lines)
+
+
+def test_histogram_rendering():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = registry.render_prometheus().splitlines()
+    assert 'wavesense_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'wavesense_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'wavesense_latency_seconds_count 3' in lines
+
+
+def test_unknown_label_values_fold_into_other():
+    family = labeled(Counter, 'gestures_total', 'By gesture', ['gesture'],
+                     allowed=frozenset(['UP']))
+    family.labels('UP').inc()
+    for index in range(100):
+        family.labels(f"JUNK{index}").inc()
+    assert family.collect() == {('UP',): 1, ('other',): 100}
+
+
+def test_bus_labels_cover_device_and_subscribed_gestures_only():
+    handler = GestureHandler()
+    handler.subscribe("CUSTOM", lambda g: None)
+    handler.subscribe("*", lambda g: None)
+    for gesture in ("UP", "CUSTOM", "\x00garbage", "ANOTHER"):
+        handler.publish(gesture)
+    assert handler.metric_published.collect() == {('UP',): 1, ('CUSTOM',): 1, ('other',): 2}
+
+
+def test_labeled_histogram_children_are_independent():
+    family = labeled(Histogram, 'handler_seconds', 'By handler', ['handler'])
+    family.labels('a').observe(0.001)
+    assert family.labels('a').count == 1
+    assert family.labels('b').count == 0
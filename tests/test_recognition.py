@@ -0,0 +1,85 @@
+import math
+import threading
+import time
+
+import pytest
+
+from config import RECOGNITION_CONFIG, SCROLL_CONFIG
+from fusion import DEFAULT_CURSOR_GAIN, GYRO_LSB_PER_DPS
+from gesture_handler import GestureHandler
+from mouse_controller import MouseController, NullBackend
+from recognition import RecognitionSupervisor, ShakeRecognizer, WorkerSlot
+from shm_ring import KIND_CURSOR, KIND_IMU
+
+
+def shake_rows(kind, seconds=2.0, rate_hz=100, amplitude_dps=400.0, frequency=4.0):
+    rows = []
+    for i in range(int(seconds * rate_hz)):
+        t = i / rate_hz
+        dps = amplitude_dps * math.sin(2 * math.pi * frequency * t)
+        if kind == KIND_IMU:
+            rows.append((t, KIND_IMU, 0.0, 0.0, 16384.0, 0.0, 0.0, dps * GYRO_LSB_PER_DPS))
+        else:
+            # The firmware sends the negated yaw rate times its speed factor
+            rows.append((t, KIND_CURSOR, -dps * DEFAULT_CURSOR_GAIN, 0.0, 0.0, 0.0, 0.0, 0.0))
+    return rows
+
+
+def still_rows(kind, seconds=2.0, rate_hz=100):
+    return [(i / rate_hz, kind, 0.5, -0.5, 0.0, 0.0, 0.0, 0.0)
+            for i in range(int(seconds * rate_hz))]
+
+
+def test_shake_is_recognised_from_imu_frames():
+    assert "SHAKE" in ShakeRecognizer().feed(shake_rows(KIND_IMU))
+
+
+def test_shake_is_recognised_from_cursor_frames():
+    assert "SHAKE" in ShakeRecognizer().feed(shake_rows(KIND_CURSOR))
+
+
+def test_cursor_and_imu_rates_agree():
+    imu, cursor = shake_rows(KIND_IMU)[7], shake_rows(KIND_CURSOR)[7]
+    assert abs(ShakeRecognizer.rates_dps(imu)[2]) == pytest.approx(
+        abs(ShakeRecognizer.rates_dps(cursor)[0]))
+
+
+def test_steady_motion_is_not_a_shake():
+    recognizer = ShakeRecognizer()
+    assert recognizer.feed(still_rows(KIND_CURSOR)) == []
+    assert recognizer.feed(still_rows(KIND_IMU)) == []
+
+
+def test_cooldown_limits_repeats():
+    recognizer = ShakeRecognizer(cooldown_windows=2)
+    gestures = recognizer.feed(shake_rows(KIND_IMU, seconds=4.0))
+    # Windows every 50 samples over 400 samples; every third one may fire
+    assert 1 <= len(gestures) <= 3
+
+
+def test_recognised_gestures_are_dispatched_on_the_reader_thread(monkeypatch):
+    monkeypatch.setitem(SCROLL_CONFIG, 'toggle_gesture', 'SHAKE')
+    controller = MouseController(backend=NullBackend())
+    handler = GestureHandler()
+    controller.set_gesture_callback(handler.process_data)
+    controller.register_default_actions(handler)
+    threads = []
+    controller.set_output_mode_callback(
+        lambda mode: threads.append(threading.current_thread().name))
+
+    supervisor = RecognitionSupervisor(controller.submit_gesture, RECOGNITION_CONFIG)
+    supervisor.workers = [WorkerSlot(0, 'recognition:ShakeRecognizer', {}, 0.5)]
+    worker = threading.Thread(target=lambda: [
+        supervisor._handle_event('gesture', 0, 'SHAKE', time.monotonic()) for _ in range(2)],
+        name='RecognitionSupervisor')
+    worker.start()
+    worker.join()
+    # Nothing changes until the reader thread handles its next message
+    assert controller.output_mode == "cursor"
+
+    controller.process_data("INIT_COMPLETE")
+    handler.shutdown(wait=True)
+    controller.scroll.stop()
+    # The repeat fell inside the gesture cooldown
+    assert controller.output_mode == "scroll"
+    assert threads == [threading.current_thread().name]
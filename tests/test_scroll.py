@@ -0,0 +1,116 @@
+import pytest
+
+from config import SCROLL_CONFIG
+from mouse_controller import MouseController, NullBackend
+from scroll import ScrollController
+
+TICK = SCROLL_CONFIG['output_interval']
+
+
+def tilt_for(clicks_per_second):
+    return SCROLL_CONFIG['dead_zone'] + clicks_per_second / SCROLL_CONFIG['gain']
+
+
+def feed(scroll, tilt, seconds, rate_hz, start=0.0):
+    steps = int(round(seconds * rate_hz))
+    for i in range(steps):
+        scroll.update(tilt, start + i / rate_hz)
+    return start + steps / rate_hz
+
+
+def tick(scroll, seconds, start):
+    steps = int(round(seconds / TICK))
+    for i in range(1, steps + 1):
+        scroll.tick(start + i * TICK)
+    return start + steps * TICK
+
+
+def make_scroll(**overrides):
+    backend = NullBackend()
+    return backend, ScrollController(backend, dict(SCROLL_CONFIG, **overrides))
+
+
+def test_fast_samples_are_coalesced_into_whole_clicks():
+    backend, scroll = make_scroll()
+    feed(scroll, tilt_for(10.0), 1.0, 500)
+    # 500 samples, about 9 clicks once the response time is paid, one per event
+    assert 8 <= scroll.clicks <= 10
+    assert backend.scroll_events == scroll.events == scroll.clicks
+    # Positive tilt scrolls down, which the OS counts as negative
+    assert backend.scroll_clicks == -scroll.clicks
+
+
+def test_events_are_limited_to_one_per_output_interval():
+    backend, scroll = make_scroll()
+    feed(scroll, 1000.0, 1.0, 500)
+    assert scroll.velocity == pytest.approx(SCROLL_CONFIG['max_velocity'], rel=0.01)
+    assert scroll.events <= 1.0 / TICK + 1
+    assert scroll.clicks == pytest.approx(55, abs=3)
+
+
+def test_dead_zone_ignores_tremor():
+    backend, scroll = make_scroll()
+    feed(scroll, SCROLL_CONFIG['dead_zone'] * 0.9, 1.0, 500)
+    assert backend.scroll_events == 0
+
+
+def test_scroll_coasts_after_release():
+    backend, scroll = make_scroll()
+    now = feed(scroll, -1000.0, 0.5, 200)
+    held = scroll.clicks
+    feed(scroll, 0.0, 3.0, 200, start=now)
+    coasted = scroll.clicks - held
+    # Roughly max_velocity * inertia, less the tail below stop_velocity
+    assert coasted == pytest.approx(SCROLL_CONFIG['max_velocity'] * SCROLL_CONFIG['inertia'],
+                                    abs=3)
+    assert scroll.velocity == 0.0
+    assert backend.scroll_clicks == scroll.clicks  # negative tilt scrolls up
+
+
+def test_stalled_device_keeps_coasting_on_ticks():
+    backend, scroll = make_scroll()
+    now = feed(scroll, 1000.0, 0.5, 200)
+    held = scroll.clicks
+    # Without ticks nothing more would be emitted
+    tick(scroll, 3.0, now)
+    coasted = scroll.clicks - held
+    expected = SCROLL_CONFIG['max_velocity'] * (SCROLL_CONFIG['stall_timeout'] +
+                                                SCROLL_CONFIG['inertia'])
+    assert coasted == pytest.approx(expected, abs=3)
+    assert scroll.velocity == 0.0
+
+
+def test_slow_samples_flush_on_the_output_tick():
+    backend, scroll = make_scroll()
+    emitted_between = 0
+    now = 0.0
+    for _ in range(20):  # 12.5 Hz, faster than stall_timeout
+        scroll.update(tilt_for(30.0), now)
+        before = scroll.events
+        now = tick(scroll, 0.08, now)
+        emitted_between += scroll.events - before
+    # Clicks go out between samples, and the held tilt keeps full speed
+    assert emitted_between > 0
+    assert scroll.velocity == pytest.approx(30.0, rel=0.05)
+    assert scroll.clicks == pytest.approx(30.0 * 1.6 - 3, abs=3)
+
+
+def test_late_sample_does_not_double_count_ticked_time():
+    backend, scroll = make_scroll()
+    feed(scroll, tilt_for(20.0), 0.5, 100)
+    scroll.tick(0.6)
+    pending = scroll.pending + scroll.clicks
+    scroll.update(tilt_for(20.0), 0.55)  # stamped before the last tick
+    assert scroll.pending + scroll.clicks == pytest.approx(pending)
+    assert scroll.last_update == 0.6
+
+
+def test_controller_runs_output_thread_only_in_scroll_mode():
+    controller = MouseController(backend=NullBackend())
+    assert controller.scroll._thread is None
+    controller.set_output_mode("scroll")
+    try:
+        assert controller.scroll._thread.is_alive()
+    finally:
+        controller.set_output_mode("cursor")
+    assert controller.scroll._thread is None
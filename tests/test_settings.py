@@ -0,0 +1,120 @@
+import json
+import threading
+
+import pytest
+
+from settings import SCHEMA, Settings, SettingsStore
+
+
+def test_values_are_converted_and_clamped():
+    snapshot = Settings.validated(cursor_speed="7.5", smoothing=2.0, dead_zone=-1)
+    assert snapshot.cursor_speed == 7.5
+    assert snapshot.smoothing == SCHEMA['smoothing'][2]
+    assert snapshot.dead_zone == SCHEMA['dead_zone'][1]
+
+
+def test_invalid_values_are_rejected():
+    with pytest.raises(ValueError, match="Unknown settings: speed"):
+        Settings.validated(speed=3)
+    with pytest.raises(ValueError, match="must be a number"):
+        Settings.validated(smoothing=float('nan'))
+    with pytest.raises(ValueError, match="cursor_speed must be float") as info:
+        Settings.validated(cursor_speed="fast")
+    assert isinstance(info.value.__cause__, ValueError)
+
+
+def test_update_keeps_other_values_and_notifies():
+    store = SettingsStore()
+    seen = []
+    store.add_listener(seen.append)
+    store.add_listener(lambda snapshot: 1 / 0)  # a failing listener is only logged
+    before = store.current
+    after = store.update(cursor_speed=12.0)
+    assert store.current is after
+    assert after.smoothing == before.smoothing
+    assert before.cursor_speed != 12.0  # old snapshots never change
+    assert seen == [after]
+
+
+def test_failed_update_leaves_current_snapshot():
+    store = SettingsStore()
+    before = store.current
+    with pytest.raises(ValueError):
+        store.update(cursor_speed=20.0, bogus=1)
+    assert store.current is before
+
+
+def test_readers_never_see_a_half_applied_update():
+    store = SettingsStore()
+    pairs = [(1.0, 0.1), (20.0, 0.9)]
+    stop = threading.Event()
+    mixed = []
+
+    def read():
+        while not stop.is_set():
+            current = store.current
+            if (current.cursor_speed, current.smoothing) not in pairs + [
+                    (SCHEMA['cursor_speed'][3], SCHEMA['smoothing'][3])]:
+                mixed.append(current)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(2000):
+        speed, smoothing = pairs[i % 2]
+        store.update(cursor_speed=speed, smoothing=smoothing)
+    stop.set()
+    reader.join()
+    assert mixed == []
+
+
+def test_profiles_round_trip_through_disk(tmp_path):
+    path = str(tmp_path / 'profiles.json')
+    store = SettingsStore(path)
+    store.update(cursor_speed=8.0, dead_zone=4.0)
+    store.save_profile('precise')
+    store.load_profile('default')
+
+    reloaded = SettingsStore(path)
+    assert reloaded.load() == Settings.defaults()
+    assert reloaded.profile_names() == ['default', 'precise']
+    precise = reloaded.load_profile('precise')
+    assert (precise.cursor_speed, precise.dead_zone) == (8.0, 4.0)
+    # The active profile is remembered
+    assert SettingsStore(path).load() == precise
+
+
+def test_load_skips_bad_profiles_and_unknown_fields(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({
+        'active': 'gone',
+        'profiles': {
+            'broken': {'cursor_speed': 'fast'},
+            'old': {'cursor_speed': 3.0, 'acceleration': 2.0},
+            'not_a_dict': [1, 2],
+        },
+    }))
+    store = SettingsStore(str(path))
+    assert store.load() == Settings.defaults()
+    assert store.profile_names() == ['default', 'old']
+    assert store.profiles['old'].cursor_speed == 3.0
+
+
+@pytest.mark.parametrize('text', ['{not json', '[]', '"x"', '{"profiles": [1]}',
+                                  '{"active": [], "profiles": {}}'])
+def test_unreadable_file_keeps_defaults(tmp_path, text):
+    path = tmp_path / 'profiles.json'
+    path.write_text(text)
+    store = SettingsStore(str(path))
+    assert store.load() == Settings.defaults()
+
+
+def test_profile_errors(tmp_path):
+    store = SettingsStore(str(tmp_path / 'profiles.json'))
+    with pytest.raises(KeyError):
+        store.load_profile('missing')
+    with pytest.raises(ValueError):
+        store.delete_profile('default')
+    store.save_profile('work')
+    store.delete_profile('work')
+    assert store.active_profile == 'default'
+    assert store.profile_names() == ['default']
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+import shm_ring
+from mouse_controller import MouseController, NullBackend
+from shm_ring import KIND_CURSOR, KIND_IMU, RECORD_FIELDS, SampleRing
+
+pytestmark = pytest.mark.skipif(not shm_ring.HAS_SHARED_MEMORY,
+                                reason="needs multiprocessing.shared_memory")
+
+
+@pytest.fixture
+def ring():
+    ring = SampleRing.create(8)
+    yield ring
+    ring.close()
+
+
+def fill(ring, start, stop):
+    for i in range(start, stop):
+        ring.write(float(i), KIND_CURSOR, (i, -i))
+
+
+def test_reader_sees_records_in_order(ring):
+    fill(ring, 0, 5)
+    position, rows, dropped = ring.read(0)
+    assert (position, dropped) == (5, 0)
+    assert [row[0] for row in rows] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # Short value tuples are padded with zeros
+    assert rows[3] == (3.0, KIND_CURSOR, 3.0, -3.0, 0.0, 0.0, 0.0, 0.0)
+    assert ring.read(position) == (5, [], 0)
+
+
+def test_reads_wrap_around_the_end_of_the_ring(ring):
+    fill(ring, 0, 6)
+    position, _, _ = ring.read(0)
+    fill(ring, 6, 12)
+    position, rows, dropped = ring.read(position)
+    assert (position, dropped) == (12, 0)
+    assert [row[0] for row in rows] == [6.0, 7.0, 8.0, 9.0, 10.0, 11.0]
+
+
+def test_limit_reads_in_batches(ring):
+    fill(ring, 0, 7)
+    position, rows, _ = ring.read(0, limit=3)
+    assert position == 3 and len(rows) == 3
+    position, rows, _ = ring.read(position, limit=10)
+    assert position == 7 and [row[0] for row in rows] == [3.0, 4.0, 5.0, 6.0]
+
+
+def test_lapped_reader_skips_to_oldest_and_counts_drops(ring):
+    fill(ring, 0, 20)
+    position, rows, dropped = ring.read(0)
+    # Record 12's slot is the one the next write refills, so it is not trusted
+    assert dropped == 13
+    assert [row[0] for row in rows] == [float(i) for i in range(13, 20)]
+    assert position == ring.written() == 20
+
+
+def test_rows_overwritten_during_the_copy_are_dropped(ring, monkeypatch):
+    fill(ring, 0, 8)
+    copy = SampleRing._rows
+
+    def slow_copy(self, start, stop):
+        rows = copy(self, start, stop)
+        fill(self, 8, 11)  # the writer laps the first three slots meanwhile
+        return rows
+
+    monkeypatch.setattr(SampleRing, '_rows', slow_copy)
+    position, rows, dropped = ring.read(0)
+    assert position == 8
+    assert dropped == 3 + 1  # the slot being refilled next is not trusted either
+    assert [row[0] for row in rows] == [4.0, 5.0, 6.0, 7.0]
+
+
+def test_attached_reader_sees_the_writer(ring):
+    reader = SampleRing.attach(ring.name)
+    try:
+        assert reader.capacity == ring.capacity
+        ring.write(1.5, KIND_IMU, (1, 2, 3, 4, 5, 6))
+        _, rows, _ = reader.read(0)
+        assert rows == [(1.5, KIND_IMU, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)]
+    finally:
+        reader.close()
+
+
+def test_as_array_is_a_view_of_the_slots(ring):
+    np = pytest.importorskip('numpy')
+    fill(ring, 0, 10)
+    array = ring.as_array()
+    assert array.shape == (8, RECORD_FIELDS)
+    assert np.array_equal(array[:, 0], [8, 9, 2, 3, 4, 5, 6, 7])
+    del array
+
+
+def test_creator_close_frees_the_block():
+    ring = SampleRing.create(4)
+    name = ring.name
+    ring.close()
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        SampleRing.attach(name)
+
+
+def test_detaching_the_sink_waits_for_a_write_in_progress():
+    controller = MouseController(backend=NullBackend())
+    writing = threading.Event()
+    release = threading.Event()
+    finished = []
+
+    class SlowSink:
+        def write(self, t, kind, values):
+            writing.set()
+            release.wait(5.0)
+            finished.append(kind)
+
+    controller.set_sample_sink(SlowSink())
+    reader = threading.Thread(target=controller.process_data, args=("CURSOR,0,0",))
+    reader.start()
+    assert writing.wait(5.0)
+
+    detacher = threading.Thread(target=controller.set_sample_sink, args=(None,))
+    detacher.start()
+    detacher.join(0.2)
+    # Still blocked: freeing the ring now would pull it from under the write
+    assert detacher.is_alive()
+    release.set()
+    detacher.join(5.0)
+    reader.join(5.0)
+    assert finished == [KIND_CURSOR]
+    assert controller.sample_sink is None
@@ -2,6 +2,8 @@ import socket
 import logging
 import time
 import threading
+from metrics import Counter, Histogram
+from config import MAX_LINE_LENGTH
 
 class WiFiHandler:
     def __init__(self):
@@ -10,11 +12,27 @@ class WiFiHandler:
         self.logger = logging.getLogger('AirMouse.WiFi')
         self.connected = False
         self.buffer = ""
+        self._discarding = False  # inside an oversized line, skip to the next newline
         self.read_thread = None
         self.running = False
         self.data_callback = None
         self._lock = threading.Lock()  # Thread safety lock
 
+        # Stream counters, written by the read thread only
+        self.messages_received = 0
+        self.bytes_received = 0
+        self.last_batch_lines = 0  # complete lines framed from the last recv
+        self.last_recv_time = None  # perf_counter() when the last chunk arrived
+
+        self.metric_connects = Counter('wifi_connects_total', 'Successful connections to the device')
+        self.metric_decode_errors = Counter('wifi_dropped_chunks_total',
+                                            'Received chunks dropped as invalid UTF-8')
+        self.metric_read_errors = Counter('wifi_read_errors_total', 'Socket read failures')
+        self.metric_oversized = Counter('wifi_oversized_lines_total',
+                                        'Lines dropped for exceeding MAX_LINE_LENGTH')
+        self.metric_feed_seconds = Histogram('wifi_feed_seconds',
+                                             'Time to frame and dispatch one received chunk')
+
     def connect(self, ip_address, port=80):
         """Connect to ESP32 via WiFi"""
         try:
@@ -25,6 +43,7 @@ class WiFiHandler:
 
             self.socket.connect((ip_address, port))
             self.connected = True
+            self.metric_connects.inc()
             self.logger.info(f"Connected to {ip_address}:{port}")
 
             # Start read thread
@@ -80,38 +99,65 @@ class WiFiHandler:
                     self.connected = False
                     break
 
-                # Improved decoding with error handling
-                try:
-                    text = data.decode('utf-8').replace('\r', '')
-                except UnicodeDecodeError:
-                    self.logger.warning("Invalid UTF-8 data received")
-                    continue
-
-                lines = text.split('\n')
-
-                # Handle incomplete lines from previous reads
-                if self.buffer:
-                    lines[0] = self.buffer + lines[0]
-                    self.buffer = ""
-
-                # Process complete lines
-                for i in range(len(lines) - 1):
-                    line = lines[i].strip()
-                    if line and self.data_callback:
-                        self.data_callback(line)
-
-                # Save incomplete last line
-                if lines[-1]:
-                    self.buffer = lines[-1]
+                start = time.perf_counter()
+                self.last_recv_time = start
+                self._feed(data)
+                self.metric_feed_seconds.observe(time.perf_counter() - start)
 
             except socket.timeout:
                 continue
             except Exception as e:
+                self.metric_read_errors.inc()
                 self.logger.error(f"Read error: {e}")
                 self.connected = False
                 break
 
-            time.sleep(0.01)
+    def _feed(self, data):
+        """Split received bytes into lines and dispatch complete ones"""
+        self.bytes_received += len(data)
+
+        # Improved decoding with error handling
+        try:
+            text = data.decode('utf-8').replace('\r', '')
+        except UnicodeDecodeError:
+            self.metric_decode_errors.inc()
+            self.logger.warning("Invalid UTF-8 data received")
+            return 0
+
+        lines = text.split('\n')
+
+        # Handle incomplete lines from previous reads
+        if self._discarding:
+            if len(lines) == 1:
+                return 0
+            lines[0] = ""  # tail of the line that was dropped
+            self._discarding = False
+        elif self.buffer:
+            lines[0] = self.buffer + lines[0]
+            self.buffer = ""
+
+        # Process complete lines
+        count = len(lines) - 1
+        for i in range(count):
+            line = lines[i].strip()
+            if len(line) > MAX_LINE_LENGTH:
+                self.metric_oversized.inc()
+                continue
+            if line and self.data_callback:
+                self.data_callback(line)
+
+        # Save incomplete last line; a stream without newlines must not grow it forever
+        if len(lines[-1]) > MAX_LINE_LENGTH:
+            self.metric_oversized.inc()
+            self._discarding = True
+            self.logger.warning("Dropping unterminated line longer than "
+                                f"{MAX_LINE_LENGTH} characters")
+        elif lines[-1]:
+            self.buffer = lines[-1]
+
+        self.messages_received += count
+        self.last_batch_lines = count
+        return count
 
     def debug_raw_data(self, duration=10):
         """Log raw incoming data for debugging"""
@@ -128,6 +174,23 @@ class WiFiHandler:
                 break
             time.sleep(0.1)
 
+    def attach_metrics(self, registry):
+        """Export this handler's counters through a MetricsRegistry"""
+        for metric in (self.metric_connects, self.metric_decode_errors,
+                       self.metric_read_errors, self.metric_oversized,
+                       self.metric_feed_seconds):
+            registry.register(metric)
+        registry.function('wifi_messages_total', 'Lines received from the device',
+                          lambda: self.messages_received, kind='counter')
+        registry.function('wifi_bytes_total', 'Bytes received from the device',
+                          lambda: self.bytes_received, kind='counter')
+        registry.function('wifi_reconnects_total', 'Connections after the first',
+                          lambda: max(0, self.metric_connects.value - 1), kind='counter')
+        registry.function('wifi_connected', 'Whether the device is connected',
+                          lambda: int(self.connected))
+        registry.function('wifi_last_batch_lines', 'Lines framed from the last recv',
+                          lambda: self.last_batch_lines)
+
     def set_data_callback(self, callback):
         """Set callback for received data"""
         self.data_callback = callback